@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+
+"""
+Memory benchmark for animal and landscape cell objects.
+
+Reports the bytes needed per animal and per cell, measured with `tracemalloc`, including the
+list slot that holds each object. The columnar `Herd` storage is reported for comparison.
+
+Run from the repository root with::
+
+    python -m benchmarks.memory_benchmark --animals 1000000 --cells 100000 --island-cells 2500
+"""
+
+__author__ = "Anders Mølmen Høst & Petter Kolstad Hetland"
+__email__ = "anders.molmen.host@nmbu.no, petter.storesund.hetland@nmbu.no"
+
+import argparse
+import gc
+import tracemalloc
+
+from biosim_src.animal import Herbivore, Carnivore
+from biosim_src.columnar import Herd
+from biosim_src.landscape import Island, Lowland
+
+
+def measure(factory):
+    """Bytes allocated by `factory()` while its result is still alive."""
+    gc.collect()
+    gc.disable()  # Collections of millions of tracked objects dominate the run time otherwise
+    tracemalloc.start()
+    result = factory()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    gc.enable()
+    del result
+    return size
+
+
+def animal_population(num_animals):
+    """Population of animals as they are held in cells, half herbivores and half carnivores."""
+    herbs = [Herbivore(weight=20.0, age=5) for _ in range(num_animals // 2)]
+    carns = [Carnivore(weight=20.0, age=5) for _ in range(num_animals - num_animals // 2)]
+    for animal in herbs + carns:
+        animal.fitness  # Fill the fitness cache as during a simulation
+    return herbs, carns
+
+
+def island_map(num_cells):
+    """Square island of Lowland cells with a water border, with about `num_cells` cells."""
+    side = max(int(num_cells ** 0.5), 3)
+    rows = ["W" * side] + ["W" + "L" * (side - 2) + "W" for _ in range(side - 2)] + ["W" * side]
+    return "\n".join(rows), side * side
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--animals", type=int, default=1_000_000, help="number of animals")
+    parser.add_argument("--cells", type=int, default=100_000, help="number of cells")
+    parser.add_argument("--island-cells", type=int, default=2_500,
+                        help="number of cells in the island map")
+    args = parser.parse_args()
+
+    animal_bytes = measure(lambda: animal_population(args.animals))
+    herd_bytes = measure(
+        lambda: Herd(Herbivore, weight=[20.0] * args.animals, age=[5] * args.animals)
+    )
+    cell_bytes = measure(lambda: [Lowland() for _ in range(args.cells)])
+    map_str, num_cells = island_map(args.island_cells)
+    island_bytes = measure(lambda: Island(map_str))
+
+    print("{:<36} {:>14} {:>12}".format("", "total [MB]", "bytes each"))
+    for label, size, count in [
+        ("Animal objects ({} animals)".format(args.animals), animal_bytes, args.animals),
+        ("Herd arrays ({} animals)".format(args.animals), herd_bytes, args.animals),
+        ("Lowland cells ({} cells)".format(args.cells), cell_bytes, args.cells),
+        ("Island ({} cells)".format(num_cells), island_bytes, num_cells),
+    ]:
+        print("{:<36} {:>14.1f} {:>12.1f}".format(label, size / 1e6, size / count))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark of the carnivore feeding phase in dense cells.
+
+Compares `BioSim.predation` with the previous algorithm, where every carnivore re-sorted the
+herbivores, scanned the whole list and removed each kill with `list.remove`.
+
+Run from the repository root with::
+
+    python -m benchmarks.predation_benchmark
+"""
+
+__author__ = "Anders Mølmen Høst & Petter Kolstad Hetland"
+__email__ = "anders.molmen.host@nmbu.no, petter.storesund.hetland@nmbu.no"
+
+import random
+import time
+
+from biosim_src.animal import Herbivore, Carnivore
+from biosim_src.biosim import BioSim
+from biosim_src.landscape import Lowland
+
+CELL_SIZES = [(100, 1000), (300, 3000), (500, 5000)]  # (carnivores, herbivores) per cell
+REPEATS = 3
+
+
+def legacy_kill_prey(carn, sorted_herbivores):
+    """Previous `Carnivore.kill_prey`, scanning the full list even after the carnivore is sated."""
+    consumption_weight = 0
+    herbs_killed = []
+    fitness = carn.fitness
+
+    for herb in sorted_herbivores:
+        if consumption_weight < carn.p["F"]:
+            fitness_diff = fitness - herb[1]
+            if fitness_diff <= 0:
+                kill_prey = False
+            elif 0 < fitness_diff < carn.p["DeltaPhiMax"]:
+                kill_prey = random.random() <= fitness_diff / carn.p["DeltaPhiMax"]
+            else:
+                kill_prey = True
+
+            if kill_prey:
+                carn._fitness_valid = False
+                consumption_weight += herb[0].weight
+                herbs_killed.append(herb[0])
+        else:
+            continue
+
+    carn.weight += min(consumption_weight, carn.p["F"]) * carn.p["beta"]
+    return herbs_killed
+
+
+def legacy_predation(sim, cell):
+    """Previous carnivore loop of `BioSim.feeding`."""
+    for carn in cell.sorted_carnivores:
+        fitness_dict = {herb: herb.fitness for herb in cell.herbivores}
+        sorted_herbivores = sorted(fitness_dict.items(), key=lambda x: x[1])
+        herbs_killed = legacy_kill_prey(carn, sorted_herbivores)
+        for herb in herbs_killed:
+            cell.herbivores.remove(herb)
+        sim._island.del_animals(num_herbs=len(herbs_killed))
+
+
+def make_cell(num_carns, num_herbs, seed):
+    """Create a Lowland cell with a mixed population of young carnivores and herbivores."""
+    random.seed(seed)
+    cell = Lowland()
+    cell.add_animals(
+        [Herbivore(weight=random.uniform(5, 40), age=random.randint(0, 30))
+         for _ in range(num_herbs)]
+        + [Carnivore(weight=random.uniform(20, 60), age=random.randint(0, 10))
+           for _ in range(num_carns)]
+    )
+    return cell
+
+
+def time_predation(predation, num_carns, num_herbs):
+    """Best wall time of `predation` on freshly created cells."""
+    sim = BioSim(plot_graph=False)
+    best = float("inf")
+    for repeat in range(REPEATS):
+        cell = make_cell(num_carns, num_herbs, seed=repeat)
+        sim._island.count_animals(num_herbs=num_herbs)
+        start = time.perf_counter()
+        predation(sim, cell)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    print("{:>6} {:>7} {:>12} {:>12} {:>8}".format("carns", "herbs", "legacy [s]", "new [s]",
+                                                   "speedup"))
+    for num_carns, num_herbs in CELL_SIZES:
+        legacy = time_predation(legacy_predation, num_carns, num_herbs)
+        new = time_predation(BioSim.predation, num_carns, num_herbs)
+        print("{:>6} {:>7} {:>12.4f} {:>12.4f} {:>7.1f}x".format(
+            num_carns, num_herbs, legacy, new, legacy / new
+        ))
+
+
+if __name__ == "__main__":
+    main()
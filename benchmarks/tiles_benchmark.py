@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+
+"""
+Scaling benchmark for simulating one island with several worker processes.
+
+Reports years per second of the 'object' engine for each number of workers, and the speed-up
+relative to one worker. Every cell starts with the same small population.
+
+Run from the repository root with::
+
+    python -m benchmarks.tiles_benchmark --side 100 --years 5 --workers 1 2 4 8
+"""
+
+__author__ = "Anders Mølmen Høst & Petter Kolstad Hetland"
+__email__ = "anders.molmen.host@nmbu.no, petter.storesund.hetland@nmbu.no"
+
+import argparse
+import os
+import time
+
+from biosim_src.biosim import BioSim
+
+
+def island_map(side):
+    """Square island of Lowland cells with a water border."""
+    rows = ["W" * side] + ["W" + "L" * (side - 2) + "W" for _ in range(side - 2)] + ["W" * side]
+    return "\n".join(rows)
+
+
+def population(side, herbs, carns):
+    """Population with `herbs` herbivores and `carns` carnivores in every land cell."""
+    return [
+        {
+            "loc": (row, col),
+            "pop": [{"species": "Herbivore", "age": 5, "weight": 20}] * herbs
+            + [{"species": "Carnivore", "age": 5, "weight": 20}] * carns,
+        }
+        for row in range(2, side) for col in range(2, side)
+    ]
+
+
+def years_per_second(side, herbs, carns, years, workers):
+    """Simulate the island with the given number of workers, excluding start-up of workers."""
+    sim = BioSim(island_map(side), population(side, herbs, carns), plot_graph=False,
+                 workers=workers)
+    sim.run_years(1)  # Start the workers
+    start = time.perf_counter()
+    sim.run_years(years)
+    elapsed = time.perf_counter() - start
+    sim.close()
+    return years / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--side", type=int, default=100, help="side length of the map")
+    parser.add_argument("--herbs", type=int, default=10, help="herbivores per cell")
+    parser.add_argument("--carns", type=int, default=2, help="carnivores per cell")
+    parser.add_argument("--years", type=int, default=5, help="years to simulate")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="numbers of workers to compare")
+    args = parser.parse_args()
+
+    print("CPUs available: {}".format(os.cpu_count()))
+    print("{:>8} {:>14} {:>10}".format("workers", "years/s", "speed-up"))
+    baseline = None
+    for workers in args.workers:
+        rate = years_per_second(args.side, args.herbs, args.carns, args.years, workers)
+        baseline = rate if baseline is None else baseline
+        print("{:>8} {:>14.3f} {:>10.2f}".format(workers, rate, rate / baseline))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,61 @@ __author__ = "Anders Mølmen Høst & Petter Kolstad Hetland"
 __email__ = "anders.molmen.host@nmbu.no, petter.storesund.hetland@nmbu.no"
 
 import random as random
-from math import e
+from math import e, exp, log1p
+import numpy as np
+
+
+class AgeClock:
+    """Current year of a simulation, from which animals with a clock derive their age.
+
+    :param year: Current year
+    :type year: int
+
+    .. note::
+        An animal with a clock stores its birth year, and its age is `year` minus the birth
+        year. Advancing the clock ages all those animals at once.
+
+    .. seealso::
+        - Animal.age
+    """
+
+    __slots__ = ("year",)
+
+    def __init__(self, year=0):
+        self.year = year
+
+    def advance(self):
+        """Move to the next year, making every animal with this clock one year older."""
+        self.year += 1
+
+
+class WeightScale:
+    """Yearly loss of weight of one species, applied to all its animals by one addition.
+
+    .. note::
+        An animal with a scale stores its weight together with the `log_factor` at the time
+        it was stored. Its weight is the stored weight times exp(log_factor - stored factor),
+        so `decay` makes all those animals lose weight at once. Only differences over the
+        lifetime of an animal are used, so the factor can neither underflow nor overflow.
+
+    .. seealso::
+        - Animal.weight
+    """
+
+    __slots__ = ("log_factor",)
+
+    def __init__(self):
+        self.log_factor = 0.0
+
+    def decay(self, eta):
+        """Let every animal with this scale lose the fraction `eta` of its weight.
+
+        :param eta: Fraction of the weight lost, less than 1
+        :type eta: float
+        """
+        if eta >= 1:
+            raise ValueError("Scaled weights need eta to be less than 1!")
+        self.log_factor += log1p(-eta)
 
 
 class Animal:
@@ -18,21 +72,38 @@ class Animal:
     :type weight: float
     :param age: Age of animal
     :type age: int
+    :param clock: Clock giving the age from the birth year, None to count the age
+    :type clock: AgeClock
+    :param scale: Weight scale of the species, None to store the weight itself
+    :type scale: WeightScale
+
+    .. note::
+        - Animals use `__slots__` and take their species from the class, so an instance only
+            stores its own state.
+        - Without a clock `_age` is the age, which `aging` increments. With a clock `_age`
+            is the birth year.
+        - With a scale, `_weight` is relative to the scale factor `_weight_ref` and is
+            brought up to date when the weight is read or written.
+        - With a clock or a scale the saved fitness also records the clock year and scale
+            factor it was computed for, since age and weight change when they advance.
     """
 
-    def __init__(self, weight, age):
+    __slots__ = ("_weight", "_age", "_fitness", "_fitness_valid", "_clock", "_scale",
+                 "_weight_ref", "_fitness_key")
+
+    def __init__(self, weight, age, clock=None, scale=None):
+        self._scale = scale
+        self._weight_ref = None if scale is None else scale.log_factor
         if weight is None:
             self._weight = self.birth_weight
         else:
             self._weight = float(weight)
-        self._age = age
-
-        self._species = self.__class__.__name__
-        self._death_prob = None
-        self.has_moved = False
+        self._clock = clock
+        self._age = age if clock is None else clock.year - age  # Birth year with a clock
 
         self._fitness = None
         self._fitness_valid = False
+        self._fitness_key = None  # Clock year and scale factor of the saved fitness
 
     @classmethod
     def set_params(cls, new_params):
@@ -67,19 +138,23 @@ class Animal:
     def __repr__(self):
         """Format for string representation.
         """
-        return "{}({} years, {:.3} kg)".format(self._species, self._age, self._weight)
+        return "{}({} years, {:.3} kg)".format(self.species, self.age, self.weight)
 
     def __str__(self):
         """Format for better readability.
         """
-        return "{}({} years, {:.3} kg)".format(self._species, self._age, self._weight)
+        return "{}({} years, {:.3} kg)".format(self.species, self.age, self.weight)
 
     @classmethod
-    def from_dict(cls, animal_dict):
+    def from_dict(cls, animal_dict, clock=None, scale=None):
         """Allows the sim to add instances directly from dictionaries when adding populations.
 
         :param animal_dict: Dictionary that specifies class weight and age
         :type animal_dict: dict
+        :param clock: Clock giving the age from the birth year, None to count the age
+        :type clock: AgeClock
+        :param scale: Weight scale of the species, None to store the weight itself
+        :type scale: WeightScale
 
         :Example:
             .. code-block:: python
@@ -93,7 +168,7 @@ class Animal:
         """
         class_weight = animal_dict["weight"]
         class_age = animal_dict["age"]
-        return cls(age=class_age, weight=class_weight)
+        return cls(age=class_age, weight=class_weight, clock=clock, scale=scale)
 
     @property
     def weight(self):
@@ -102,12 +177,17 @@ class Animal:
         :return: Weight of animal
         :r_type: float
         """
+        if self._scale is not None and self._weight_ref != self._scale.log_factor:
+            self._weight *= exp(self._scale.log_factor - self._weight_ref)  # Lazy weight loss
+            self._weight_ref = self._scale.log_factor
         return self._weight
 
     @weight.setter
     def weight(self, weight):
         """Setter method for Animal._weight"""
         self._weight = weight
+        if self._scale is not None:
+            self._weight_ref = self._scale.log_factor
 
     @property
     def age(self):
@@ -116,21 +196,23 @@ class Animal:
         :return: Age of animal
         :r_type: int
         """
-        return self._age
+        if self._clock is None:
+            return self._age
+        return self._clock.year - self._age
 
     @age.setter
     def age(self, age):
         """Setter method for Animal._age."""
-        self._age = age
+        self._age = age if self._clock is None else self._clock.year - age
 
     @property
     def species(self):
-        """Getter method for Animal._species
+        """Species of animal, given by the name of its class.
 
         :return: Species of animal
         :r_type: str
         """
-        return self._species
+        return self.__class__.__name__
 
     def aging(self):
         """Increments age by one every season.
@@ -140,11 +222,13 @@ class Animal:
         """
         self.age += 1
 
-    def give_birth(self, n_same):
+    def give_birth(self, n_same, rng=random):
         """Animals give birth based on fitness and same-type animals in cell.
 
         :param n_same: number of same-type animals
         :type n_same: int
+        :param rng: Source of random numbers, e.g. a `CellStream`
+        :type rng: module
 
             ...
 
@@ -168,12 +252,12 @@ class Animal:
         elif birth_prob >= 1:
             give_birth = True
         elif 0 < birth_prob < 1:
-            give_birth = True if random.random() < birth_prob else False
+            give_birth = True if rng.random() < birth_prob else False
         else:
             give_birth = False
 
         if give_birth:  # If give_birth is true
-            birth_weight = self.birth_weight
+            birth_weight = rng.gauss(self.p["w_birth"], self.p["sigma_birth"])
             if birth_weight < self.weight:
                 self.weight -= self.p["xi"] * birth_weight
                 self._fitness_valid = False  # Signal that saved fitness is incorrect
@@ -183,9 +267,58 @@ class Animal:
         else:
             return False, None
 
-    def migrate(self):
+    @classmethod
+    def procreate(cls, animals, generator):
+        """All animals of the class in a cell try to give birth at once.
+
+        :param animals: Animals of the class in the cell
+        :type animals: list
+        :param generator: Random number generator of the cell
+        :type generator: numpy.random.Generator
+
+        :return: Newborn animals
+        :rtype: list
+
+        .. note::
+            - The birth probabilities `gamma * fitness * (n - 1)` of all animals are computed
+                in one array operation, with one uniform number drawn for each animal and one
+                normal birth weight drawn for each animal giving birth.
+            - Mothers lose `xi` times the birth weight in one array operation, and the births
+                follow the same rules as `give_birth`.
+
+        .. seealso::
+            - `Animal.give_birth`
+            - `BioSim.procreation`
+        """
+        num_animals = len(animals)
+        if num_animals < 2:
+            return []  # Birth probability is zero without another animal of the species
+
+        weights = np.fromiter((animal.weight for animal in animals), float, num_animals)
+        ages = np.fromiter((animal.age for animal in animals), float, num_animals)
+        birth_prob = cls.p["gamma"] * cls.fitness_array(ages, weights) * (num_animals - 1)
+        heavy = weights >= cls.p["zeta"] * (cls.p["w_birth"] + cls.p["sigma_birth"])
+        mothers = np.flatnonzero(heavy & (generator.random(num_animals) < birth_prob))
+
+        birth_weights = generator.normal(cls.p["w_birth"], cls.p["sigma_birth"], mothers.size)
+        born = birth_weights < weights[mothers]
+        mothers, birth_weights = mothers[born], birth_weights[born]
+        mother_weights = weights[mothers] - cls.p["xi"] * birth_weights
+
+        for index, weight in zip(mothers.tolist(), mother_weights.tolist()):
+            mother = animals[index]
+            mother.weight = weight
+            mother._fitness_valid = False  # Signal that saved fitness is incorrect
+        clock, scale = animals[0]._clock, animals[0]._scale
+        return [cls(weight=weight, age=0, clock=clock, scale=scale)
+                for weight in birth_weights.tolist()]
+
+    def migrate(self, rng=random):
         """Method deciding whether animal will migrate or not.
 
+        :param rng: Source of random numbers, e.g. a `CellStream`
+        :type rng: module
+
         :return: Boolean value where True is migrate
         :rtype: bool
 
@@ -195,7 +328,7 @@ class Animal:
 
         """
         move_prob = self.p["mu"] * self.fitness
-        if random.random() < move_prob:
+        if rng.random() < move_prob:
             return True
         else:
             return False
@@ -205,10 +338,13 @@ class Animal:
         self.weight -= self.weight * self.p["eta"]
         self._fitness_valid = False  # Signal that saved fitness is incorrect
 
-    def death(self):
+    def death(self, rng=random):
         """Return true when called if the animal is to be removed from the simulation
         and false otherwise.
 
+        :param rng: Source of random numbers, e.g. a `CellStream`
+        :type rng: module
+
         :return: Bool indicating death or no death
         :rtype: bool
 
@@ -219,11 +355,75 @@ class Animal:
         if self.weight <= 0:
             death = True
         else:
-            self._death_prob = self.p["omega"] * (1 - self.fitness)
-            death = True if random.random() < self._death_prob else False
+            death_prob = self.p["omega"] * (1 - self.fitness)
+            death = True if rng.random() < death_prob else False
 
         return death
 
+    @classmethod
+    def end_year(cls, animals, generator):
+        """All animals of the class in a cell age, lose weight and may die, in one pass.
+
+        :param animals: Animals of the class in the cell
+        :type animals: list
+        :param generator: Random number generator of the cell
+        :type generator: numpy.random.Generator
+
+        :return: Surviving animals, in the same order
+        :rtype: list
+
+        .. note::
+            - Ages and weights are updated as arrays, fitness is computed once with
+                `fitness_array` and kept by the survivors, and one uniform number is drawn for
+                each animal. The rules are those of `aging`, `lose_weight` and `death`.
+            - Animals with an `AgeClock` are not aged here, their clock has been advanced
+                before. Likewise, animals with a `WeightScale` have lost weight by the decay
+                of the scale, and their weights are only computed here, not written back.
+
+        .. seealso::
+            - `BioSim.aging_and_death`
+        """
+        num_animals = len(animals)
+        if num_animals == 0:
+            return animals
+
+        clock, scale = animals[0]._clock, animals[0]._scale
+        ages = np.fromiter((animal.age for animal in animals), int, num_animals)
+        if clock is None:
+            ages += 1
+        weights = np.fromiter((animal._weight for animal in animals), float, num_animals)
+        if scale is None:
+            weights -= weights * cls.p["eta"]
+        else:
+            refs = np.fromiter((animal._weight_ref for animal in animals), float, num_animals)
+            weights *= np.exp(scale.log_factor - refs)
+        key = animals[0]._cache_key()
+        fitness = cls.fitness_array(ages, weights)
+        dead = (weights <= 0) | (generator.random(num_animals) < cls.p["omega"] * (1 - fitness))
+
+        survivors = []
+        for animal, age, weight, fit, died in zip(
+            animals, ages.tolist(), weights.tolist(), fitness.tolist(), dead.tolist()
+        ):
+            if not died:
+                if clock is None:
+                    animal._age = age
+                if scale is None:
+                    animal._weight = weight
+                animal._fitness_key = key
+                animal._fitness = fit
+                animal._fitness_valid = True
+                survivors.append(animal)
+        return survivors
+
+    def _cache_key(self):
+        """Clock year and scale factor that the saved fitness depends on, besides the weight.
+
+        :rtype: tuple
+        """
+        return (None if self._clock is None else self._clock.year,
+                None if self._scale is None else self._scale.log_factor)
+
     @staticmethod
     def q(sgn, x, x_half, phi):
         """Mathematical function for calculating fitness.
@@ -253,14 +453,40 @@ class Animal:
             If animal weight is <= 0, fitness is set to 0 regardless.
 
         """
+        keyed = self._clock is not None or self._scale is not None
+        if keyed and self._fitness_key != self._cache_key():
+            self._fitness_valid = False  # Age or weight changed since the fitness was saved
         if self._fitness is None or not self._fitness_valid:
             self._fitness = self.q(+1, self.age, self.p["a_half"], self.p["phi_age"]) * self.q(
                 -1, self.weight, self.p["w_half"], self.p["phi_weight"]
             )
             self._fitness_valid = True
+            if keyed:
+                self._fitness_key = self._cache_key()
 
         return self._fitness
 
+    @classmethod
+    def fitness_array(cls, age, weight):
+        """Vectorized version of `Animal.fitness` for arrays of ages and weights.
+
+        :param age: Ages of animals
+        :type age: ndarray
+        :param weight: Weights of animals
+        :type weight: ndarray
+
+        :return: Fitness of each animal
+        :rtype: ndarray
+
+        .. seealso::
+            - Animal.fitness
+            - Animal.q
+        """
+        with np.errstate(over="ignore"):  # Overflow gives q = 0.0, which is correct
+            return (
+                1.0 / (1.0 + np.exp(cls.p["phi_age"] * (age - cls.p["a_half"])))
+            ) * (1.0 / (1.0 + np.exp(-cls.p["phi_weight"] * (weight - cls.p["w_half"]))))
+
     @property
     def birth_weight(self):
         """Birth weight of a newborn animal is drawn randomly from a gaussian curve.
@@ -287,6 +513,8 @@ class Herbivore(Animal):
     :param age: Age used to initiate Animal super()
     """
 
+    __slots__ = ()
+
     p = {  # Dictionary of parameters belonging to the Herbivore class
         "w_birth": 8.0,
         "sigma_birth": 1.5,
@@ -304,8 +532,8 @@ class Herbivore(Animal):
         "F": 10.0,
     }
 
-    def __init__(self, weight=None, age=0):
-        super().__init__(weight, age)
+    def __init__(self, weight=None, age=0, clock=None, scale=None):
+        super().__init__(weight, age, clock, scale)
 
     def eat_fodder(self, cell):
         """When an animal eats, its weight increases.
@@ -331,6 +559,45 @@ class Herbivore(Animal):
 
         self._fitness_valid = False  # Signal that saved fitness is incorrect
 
+    @classmethod
+    def graze(cls, herbivores, fodder):
+        """Let herbivores eat in the given order until the fodder is gone.
+
+        :param herbivores: Herbivores in the order they eat
+        :type herbivores: list
+        :param fodder: Fodder available in the cell
+        :type fodder: float
+
+        :return: Fodder left in the cell
+        :rtype: float
+
+        .. note::
+            - Every herbivore wants `F`, so only the first herbivores eat. The fodder left
+                before each of them is found with one `np.subtract.accumulate`, which
+                subtracts `F` repeatedly just like `eat_fodder` does, so the weights are the
+                same to the last bit.
+            - Herbivores after the last one eating are not visited at all.
+
+        .. seealso::
+            - `Herbivore.eat_fodder`
+            - `BioSim.feeding`
+        """
+        appetite = cls.p["F"]
+        if fodder <= 0 or not herbivores:
+            return fodder
+
+        num_eating = len(herbivores)
+        if appetite > 0:  # At most fodder / F herbivores, plus a margin for rounding
+            num_eating = min(num_eating, int(fodder // appetite) + 3)
+        before = np.subtract.accumulate(np.r_[fodder, np.full(num_eating, appetite)])
+        eaten = np.where(before[1:] >= 0, appetite, before[:-1])  # The rest if not enough
+        eaten = eaten[before[:-1] > 0]  # Herbivores finding fodder
+
+        for herb, gain in zip(herbivores, (cls.p["beta"] * eaten).tolist()):
+            herb.weight += gain
+            herb._fitness_valid = False  # Signal that saved fitness is incorrect
+        return max(float(before[eaten.size]), 0.0)
+
 
 class Carnivore(Animal):
     """Carnivore class.
@@ -342,6 +609,8 @@ class Carnivore(Animal):
     :param age: Age used to initiate Animal super()
     """
 
+    __slots__ = ()
+
     p = {  # Dictionary containing default parameter values for Carnivore class
         "w_birth": 6.0,
         "sigma_birth": 1.0,
@@ -360,20 +629,30 @@ class Carnivore(Animal):
         "DeltaPhiMax": 10.0,
     }
 
-    def __init__(self, weight=None, age=0):
-        super().__init__(weight, age)
+    def __init__(self, weight=None, age=0, clock=None, scale=None):
+        super().__init__(weight, age, clock, scale)
 
-    def kill_prey(self, sorted_herbivores):
+    def kill_prey(self, sorted_herbivores, alive=None, rng=random):
         """Iterates through sorted herbivores and eats until F is met.
 
         :param sorted_herbivores: Herbivores sorted by fitness levels from low to high
         :type sorted_herbivores: list
+        :param alive: Flags for `sorted_herbivores`, killed herbivores are set to False
+        :type alive: list
+        :param rng: Source of random numbers, e.g. a `CellStream`
+        :type rng: module
 
         :return: Animals killed by herbivore to be removed from simulation
         :rtype: list
 
+        .. note::
+            - Herbivores flagged as dead in `alive` are skipped, so the same sorted list can be
+                shared by all carnivores in a cell.
+            - The search stops as soon as the carnivore is sated, or when the remaining
+                herbivores are at least as fit as the carnivore.
+
         .. seealso::
-            - BioSim.feeding
+            - BioSim.predation
             - Herbivore.eat_fodder
             - LandscapeCell.sorted_herbivores
 
@@ -382,27 +661,29 @@ class Carnivore(Animal):
         herbs_killed = []
         fitness = self.fitness
 
-        for herb in sorted_herbivores:
-            if consumption_weight < self.p["F"]:
-                fitness_diff = fitness - herb[1]
-                if fitness_diff <= 0:
-                    kill_prey = False
-
-                elif 0 < fitness_diff < self.p["DeltaPhiMax"]:
-                    kill_prob = fitness_diff / self.p["DeltaPhiMax"]
-                    kill_prey = True if random.random() <= kill_prob else False
-
-                else:
-                    kill_prey = True
-
-                if kill_prey:  # If the herb is killed
-                    self._fitness_valid = False  # Signal that saved fitness is incorrect
-                    consumption_weight += herb[
-                        0
-                    ].weight  # Add herb weight to consumption_weight variable
-                    herbs_killed.append(herb[0])
+        for index, herb in enumerate(sorted_herbivores):
+            if consumption_weight >= self.p["F"]:
+                break  # Carnivore is sated
+            if alive is not None and not alive[index]:
+                continue  # Herbivore already killed by another carnivore
+
+            fitness_diff = fitness - herb[1]
+            if fitness_diff <= 0:
+                break  # No herbivore further up the sorted list can be caught
+
+            elif 0 < fitness_diff < self.p["DeltaPhiMax"]:
+                kill_prob = fitness_diff / self.p["DeltaPhiMax"]
+                kill_prey = True if rng.random() <= kill_prob else False
+
             else:
-                continue
+                kill_prey = True
+
+            if kill_prey:  # If the herb is killed
+                self._fitness_valid = False  # Signal that saved fitness is incorrect
+                consumption_weight += herb[0].weight  # Add herb weight to consumption_weight
+                herbs_killed.append(herb[0])
+                if alive is not None:
+                    alive[index] = False
 
         if consumption_weight > self.p["F"]:  # Auto-adjust consumption_weight to be <= F-parameter
             consumption_weight = self.p["F"]
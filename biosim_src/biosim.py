@@ -1,14 +1,25 @@
 # -*- coding: utf-8 -*-
 
-from biosim_src.animal import Herbivore, Carnivore
+from biosim_src.animal import AgeClock, Herbivore, Carnivore, WeightScale
+from biosim_src.columnar import ArrayEngine
+from biosim_src.compiled import CompiledEngine
 from biosim_src.landscape import Island
-from biosim_src.visualization import Plotting
+from biosim_src.renderer import RenderProcess
+from biosim_src.snapshots import Snapshot, SnapshotLog, take_snapshot
+from biosim_src.statistics import DEFAULT_HIST_SPECS, PopulationStatistics
+from biosim_src.streams import CellStream, FEEDING, PROCREATION, MIGRATION, DEATH
+from biosim_src.tiles import TilePool
+from biosim_src.video import FrameSpool, MovieStream, open_frames, save_frame
 
 import random as random
+import secrets
 import numpy as np
+import math
 import time
 import os
 import subprocess
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
 from os import path
 
 # Update these variables to point to your ffmpeg and convert binaries
@@ -28,12 +39,24 @@ class BioSim:
 
             :param island_map: Multi-line string specifying island geography
             :param ini_pop: List of dictionaries specifying initial population
-            :param seed: Integer used as random number seed
+            :param seed: Integer used as random number seed, drawn from the OS if None
             :param ymax_animals: Number specifying y-axis limit for graph showing animal numbers
             :param cmax_animals: Dict specifying color-code limits for animal densities
             :param hist_specs: Specifications for histograms, see below
+            :param hist_sample_size: Largest number of animals per species read for histograms
             :param img_base: String with beginning of file name for figures, including path
-            :param img_fmt: String with file type for figures, e.g. 'png'
+            :param img_fmt: String with file type for figures, e.g. 'png', or 'mp4', see below
+            :param img_max_bytes: Disk space the figure files may use, unbounded if None
+            :param plot_graph: Bool turning visualization on or off
+            :param engine: Population engine, either 'object', 'array' or 'numba'
+            :param schedule: Order of the yearly cycle, either 'phase' or 'cell'
+            :param workers: Number of worker processes sharing the island, see below
+            :param renderer: Where plots are drawn, either 'inline' or 'process', see below
+            :param render_policy: Policy of the 'process' renderer, 'coalesce', 'drop' or 'strict'
+            :param render_queue: Number of snapshots waiting for the 'process' renderer
+            :param record: Bool turning the recording of a snapshot log on or off, see below
+            :param ages: How animal ages are kept, either 'counter' or 'epoch', see below
+            :param weights: How animal weights are kept, either 'absolute' or 'scaled', see below
 
             If ymax_animals is None, the y-axis limit should be adjusted automatically.
             If cmax_animals is None, sensible, fixed default values should be used.
@@ -47,11 +70,61 @@ class BioSim:
             {'weight': {'max': 80, 'delta': 2}, 'fitness': {'max': 1.0, 'delta': 0.05}}
             Permitted properties are 'weight', 'age', 'fitness'.
 
+            If hist_sample_size is None, every animal is counted in the histograms. Otherwise a
+            uniform sample of at most that many animals per species is binned and scaled up to
+            the population size, which keeps plot updates fast for millions of animals.
+
             If img_base is None, no figures are written to file.
             Filenames are formed as
             '{}_{:05d}.{}'.format(img_base, img_no, img_fmt)
             where img_no are consecutive image numbers starting from 0.
             img_base should contain a path and beginning of a file name.
+
+            If img_fmt is 'mp4', no figure files are written. The frames are instead piped
+            straight into ffmpeg, which encodes '{}.mp4'.format(img_base) while the simulation
+            runs. If ffmpeg cannot be started, the frames are saved as png files instead.
+            When the figure files use more than img_max_bytes, every second file is deleted
+            and only every second frame is saved from then on.
+
+            The 'object' engine keeps every animal as an Animal instance, while the 'array'
+            engine stores weight, age and fitness of each cell and species in NumPy arrays.
+            The 'numba' engine runs whole years in compiled kernels and requires numba.
+
+            With the 'phase' schedule every phase of the year is completed for all cells before
+            the next phase starts, and all migrants move in one exchange step. The 'cell'
+            schedule runs all phases for one cell before moving to the next, as in earlier
+            versions, and is only available with the 'object' engine.
+
+            With more than one worker the island is split into bands of rows, each simulated
+            by its own process with the 'object' engine and 'phase' schedule. The result is
+            the same for any number of workers. The animals stay in the workers from year to
+            year, and only the number of animals in each cell is sent back. They are gathered
+            in this process when they are needed here: for histograms, which are drawn,
+            recorded or sent to the renderer, by `add_population` and by `close`. Call `close`
+            to stop the workers.
+
+            With the 'inline' renderer, `simulate` draws the plots and saves the figures itself.
+            With the 'process' renderer, it only sends compact snapshots of the counts,
+            population matrices and histogram counts to a renderer process through a queue of
+            render_queue snapshots. If the renderer falls behind, the render_policy decides
+            whether snapshots are merged with later ones ('coalesce'), dropped except for
+            their counts ('drop'), or whether the simulation waits ('strict'). The renderer
+            is stopped by `make_movie` or `close`.
+
+            If record is True, `simulate` keeps a snapshot of every visualization update and
+            the counts of every year in `snapshot_log`, also without plot_graph. The log can
+            be saved and rendered to a movie later by `renderer.render_movie`, with one
+            worker process per CPU. Frames are marked to be saved every img_years years.
+
+            With ages 'counter' every animal stores its age, which is incremented each year.
+            With ages 'epoch' animals store their birth year and derive their age from an
+            `AgeClock` of the simulation, so aging the whole island is a single increment.
+            With weights 'scaled' every species has a `WeightScale`, and the yearly loss of
+            weight is one addition to the log of its scale factor instead of an update of every
+            animal. Weights are brought up to date when animals eat, give birth or are read,
+            and agree with 'absolute' weights to floating-point rounding.
+            'epoch' and 'scaled' are available with the 'object' engine and 'phase' schedule
+            in one process.
             """
 
     def __init__(
@@ -62,11 +135,25 @@ class BioSim:
         ymax_animals=None,
         cmax_animals=None,
         hist_specs=None,
+        hist_sample_size=None,
         img_base=None,
         img_fmt="png",
+        img_max_bytes=None,
         plot_graph=True,
+        engine="object",
+        schedule="phase",
+        workers=None,
+        renderer="inline",
+        render_policy="coalesce",
+        render_queue=4,
+        record=False,
+        ages="counter",
+        weights="absolute",
     ):
 
+        if seed is None:  # Draw a seed like random.seed(None), kept for the random streams
+            seed = secrets.randbits(64)
+
         if island_map is None:  # Set default map if none is provided
             map_str = """WWW\nWLW\nWWW"""  # Set default map str
             self._island = Island(map_str)  # Initiate Island
@@ -75,10 +162,51 @@ class BioSim:
         else:
             raise ValueError("Map string needs to be of type str!")
 
+        if engine == "object":
+            self._engine = None  # Animal objects are handled by BioSim itself
+        elif engine == "array":
+            self._engine = ArrayEngine(self._island, seed)
+        elif engine == "numba":
+            self._engine = CompiledEngine(self._island, seed)
+        else:
+            raise ValueError("engine needs to be either 'object', 'array' or 'numba'!")
+
+        if schedule not in ("phase", "cell"):
+            raise ValueError("schedule needs to be either 'phase' or 'cell'!")
+        elif schedule == "cell" and self._engine is not None:
+            raise ValueError("The 'cell' schedule is only available with the 'object' engine!")
+        self._schedule = schedule
+
+        self._workers = 1 if workers is None else workers
+        if self._workers > 1 and (self._engine is not None or schedule != "phase"):
+            raise ValueError("Workers are only available with the 'object' engine and the "
+                             "'phase' schedule!")
+        self._tiles = None  # TilePool, started by the first simulated year
+
+        if ages not in ("counter", "epoch"):
+            raise ValueError("ages needs to be either 'counter' or 'epoch'!")
+        elif ages == "epoch" and (self._engine is not None or schedule != "phase"
+                                  or self._workers > 1):
+            raise ValueError("'epoch' ages are only available with the 'object' engine and "
+                             "the 'phase' schedule in one process!")
+        self._clock = AgeClock() if ages == "epoch" else None  # Year the ages are derived from
+
+        if weights not in ("absolute", "scaled"):
+            raise ValueError("weights needs to be either 'absolute' or 'scaled'!")
+        elif weights == "scaled" and (self._engine is not None or schedule != "phase"
+                                      or self._workers > 1):
+            raise ValueError("'scaled' weights are only available with the 'object' engine and "
+                             "the 'phase' schedule in one process!")
+        self._scales = None  # Species: WeightScale of the yearly loss of weight
+        if weights == "scaled":
+            self._scales = {Herbivore: WeightScale(), Carnivore: WeightScale()}
+        self._arrived = {}  # Cell: animals that moved there, used by the 'cell' schedule
+
         self._ymax = ymax_animals
         self._cmax = cmax_animals
 
         self._hist_specs = hist_specs
+        self._hist_sample_size = hist_sample_size
 
         self.add_population(ini_pop)  # Add initial population to Island instance
 
@@ -88,9 +216,28 @@ class BioSim:
         self._plot = None  # Plot figure for simulation initialized
         self._img_base = img_base  # Str for naming saved figures
         self._img_fmt = img_fmt  # Format saved figures
+        self._img_max_bytes = img_max_bytes  # Disk space of saved figures
+        self._frames = None  # MovieStream or FrameSpool, opened when the first frame is saved
+
+        if renderer not in ("inline", "process"):
+            raise ValueError("renderer needs to be either 'inline' or 'process'!")
+        if render_policy not in ("coalesce", "drop", "strict"):
+            raise ValueError("render_policy needs to be either 'coalesce', 'drop' or 'strict'!")
+        self._render_mode = renderer
+        self._render_policy = render_policy
+        self._render_queue = render_queue
+        self._renderer = None  # RenderProcess, started by the first simulation with plots
+        self._statistics = None  # Histogram counts of the snapshots
+        self._unsent_first = 0  # Year of the first count not yet sent to the renderer
+        self._unsent_counts = []  # Counts not yet sent to the renderer
+        self._record = record
+        self._vis_time = None  # Average seconds per visualization update
+        self._year_time = None  # Average seconds per simulated year
+        self._log = None  # SnapshotLog, started by the first simulation when recording
 
         # Set seeds
-        random.seed(seed)  # Seed python random seed
+        self._seed = seed  # Key of the per cell random streams
+        random.seed(seed)  # Seed python random seed, used by the 'cell' schedule
 
     @staticmethod
     def set_animal_parameters(species, params):
@@ -132,90 +279,290 @@ class BioSim:
                  }
         """
         if type(population) == list:
+            self._gather()  # The new animals join those held by worker processes
             for loc_dict in population:  # This loop will be replaced with a more elegant iteration
                 new_animals = [
-                    Herbivore.from_dict(animal_dict)
+                    Herbivore.from_dict(animal_dict, self._clock, self._scale(Herbivore))
                     if animal_dict["species"] == "Herbivore"
-                    else Carnivore.from_dict(animal_dict)
+                    else Carnivore.from_dict(animal_dict, self._clock, self._scale(Carnivore))
                     for animal_dict in loc_dict["pop"]
                 ]
-                self._island.landscape[loc_dict["loc"]].add_animals(new_animals)
-                self._island.count_animals(animal_list=new_animals)
+                cell = self._island.landscape[loc_dict["loc"]]
+                cell.add_animals(new_animals)
+                self._island.count_animals(animal_list=new_animals, cell=cell)
         else:
             raise ValueError(
                 f"Pop list needs to be a list of dicts! Was of type " f"{type(population)}."
             )
 
-    def feeding(self, cell):
+    def feeding(self, cell, rng=random):
         """Iterates through each animal in the cell and feeds it according to species.
 
         :param cell: Current cell object where animals should be fed
         :type cell: object
+        :param rng: Source of random numbers, e.g. a `CellStream`
+        :type rng: module
 
         .. note::
-            `Herbivore` instances will call `eat_fodder` method, while `Carnivore` instances will
-            call
-            `eat_prey` method.
+            Herbivores graze in random order with `Herbivore.graze`, which only visits the
+            herbivores finding fodder, while `Carnivore` instances call the `kill_prey` method.
         """
         cell.fodder = cell.f_max()
         # Randomize animals before feeding
-        cell.randomize_herbs()
+        cell.randomize_herbs(rng)
+
+        cell.fodder = Herbivore.graze(cell.herbivores, cell.fodder)  # Herbivores eat first
+
+        if cell.carnivores and cell.herbivores:
+            self.predation(cell, rng)
+
+    def predation(self, cell, rng=random):
+        """Carnivores hunt in order from fittest to weakest.
+
+        :param cell: Current cell object where carnivores should hunt
+        :type cell: object
+        :param rng: Source of random numbers, e.g. a `CellStream`
+        :type rng: module
+
+        .. note::
+            Herbivores are sorted by fitness once, and killed herbivores are flagged in a shared
+            `alive` list so every carnivore skips them. The cell is compacted once after all
+            carnivores have eaten.
 
-        for herb in cell.herbivores:  # Herbivores eat first in random order
-            if cell.fodder > 0:
-                herb.eat_fodder(cell)
+        .. seealso::
+            - Carnivore.kill_prey
+        """
+        sorted_herbivores = cell.sorted_herbivores  # Weakest prey first
+        alive = [True for _ in sorted_herbivores]
+        herbs_killed = []
 
         for carn in cell.sorted_carnivores:  # Carnivores eat last, stronger animals first
-            herbs_killed = carn.kill_prey(cell.sorted_herbivores)  # Carnivore hunts for herbivores
-            cell.remove_animals(herbs_killed)  # Remove killed animals from cell
-            self._island.del_animals(num_herbs=len(herbs_killed))
+            herbs_killed += carn.kill_prey(sorted_herbivores, alive, rng)  # Carnivore hunts
 
-    def procreation(self, cell):
+        cell.remove_herbivores(herbs_killed)  # Remove killed animals from cell in one pass
+        self._island.del_animals(num_herbs=len(herbs_killed), cell=cell)
+
+    def procreation(self, cell, rng=random):
         """Iterates through each animal in the cell and procreates.
 
         :param cell: Current cell object
         :type cell: object
+        :param rng: Source of random numbers, e.g. a `CellStream`
+        :type rng: module
+
+        .. note::
+            With a `CellStream` all animals of a species give birth at once through
+            `Animal.procreate`. The 'cell' schedule, which draws from the `random` module, calls
+            `give_birth` for each animal so its results stay the same as in earlier versions.
         """
-        new_herbs = []
-        new_carns = []
-        n_herbs, n_carns = cell.herb_count, cell.carn_count
+        if isinstance(rng, CellStream):
+            new_herbs, new_carns = [], []
+            if cell.herb_count > 1:  # Births need two animals, else no generator is created
+                new_herbs = Herbivore.procreate(cell.herbivores, rng.generator)
+            if cell.carn_count > 1:
+                new_carns = Carnivore.procreate(cell.carnivores, rng.generator)
 
-        for herb in cell.herbivores:  # Herbivores give birth)
-            give_birth, birth_weight = herb.give_birth(n_herbs)
+        else:
+            new_herbs = []
+            new_carns = []
+            n_herbs, n_carns = cell.herb_count, cell.carn_count
 
-            if give_birth:
-                new_herbs.append(Herbivore(weight=birth_weight, age=0))
+            for herb in cell.herbivores:  # Herbivores give birth)
+                give_birth, birth_weight = herb.give_birth(n_herbs, rng)
 
-        for carn in cell.carnivores:  # Carnivores give birth
-            give_birth, birth_weight = carn.give_birth(n_carns)
+                if give_birth:
+                    new_herbs.append(Herbivore(weight=birth_weight, age=0))
 
-            if give_birth:
-                new_carns.append(Carnivore(weight=birth_weight, age=0))
+            for carn in cell.carnivores:  # Carnivores give birth
+                give_birth, birth_weight = carn.give_birth(n_carns, rng)
 
-        cell.add_animals(new_herbs + new_carns)  # Add new animals to cell
+                if give_birth:
+                    new_carns.append(Carnivore(weight=birth_weight, age=0))
 
-        self._island.count_animals(num_herbs=len(new_herbs), num_carns=len(new_carns))
+        cell.add_herbivores(new_herbs)  # Add new animals to cell in one bulk insert each
+        cell.add_carnivores(new_carns)
 
-    @staticmethod
-    def migrate(cell):
+        self._island.count_animals(num_herbs=len(new_herbs), num_carns=len(new_carns), cell=cell)
+
+    def migrate(self, cell):
         """Iterates through each animal in the cell and runs migrate process.
-        Animals will only migrate once due to the `has_moved` property.
+        Used by the 'cell' schedule.
 
         :param cell: Current cell object
         :type cell: object
+
+        .. note::
+            - Migrants are collected per destination cell and moved in batches.
+            - Animals that arrived in the cell since its last migration do not move again.
+                They are kept in a set per destination cell, which is emptied when the cell
+                migrates, and all sets are emptied at the end of the year.
         """
-        migrated_animals = []
+        arrived = self._arrived.pop(cell, ())  # Animals that have already moved
+        migrants = {}  # Destination cell: (herbivores, carnivores)
         for animal in cell.animals:
-            if not animal.has_moved and animal.migrate():
+            if animal not in arrived and animal.migrate():
                 if len(cell.land_cell_neighbors) > 0:
                     chosen_cell = random.choice(cell.land_cell_neighbors)
-                    chosen_cell.add_animals([animal])
-                    migrated_animals.append(animal)
+                    herbs, carns = migrants.setdefault(chosen_cell, ([], []))
+                    (herbs if animal.species == "Herbivore" else carns).append(animal)
+
+        for chosen_cell, (herbs, carns) in migrants.items():
+            chosen_cell.add_herbivores(herbs)
+            chosen_cell.add_carnivores(carns)
+            self._arrived.setdefault(chosen_cell, set()).update(herbs + carns)
+            self._island.move_animals(cell, chosen_cell, len(herbs), len(carns))
+
+        cell.remove_herbivores([herb for herbs, _ in migrants.values() for herb in herbs])
+        cell.remove_carnivores([carn for _, carns in migrants.values() for carn in carns])
+
+    def exchange_migrants(self, cells):
+        """All animals in the given cells decide whether to migrate, before any migrant moves.
+
+        :param cells: Coordinates and cell objects taking part in the exchange
+        :type cells: dict
+
+        .. note::
+            Migrants arrive in their new cell sorted by the coordinates of the cell they left,
+            and no animal can move twice since nobody arrives before all have decided.
+
+        .. seealso::
+            - BioSim.emigrate
+            - BioSim.immigrate
+        """
+        self.immigrate(self.emigrate(cells))
+
+    def emigrate(self, cells):
+        """Animals in the given cells decide whether to migrate and leave their cells.
+
+        :param cells: Coordinates and cell objects of the cells to leave
+        :type cells: dict
+
+        :return: Migrants as {destination coordinates: {source coordinates: (herbivores,
+            carnivores)}}
+        :rtype: dict
 
-                animal.has_moved = True
+        .. note::
+            Each species in a cell decides in bulk from an array of fitness values, and
+            destinations are drawn from `IslandGeometry.neighbor_table`.
+
+        .. seealso::
+            - Animal.migrate
+            - BioSim.immigrate
+        """
+        geometry = self._island.geometry
+        land_locs = geometry.land_locs
+        neighbor_table, num_neighbors = geometry.neighbor_table, geometry.num_neighbors
+
+        arrivals = {}  # Destination loc: {source loc: (herbivores, carnivores)}
+        for loc, cell in cells.items():
+            land_id = geometry.loc_id(loc)
+            rng = self._stream(loc, MIGRATION)
+
+            for species_index, species in enumerate((Herbivore, Carnivore)):
+                animals = cell.carnivores if species_index else cell.herbivores
+                if not animals:
+                    continue
+
+                fitness = np.fromiter((animal.fitness for animal in animals), float, len(animals))
+                moving = rng.generator.random(len(animals)) < species.p["mu"] * fitness
+                if num_neighbors[land_id] == 0 or not moving.any():
+                    continue
+
+                movers = np.flatnonzero(moving)
+                choices = rng.generator.random(movers.size) * num_neighbors[land_id]
+                destinations = neighbor_table[land_id, choices.astype(np.int64)]
+                for destination in np.unique(destinations):  # Regroup by destination cell
+                    sources = arrivals.setdefault(land_locs[destination], {})
+                    sources.setdefault(loc, ([], []))[species_index].extend(
+                        animals[index] for index in movers[destinations == destination]
+                    )
+
+                staying = [animal for animal, move in zip(animals, moving) if not move]
+                if species_index:
+                    cell.carnivores = staying
+                else:
+                    cell.herbivores = staying
+
+        return arrivals
+
+    def immigrate(self, arrivals):
+        """Migrants arrive in their new cells, sorted by the coordinates of the cell they left.
+
+        :param arrivals: Migrants as returned by `BioSim.emigrate`
+        :type arrivals: dict
+
+        .. note::
+            The population matrices of the island are updated for the migrants here, once they
+            have arrived.
 
-        cell.remove_animals(migrated_animals)
-        cell.reset_animals()
+        .. seealso::
+            - BioSim.emigrate
+        """
+        landscape = self._island.landscape
+        for destination, sources in arrivals.items():
+            chosen_cell = landscape[destination]
+            for loc in sorted(sources):
+                herbs, carns = sources[loc]
+                chosen_cell.add_herbivores(herbs)
+                chosen_cell.add_carnivores(carns)
+                self._island.move_animals(landscape[loc], chosen_cell, len(herbs), len(carns))
+
+    def aging_and_death(self, cell, rng=random):
+        """Animals in the cell age, lose weight and die.
+
+        :param cell: Current cell object
+        :type cell: object
+        :param rng: Source of random numbers, e.g. a `CellStream`
+        :type rng: module
+
+        .. note::
+            Each species is handled in one pass, which ages the animals, makes them lose
+            weight, decides their death and keeps the survivors. With a `CellStream` the pass
+            works on arrays in `Animal.end_year`. The 'cell' schedule draws from the `random`
+            module in the same order as earlier versions.
+
+        .. seealso::
+            - Animal.end_year
+            - Animal.aging
+            - Animal.lose_weight
+            - Animal.death
+        """
+        num_herbs, num_carns = len(cell.herbivores), len(cell.carnivores)
+        if num_herbs == 0 and num_carns == 0:
+            return
+
+        if isinstance(rng, CellStream):
+            cell.herbivores = Herbivore.end_year(cell.herbivores, rng.generator)
+            cell.carnivores = Carnivore.end_year(cell.carnivores, rng.generator)
+        else:
+            cell.herbivores = self._end_year(cell.herbivores, rng)
+            cell.carnivores = self._end_year(cell.carnivores, rng)
+
+        self._island.del_animals(num_herbs=num_herbs - len(cell.herbivores),
+                                 num_carns=num_carns - len(cell.carnivores), cell=cell)
+
+    def _occupied_cells(self):
+        """Coordinates and cell objects of the land cells holding animals.
+
+        :rtype: dict
+        """
+        return {loc: cell for loc, cell in self._island.land_cells.items()
+                if cell.herbivores or cell.carnivores}
+
+    def _scale(self, species):
+        """Weight scale of a species, None with absolute weights."""
+        return None if self._scales is None else self._scales[species]
+
+    @staticmethod
+    def _end_year(animals, rng):
+        """Age, weight loss and death of each animal of a list, returning the survivors."""
+        survivors = []
+        for animal in animals:
+            animal.aging()  # 4. Aging
+            animal.lose_weight()  # 5. Loss of weight
+            if not animal.death(rng):  # 6. Death
+                survivors.append(animal)
+        return survivors
 
     def run_year_cycle(self):
         """Runs through each of the 6 yearly seasons for all cells.
@@ -227,106 +574,341 @@ class BioSim:
         - Step 5: Animals lose weight
         - Step 6: Animals die
 
+        .. note::
+            With the 'phase' schedule each step is completed for the whole island before the
+            next one starts. With the 'cell' schedule all steps are completed for one cell at a
+            time, so migrants may feed and procreate again in cells visited later.
+
+            With the 'phase' schedule every cell and phase draws from its own random stream,
+            keyed by (seed, year, cell, phase), so the result does not depend on the order in
+            which cells are visited. The 'cell' schedule uses the global `random` module.
+
         .. seealso::
             - `biosim_src.feeding`
             - `biosim_src.procreation`
-            - `biosim_src.migrate`
+            - `biosim_src.exchange_migrants`
+            - `biosim_src.aging_and_death`
+            - `ArrayEngine.run_year_cycle`
         """
-        for loc, cell in self._island.land_cells.items():
-            #  1. Feeding
-            self.feeding(cell)
-
-            #  2. Procreation
-            self.procreation(cell)
-
-            # 3. Migration
-            self.migrate(cell)
+        if self._engine is not None:
+            self._engine.run_year_cycle()
+
+        elif self._workers > 1:
+            self._tile_pool.run_years(self._island, self._year, 1)
+
+        elif self._schedule == "phase":
+            cells = self._occupied_cells()  # Empty cells have nothing to do in any phase
+            for loc, cell in cells.items():
+                self.feeding(cell, self._stream(loc, FEEDING))  # 1. Feeding
+            for loc, cell in cells.items():
+                self.procreation(cell, self._stream(loc, PROCREATION))  # 2. Procreation
+            self.exchange_migrants(cells)  # 3. Migration
+            cells = self._occupied_cells()  # Migrants may have reached empty cells
+            if self._clock is not None:
+                self._clock.advance()  # 4. Aging of every animal with a birth year
+            if self._scales is not None:
+                for species, scale in self._scales.items():
+                    scale.decay(species.p["eta"])  # 5. Loss of weight of every scaled animal
+            for loc, cell in cells.items():
+                self.aging_and_death(cell, self._stream(loc, DEATH))  # 4-6. Aging and death
 
-            #  4. Aging
-            for animal in cell.animals:
-                animal.aging()
-
-            #  5. Loss of weight
-            for animal in cell.animals:
-                animal.lose_weight()
-
-            #  6. Death
-            dead_animals = []
-
-            for animal in cell.animals:
-                if animal.death():
-                    dead_animals.append(animal)
-
-            cell.remove_animals(dead_animals)
-            self._island.del_animals(animal_list=dead_animals)
+        else:
+            for loc, cell in self._island.land_cells.items():
+                self.feeding(cell)  # 1. Feeding
+                self.procreation(cell)  # 2. Procreation
+                self.migrate(cell)  # 3. Migration
+                self.aging_and_death(cell)  # 4-6. Aging, loss of weight and death
+            self._arrived.clear()  # Release arrivals in cells that will not migrate again
 
         self._year += 1  # Add year to simulation
 
-    def simulate(self, num_years, vis_years=1, img_years=None):
+    def simulate(self, num_years, vis_years=1, img_years=None, vis_budget=None):
         """Run simulation while visualizing the result.
 
         :param num_years: number of years to simulate
         :param vis_years: years between visualization updates
         :param img_years: years between visualizations saved to files (default: vis_years)
+        :param vis_budget: Largest fraction of the wall time spent on visualization updates,
+            replacing the fixed vis_years interval if given
 
         .. note::
 
             - When `plot_graph` is set to `True`, plots are initiated and updated.
                 Setting`plot_graph` to `False` allows the user to run simulations faster.
             - Image files will be numbered consecutively and used for creating mp4-files.
+            - Years between plot updates and saved images are simulated in one call to
+                `run_years`, so the 'numba' engine only returns to Python when output is due.
+            - With vis_budget, the time of a visualization update and of a simulated year are
+                measured, and the years between updates are chosen so that updates take at
+                most vis_budget of the time. vis_years is the interval until the first
+                measurement. Images are still saved every img_years years exactly.
 
         .. seealso::
 
             - `biosim_src.run_year_cycle`
+            - `biosim_src.run_years`
             - `visualization` module
 
         """
+        if vis_budget is not None and not 0 < vis_budget < 1:
+            raise ValueError("vis_budget needs to be between 0 and 1!")
         start_time = time.time()
         self._year_target += num_years
 
-        if self._plot_bool and self._plot is None:
+        if self._plot_bool and self._render_mode == "process":
+            if self._renderer is None:
+                self._start_renderer()
+
+        elif self._plot_bool and self._plot is None:
+            from biosim_src.visualization import Plotting  # matplotlib is only loaded to plot
+
             self._plot = Plotting(
-                self._island, cmax=self._cmax, ymax=self._ymax, hist_specs=self._hist_specs
+                self._island,
+                cmax=self._cmax,
+                ymax=self._ymax,
+                hist_specs=self._hist_specs,
+                hist_sample_size=self._hist_sample_size,
             )
-            self._island.update_pop_matrix()
             self._plot.init_plot(num_years)
-            self._plot.y_herb[self._year] = self._island.num_herbs
-            self._plot.y_carn[self._year] = self._island.num_carns
+            self._plot.counts.add(self._year, [(self._island.num_herbs, self._island.num_carns)])
 
         elif self._plot_bool:
             self._plot.set_x_axis(self._year_target)
-            self._plot.y_herb += [np.nan for _ in range(num_years)]
-            self._plot.y_carn += [np.nan for _ in range(num_years)]
 
-        for _ in range(num_years):
-            self.run_year_cycle()
+        if self._record and self._log is None:
+            self._start_log()
+
+        img_interval = vis_years if img_years is None else img_years
+        next_vis = (self._year // vis_years + 1) * vis_years  # Year of the next plot update
+        years_left = num_years
+        while years_left > 0:
+            num_steps = self._years_until_output(years_left, next_vis, img_interval)
+            first_year = self._year + 1
+            step_time = time.perf_counter()
+            counts = self.run_years(num_steps)
+            self._year_time = self._smoothed(self._year_time, time.perf_counter() - step_time,
+                                             num_steps)
+            years_left -= num_steps
+
+            vis = self._year == next_vis
+            save = self._img_base is not None and self._year % img_interval == 0
+            vis_time = time.perf_counter()
+
+            if self._log is not None:
+                img_year = self._year % img_interval == 0  # Frames of the movie rendered later
+                if img_year or vis:
+                    self._gather()
+                    self._log.append(take_snapshot(
+                        self._island, self._snapshot_statistics(), first_year, counts,
+                        self._year_target, img_year
+                    ))
+                else:
+                    self._log.append(Snapshot(first_year, counts, self._year_target))
 
-            if not self._plot_bool:  # Results are printed if visualization is disabled r
-                print(f"Year: {self._year}")
-                print(f"Total animal count: {self.num_animals}")
-                print(f"Species count: {self.num_animals_per_species}")
+            if self._renderer is not None:
+                self._unsent_counts.extend(counts.tolist())
+                if save or vis:
+                    self._submit_snapshot(save)
 
-            if self._plot_bool:
-                self._plot.y_herb[self._year] = self._island.num_herbs
-                self._plot.y_carn[self._year] = self._island.num_carns
-                if self._year % vis_years == 0:
-                    self._island.update_pop_matrix()
-                    self._plot.update_plot()
+            else:
+                self._output_inline(first_year, counts, vis, save)
 
-            if self._img_base is not None:
-                if img_years is None:
-                    if self._year % vis_years == 0:
-                        self._plot.save_graphics(self._img_base, self._img_fmt)
+            if vis:
+                self._vis_time = self._smoothed(self._vis_time, time.perf_counter() - vis_time)
+                next_vis = self._year + self._vis_interval(vis_years, vis_budget)
 
-                else:
-                    if self._year % img_years == 0:
-                        self._plot.save_graphics(self._img_base, self._img_fmt)
+            if save and self._plot is not None:
+                self._save_frame()  # Not part of the visualization time
 
         finish_time = time.time()
 
         print("Simulation complete.")
         print("Elapsed time: {:.6} seconds".format(finish_time - start_time))
 
+    def _output_inline(self, first_year, counts, vis, save):
+        """Print the counts, or draw them in the plot of this process.
+
+        :param first_year: Year of the first row of `counts`
+        :param counts: Herbivore and carnivore count after each simulated year
+        :param vis: Whether the plot is updated
+        :param save: Whether the figure is saved after the update
+        """
+        if self._plot_bool:
+            self._plot.counts.add(first_year, counts)
+            if vis or save:  # Saved images show the current year
+                self._gather()  # The histograms are drawn from the animals
+                self._plot.update_plot()
+            return
+
+        for year, (num_herbs, num_carns) in enumerate(counts, start=first_year):
+            # Results are printed if visualization is disabled
+            species_count = {"Herbivore": int(num_herbs), "Carnivore": int(num_carns)}
+            print(f"Year: {year}")
+            print(f"Total animal count: {sum(species_count.values())}")
+            print(f"Species count: {species_count}")
+
+    def run_years(self, num_years):
+        """Run several yearly cycles and record the species counts after each year.
+
+        :param num_years: Number of years to simulate
+        :type num_years: int
+
+        :return: Herbivore and carnivore count after each year
+        :rtype: ndarray
+
+        .. note::
+            The 'numba' engine runs all years inside its compiled kernels, and with several
+            workers the population stays in the worker processes, also after the call.
+            Otherwise `run_year_cycle` is called once per year.
+
+        .. seealso::
+            - `BioSim.run_year_cycle`
+            - `CompiledEngine.run_years`
+        """
+        if isinstance(self._engine, CompiledEngine):
+            counts = self._engine.run_years(num_years)
+            self._year += num_years
+            return counts
+
+        if self._workers > 1:
+            counts = self._tile_pool.run_years(self._island, self._year, num_years)
+            self._year += num_years
+            return counts
+
+        counts = np.zeros((num_years, 2), dtype=int)
+        for year in range(num_years):
+            self.run_year_cycle()
+            counts[year] = self._island.num_herbs, self._island.num_carns
+        return counts
+
+    @staticmethod
+    def run_replicates(island_map, ini_pop, params, seeds, num_years, workers=None,
+                       engine="object"):
+        """Run independent simulations of the same scenario for several seeds in parallel.
+
+        :param island_map: Multi-line string specifying island geography
+        :param ini_pop: List of dictionaries specifying initial population
+        :param params: Dict mapping species names and landscape letters to parameters, or None
+        :param seeds: Seeds, one simulation is run for each seed
+        :param num_years: Number of years to simulate
+        :param workers: Number of worker processes, defaults to the number of CPUs
+        :param engine: Population engine used by each simulation
+
+        :return: Herbivore and carnivore counts with shape (seeds, num_years + 1, 2)
+        :rtype: ndarray
+
+        :Example:
+            .. code-block:: python
+
+                counts = BioSim.run_replicates(
+                    island_map, ini_pop,
+                    params={'Carnivore': {'F': 40.0}, 'L': {'f_max': 700.0}},
+                    seeds=range(100), num_years=200, workers=8
+                )
+                mean_herbs = counts[:, :, 0].mean(axis=0)
+
+        .. note::
+            - Workers are started with the 'spawn' method, so every simulation starts from the
+                default parameters updated with `params`, and matplotlib is never imported.
+            - Row 0 of each simulation holds the initial counts.
+        """
+        params = {} if params is None else params
+        seeds = list(seeds)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+            counts = pool.map(
+                _run_replicate,
+                [island_map] * len(seeds),
+                [ini_pop] * len(seeds),
+                [params] * len(seeds),
+                seeds,
+                [num_years] * len(seeds),
+                [engine] * len(seeds),
+            )
+            return np.stack(list(counts))
+
+    @property
+    def _tile_pool(self):
+        """Worker processes of the tiles, started when first used."""
+        if self._tiles is None:
+            self._tiles = TilePool(
+                self._island.map_str, self._seed, self._workers, self._island.land_cells
+            )
+        return self._tiles
+
+    def close(self):
+        """Stop worker and renderer processes and finish a movie streamed to ffmpeg.
+
+        The animals held by worker processes are gathered in the cells of the island first.
+        """
+        self._stop_renderer()
+        if isinstance(self._frames, MovieStream):
+            self._frames.close()
+        if self._tiles is not None:
+            if not self._tiles.broken:  # The animals of a broken pool are lost
+                self._tiles.gather(self._island)
+            self._tiles.close()
+            self._tiles = None
+
+    def _gather(self):
+        """Bring the animals held by worker processes back to the cells of the island."""
+        if self._tiles is not None:
+            self._tiles.gather(self._island)
+
+    def _stream(self, loc, phase):
+        """Random stream for one phase of one cell in the current year.
+
+        :param loc: Coordinates of the cell
+        :type loc: tuple
+        :param phase: Phase of the yearly cycle, e.g. `FEEDING`
+        :type phase: int
+
+        :return: Stream replacing the `random` module in the animal methods
+        :rtype: CellStream
+        """
+        return CellStream(self._seed, self._year, loc, phase)
+
+    def _years_until_output(self, years_left, next_vis, img_interval):
+        """Number of years that can be simulated before the next plot update or saved image.
+
+        :param years_left: Years left of the current simulation
+        :param next_vis: Year of the next visualization update
+        :param img_interval: years between visualizations saved to files
+        """
+        num_steps = years_left
+        if self._plot_bool or self._record:
+            num_steps = min(num_steps, next_vis - self._year)
+        if self._img_base is not None or self._record:
+            num_steps = min(num_steps, img_interval - self._year % img_interval)
+        return num_steps
+
+    def _vis_interval(self, vis_years, vis_budget):
+        """Years until the next visualization update.
+
+        :param vis_years: years between visualization updates
+        :param vis_budget: Largest fraction of the wall time spent on visualization updates
+
+        .. note::
+            Updates take at most vis_budget of the time if
+            vis_time / (vis_time + interval * year_time) <= vis_budget.
+        """
+        if vis_budget is None or self._vis_time is None or not self._year_time:
+            return vis_years
+        interval = self._vis_time * (1 - vis_budget) / (vis_budget * self._year_time)
+        return max(1, math.ceil(interval))
+
+    @staticmethod
+    def _smoothed(average, total, num=1):
+        """Exponential moving average of times, following changes over a few measurements.
+
+        :param average: Previous average, None if there is none
+        :param total: Time of the new measurements
+        :param num: Number of measurements in `total`
+        """
+        if average is None:
+            return total / num
+        weight = 1 - 0.7 ** num
+        return (1 - weight) * average + weight * total / num
+
     @property
     def year(self):
         """ Last year simulated to be used in s and counting.
@@ -361,11 +943,96 @@ class BioSim:
         """
         return {"Herbivore": self._island.num_herbs, "Carnivore": self._island.num_carns}
 
+    @property
+    def snapshot_log(self):
+        """Snapshots recorded by `simulate` when record is True.
+
+        :return: Recorded snapshots, None before the first simulation or if not recording
+        :rtype: SnapshotLog
+        """
+        return self._log
+
+    def _snapshot_statistics(self):
+        """Collector of the histogram counts of snapshots, created when first needed."""
+        if self._statistics is None:
+            hist_specs = dict(DEFAULT_HIST_SPECS)
+            hist_specs.update(self._hist_specs or {})
+            self._statistics = PopulationStatistics(
+                hist_specs, sample_size=self._hist_sample_size
+            )
+        return self._statistics
+
+    def _start_log(self):
+        """Start the snapshot log with the counts of the current year."""
+        self._log = SnapshotLog(
+            self._island.map_str,
+            {"cmax": self._cmax, "ymax": self._ymax, "hist_specs": self._hist_specs},
+        )
+        self._log.append(Snapshot(
+            self._year, [(self._island.num_herbs, self._island.num_carns)], self._year_target
+        ))
+
+    def _start_renderer(self):
+        """Start the renderer process and queue the current counts for its first frame."""
+        self._renderer = RenderProcess(
+            {
+                "map_str": self._island.map_str,
+                "cmax": self._cmax,
+                "ymax": self._ymax,
+                "hist_specs": self._hist_specs,
+                "img_base": self._img_base,
+                "img_fmt": self._img_fmt,
+                "img_max_bytes": self._img_max_bytes,
+                "ffmpeg": _FFMPEG_BINARY,
+            },
+            policy=self._render_policy,
+            queue_size=self._render_queue,
+        )
+        self._unsent_first = self._year
+        self._unsent_counts = [(self._island.num_herbs, self._island.num_carns)]
+
+    def _submit_snapshot(self, save):
+        """Send a snapshot of the current year to the renderer process.
+
+        :param save: Whether the frame is saved
+        :type save: bool
+        """
+        self._gather()
+        self._renderer.submit(take_snapshot(
+            self._island,
+            self._snapshot_statistics(),
+            self._unsent_first,
+            self._unsent_counts,
+            self._year_target,
+            save,
+        ))
+        self._unsent_first = self._year + 1
+        self._unsent_counts = []
+
+    def _stop_renderer(self):
+        """Let the renderer process finish its frames and stop it."""
+        if self._renderer is not None:
+            spool = self._renderer.close()
+            self._renderer = None
+            if spool is not None:
+                self._frames = spool
+
+    def _save_frame(self):
+        """Save the current figure as the next movie frame or figure file."""
+        if self._frames is None:
+            self._frames = open_frames(
+                self._plot, self._img_base, self._img_fmt, self._img_max_bytes, _FFMPEG_BINARY
+            )
+        save_frame(self._frames, self._plot)
+
     def make_movie(self, movie_fmt=_DEFAULT_MOVIE_FORMAT):
         """Creates MPEG4 movie from visualization images saved.
 
         .. note:
             - Requires ffmpeg
+            - If the frames were piped into ffmpeg during the simulation (img_fmt='mp4'), the
+                movie is only finished.
+            - A renderer process is stopped after drawing its remaining snapshots.
 
         The movie is stored as img_base + movie_fmt.
         Author: Hans E. Plasser
@@ -374,7 +1041,15 @@ class BioSim:
         if self._img_base is None:
             raise RuntimeError("No filename defined.")
 
-        if movie_fmt == "mp4":
+        self._stop_renderer()
+        if self._img_fmt == "mp4" and not isinstance(self._frames, FrameSpool):
+            if movie_fmt != "mp4":
+                raise ValueError("Unknown movie format: " + movie_fmt)
+            if self._frames is not None:
+                self._frames.close()  # Frames were encoded during the simulation
+
+        elif movie_fmt == "mp4":
+            img_fmt = "png" if self._frames is None else self._frames.img_fmt
             try:
                 # Parameters chosen according to http://trac.ffmpeg.org/wiki/Encode/H.264,
                 # section "Compatibility"
@@ -382,7 +1057,7 @@ class BioSim:
                     [
                         _FFMPEG_BINARY,
                         "-i",
-                        "{}_%05d.png".format(self._img_base),
+                        "{}_%05d.{}".format(self._img_base, img_fmt),
                         "-y",
                         "-profile:v",
                         "baseline",
@@ -400,4 +1075,25 @@ class BioSim:
 
     def image_cleanup(self):
         """Removes created image files after movie is rendered."""
-        pass
+        self._stop_renderer()
+        if isinstance(self._frames, FrameSpool):
+            self._frames.cleanup()
+
+
+def _run_replicate(island_map, ini_pop, params, seed, num_years, engine):
+    """Worker of `BioSim.run_replicates`, running one simulation without visualization.
+
+    :return: Herbivore and carnivore counts for the initial population and after each year
+    :rtype: ndarray
+    """
+    for key, key_params in params.items():
+        if key in ("Herbivore", "Carnivore"):
+            BioSim.set_animal_parameters(key, key_params)
+        else:
+            Island.set_landscape_params(key, key_params)
+
+    sim = BioSim(island_map, ini_pop, seed=seed, plot_graph=False, engine=engine)
+    counts = np.zeros((num_years + 1, 2), dtype=int)
+    counts[0] = sim.num_animals_per_species["Herbivore"], sim.num_animals_per_species["Carnivore"]
+    counts[1:] = sim.run_years(num_years)
+    return counts
@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+
+"""
+Columnar (structure-of-arrays) population engine for the simulation.
+"""
+
+__author__ = "Anders Mølmen Høst & Petter Kolstad Hetland"
+__email__ = "anders.molmen.host@nmbu.no, petter.storesund.hetland@nmbu.no"
+
+import numpy as np
+from biosim_src.animal import Herbivore, Carnivore
+from biosim_src.streams import CellStream, FEEDING, PROCREATION, MIGRATION, DEATH
+
+
+class Herd:
+    """Columnar storage for all animals of one species in one landscape cell.
+
+    :param species: Animal class of the herd
+    :type species: class
+
+    *Properties*:
+        - `weight`: Weights of the animals
+        - `age`: Ages of the animals
+        - `fitness`: Cached fitness of the animals
+
+    .. note::
+        - A Herd replaces the `herbivores` and `carnivores` lists of a `LandscapeCell` when the
+            array engine is used.
+        - Indexing and iteration return detached `Animal` instances, so read-only code written
+            for animal lists keeps working.
+
+    .. seealso::
+        - ArrayEngine
+    """
+
+    def __init__(self, species, weight=None, age=None):
+        self.species = species
+        self.weight = np.zeros(0) if weight is None else np.asarray(weight, dtype=float)
+        self.age = np.zeros(0, dtype=int) if age is None else np.asarray(age, dtype=int)
+        self.fitness = None
+        self.update_fitness()
+
+    @classmethod
+    def from_animals(cls, species, animal_list):
+        """Create a herd from a list of animal instances.
+
+        :param species: Animal class of the herd
+        :type species: class
+        :param animal_list: Animal instances of the given species
+        :type animal_list: list
+        """
+        return cls(
+            species,
+            weight=[animal.weight for animal in animal_list],
+            age=[animal.age for animal in animal_list],
+        )
+
+    def __len__(self):
+        return len(self.weight)
+
+    def __getitem__(self, index):
+        return self.species(weight=float(self.weight[index]), age=int(self.age[index]))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __repr__(self):
+        return "Herd({}, {} animals)".format(self.species.__name__, len(self))
+
+    def update_fitness(self):
+        """Recompute the cached fitness after weights or ages have changed."""
+        self.fitness = self.species.fitness_array(self.age, self.weight)
+
+    def append(self, animal):
+        """Add a single animal instance to the herd.
+
+        :param animal: Animal instance of the herd species
+        :type animal: Animal
+        """
+        self.extend([animal])
+
+    def extend(self, animal_list):
+        """Add a list of animal instances to the herd.
+
+        :param animal_list: Animal instances of the herd species
+        :type animal_list: list
+        """
+        self.add(
+            np.array([animal.weight for animal in animal_list], dtype=float),
+            np.array([animal.age for animal in animal_list], dtype=int),
+        )
+
+    def add(self, weight, age, fitness=None):
+        """Add animals given as arrays to the herd.
+
+        :param weight: Weights of new animals
+        :type weight: ndarray
+        :param age: Ages of new animals
+        :type age: ndarray
+        :param fitness: Fitness of new animals, computed if not given
+        :type fitness: ndarray
+        """
+        if fitness is None:
+            fitness = self.species.fitness_array(age, weight)
+        self.weight = np.concatenate((self.weight, weight))
+        self.age = np.concatenate((self.age, age))
+        self.fitness = np.concatenate((self.fitness, fitness))
+
+    def keep(self, mask):
+        """Keep only the animals where `mask` is True.
+
+        :param mask: Boolean mask or index array of surviving animals
+        :type mask: ndarray
+        """
+        self.weight = self.weight[mask]
+        self.age = self.age[mask]
+        self.fitness = self.fitness[mask]
+
+
+class ArrayEngine:
+    """Population engine running the yearly cycle as array operations on `Herd` instances.
+
+    :param island: Island instance to simulate
+    :type island: Island
+    :param seed: Seed of the random streams
+    :type seed: int
+
+    .. note::
+        - Each phase is applied to all cells before the next phase starts, and migrants are
+            delivered after all cells have decided who leaves.
+        - Every cell and phase draws from its own `CellStream`, so results do not depend on
+            the order in which cells are visited.
+        - Animals already placed in the cells are converted to herds when the engine is created.
+
+    .. seealso::
+        - `BioSim.run_year_cycle`
+    """
+
+    def __init__(self, island, seed):
+        self._island = island
+        self._seed = seed
+        self._year = 0
+        self._locs = island.land_locs  # Cells by id, in the order migrants are delivered
+        self._cells = [island.land_cells[loc] for loc in self._locs]
+        self._neighbors = [
+            neighbors[:num_neighbors]
+            for neighbors, num_neighbors in zip(island.neighbor_table, island.num_neighbors)
+        ]  # Neighbor cell ids for each land cell
+
+        for cell in self._cells:
+            cell.herbivores = Herd.from_animals(Herbivore, cell.herbivores)
+            cell.carnivores = Herd.from_animals(Carnivore, cell.carnivores)
+
+    def _stream(self, loc, phase):
+        """Random stream for one phase of one cell in the current year."""
+        return CellStream(self._seed, self._year, loc, phase)
+
+    def feeding(self, cell, stream):
+        """Herbivores graze in random order before carnivores hunt from fittest to weakest.
+
+        :param cell: Current cell object where animals should be fed
+        :type cell: object
+        :param stream: Random stream of the cell
+        :type stream: CellStream
+
+        .. note::
+            Every herbivore wants `F` fodder, so the herbivore at position i of a random
+            permutation eats whatever is left of `F * i` fodder, clipped to [0, F].
+        """
+        herbs, carns = cell.herbivores, cell.carnivores
+        cell.fodder = cell.f_max()
+
+        if len(herbs) > 0 and cell.fodder > 0:
+            appetite = Herbivore.p["F"]
+            eaten = np.clip(cell.fodder - appetite * np.arange(len(herbs)), 0, appetite)
+            gain = np.empty(len(herbs))
+            gain[stream.generator.permutation(len(herbs))] = eaten
+            herbs.weight += Herbivore.p["beta"] * gain
+            herbs.update_fitness()
+            cell.fodder = max(cell.fodder - eaten.sum(), 0)
+
+        if len(carns) > 0 and len(herbs) > 0:
+            killed = self.predation(herbs, carns, stream.generator)
+            herbs.keep(~killed)
+            self._island.del_animals(num_herbs=int(killed.sum()), cell=cell)
+
+    def predation(self, herbs, carns, rng):
+        """Carnivores hunt herbivores from weakest to fittest until sated.
+
+        :param herbs: Prey herd
+        :type herbs: Herd
+        :param carns: Predator herd
+        :type carns: Herd
+        :param rng: Random number generator
+        :type rng: numpy.random.Generator
+
+        :return: Mask of killed herbivores
+        :rtype: ndarray
+
+        .. seealso::
+            - Carnivore.kill_prey
+        """
+        appetite = Carnivore.p["F"]
+        delta_phi_max = Carnivore.p["DeltaPhiMax"]
+        prey_order = np.argsort(herbs.fitness, kind="stable")  # Weakest prey first
+        prey_fitness = herbs.fitness[prey_order]
+        prey_weight = herbs.weight[prey_order]
+        alive = np.ones(len(herbs), dtype=bool)
+
+        for carn in np.argsort(-carns.fitness, kind="stable"):  # Fittest carnivores first
+            prey = np.flatnonzero(alive)
+            if prey.size == 0:
+                break
+
+            fitness_diff = carns.fitness[carn] - prey_fitness[prey]
+            kill_prob = fitness_diff / delta_phi_max
+            kills = prey[
+                (fitness_diff > 0)
+                & ((fitness_diff >= delta_phi_max) | (rng.random(prey.size) <= kill_prob))
+            ]
+            eaten = np.cumsum(prey_weight[kills])
+            kills = kills[: np.searchsorted(eaten, appetite) + 1]  # Stop when sated
+
+            alive[kills] = False
+            carns.weight[carn] += Carnivore.p["beta"] * min(prey_weight[kills].sum(), appetite)
+
+        carns.update_fitness()
+        killed = np.zeros(len(herbs), dtype=bool)
+        killed[prey_order[~alive]] = True
+        return killed
+
+    def procreation(self, cell, stream):
+        """Animals in the cell give birth with a probability depending on fitness.
+
+        :param cell: Current cell object
+        :type cell: object
+        :param stream: Random stream of the cell
+        :type stream: CellStream
+
+        .. seealso::
+            - Animal.give_birth
+        """
+        num_births = []
+        for herd in (cell.herbivores, cell.carnivores):
+            num_same = len(herd)
+            if num_same < 2:
+                num_births.append(0)
+                continue
+
+            p = herd.species.p
+            birth_prob = p["gamma"] * herd.fitness * (num_same - 1)
+            mothers = np.flatnonzero(
+                (herd.weight >= p["zeta"] * (p["w_birth"] + p["sigma_birth"]))
+                & (stream.generator.random(num_same) < birth_prob)
+            )
+            birth_weight = stream.generator.normal(p["w_birth"], p["sigma_birth"], mothers.size)
+            valid = birth_weight < herd.weight[mothers]
+            mothers, birth_weight = mothers[valid], birth_weight[valid]
+
+            herd.weight[mothers] -= p["xi"] * birth_weight
+            herd.update_fitness()
+            herd.add(birth_weight, np.zeros(mothers.size, dtype=int))
+            num_births.append(mothers.size)
+
+        self._island.count_animals(num_herbs=num_births[0], num_carns=num_births[1], cell=cell)
+
+    def migrate(self):
+        """All animals decide whether to migrate before any migrant arrives in a new cell.
+
+        .. note::
+            - Animals in cells without mainland neighbors stay put.
+            - Migrants arrive in the order of the coordinates of the cell they left.
+
+        .. seealso::
+            - Animal.migrate
+        """
+        arrivals = [([], []) for _ in self._cells]  # Arriving herbs and carns for each cell
+
+        for index, (loc, cell) in enumerate(zip(self._locs, self._cells)):
+            neighbors = self._neighbors[index]
+            if neighbors.size == 0:
+                continue
+
+            rng = self._stream(loc, MIGRATION)
+            for species_index, herd in enumerate((cell.herbivores, cell.carnivores)):
+                if len(herd) == 0:
+                    continue
+                moving = rng.generator.random(len(herd)) < herd.species.p["mu"] * herd.fitness
+                if not moving.any():
+                    continue
+
+                destinations = neighbors[rng.generator.integers(neighbors.size, size=moving.sum())]
+                weight, age, fitness = herd.weight[moving], herd.age[moving], herd.fitness[moving]
+                for destination in np.unique(destinations):
+                    to_destination = destinations == destination
+                    arrivals[destination][species_index].append(
+                        (weight[to_destination], age[to_destination], fitness[to_destination])
+                    )
+                    num_moved = [0, 0]
+                    num_moved[species_index] = int(to_destination.sum())
+                    self._island.move_animals(cell, self._cells[destination], *num_moved)
+                herd.keep(~moving)
+
+        for cell, cell_arrivals in zip(self._cells, arrivals):
+            for herd, migrants in zip((cell.herbivores, cell.carnivores), cell_arrivals):
+                if migrants:
+                    herd.add(*(np.concatenate(column) for column in zip(*migrants)))
+
+    def aging_and_death(self, cell, stream):
+        """Animals age, lose weight and die with a probability depending on fitness.
+
+        :param cell: Current cell object
+        :type cell: object
+        :param stream: Random stream of the cell
+        :type stream: CellStream
+
+        .. seealso::
+            - Animal.aging
+            - Animal.lose_weight
+            - Animal.death
+        """
+        num_dead = []
+        for herd in (cell.herbivores, cell.carnivores):
+            if len(herd) == 0:
+                num_dead.append(0)
+                continue
+
+            p = herd.species.p
+            herd.age += 1
+            herd.weight -= herd.weight * p["eta"]
+            herd.update_fitness()
+
+            dead = (herd.weight <= 0) | (
+                stream.generator.random(len(herd)) < p["omega"] * (1 - herd.fitness)
+            )
+            herd.keep(~dead)
+            num_dead.append(int(dead.sum()))
+
+        self._island.del_animals(num_herbs=num_dead[0], num_carns=num_dead[1], cell=cell)
+
+    def run_year_cycle(self):
+        """Runs through each of the 6 yearly seasons, one phase at a time for all cells.
+
+        - Step 1: Animals feed
+        - Step 2: Animals procreate
+        - Step 3: Animals migrate
+        - Step 4-6: Animals age, lose weight and die
+
+        .. seealso::
+            - `BioSim.run_year_cycle`
+        """
+        for loc, cell in zip(self._locs, self._cells):
+            self.feeding(cell, self._stream(loc, FEEDING))
+        for loc, cell in zip(self._locs, self._cells):
+            self.procreation(cell, self._stream(loc, PROCREATION))
+        self.migrate()
+        for loc, cell in zip(self._locs, self._cells):
+            self.aging_and_death(cell, self._stream(loc, DEATH))
+        self._year += 1
@@ -0,0 +1,474 @@
+# -*- coding: utf-8 -*-
+
+"""
+Numba-compiled population engine for the simulation.
+"""
+
+__author__ = "Anders Mølmen Høst & Petter Kolstad Hetland"
+__email__ = "anders.molmen.host@nmbu.no, petter.storesund.hetland@nmbu.no"
+
+import math
+import numpy as np
+from biosim_src.animal import Herbivore, Carnivore
+from biosim_src.columnar import ArrayEngine, Herd
+from biosim_src.streams import cell_key, FEEDING, PROCREATION, MIGRATION, DEATH
+
+try:
+    from numba import njit
+
+    NUMBA_AVAILABLE = True
+except ImportError:  # numba is optional, the kernels then run as plain Python
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+
+_PARAM_KEYS = (
+    "w_birth",
+    "sigma_birth",
+    "beta",
+    "eta",
+    "a_half",
+    "phi_age",
+    "w_half",
+    "phi_weight",
+    "mu",
+    "gamma",
+    "zeta",
+    "xi",
+    "omega",
+    "F",
+    "DeltaPhiMax",
+)  # Order of the species parameters in the arrays passed to the kernels
+(
+    W_BIRTH,
+    SIGMA_BIRTH,
+    BETA,
+    ETA,
+    A_HALF,
+    PHI_AGE,
+    W_HALF,
+    PHI_WEIGHT,
+    MU,
+    GAMMA,
+    ZETA,
+    XI,
+    OMEGA,
+    F,
+    DELTA_PHI_MAX,
+) = range(len(_PARAM_KEYS))
+
+
+def pack_params(species):
+    """Pack the class parameters of an animal species into a float array for the kernels.
+
+    :param species: Animal class
+    :type species: class
+
+    :return: Parameters in the order of `_PARAM_KEYS`, missing parameters are 0.0
+    :rtype: ndarray
+    """
+    return np.array([species.p.get(key, 0.0) for key in _PARAM_KEYS], dtype=np.float64)
+
+
+_GOLDEN_GAMMA = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+
+@njit(cache=True)
+def _mix(state):
+    """SplitMix64 finalizer, a bijective hash of a 64-bit integer."""
+    state = (state ^ (state >> np.uint64(30))) * _MIX_1
+    state = (state ^ (state >> np.uint64(27))) * _MIX_2
+    return state ^ (state >> np.uint64(31))
+
+
+@njit(cache=True)
+def seed_stream(rng, seed, year, key, phase):
+    """Set the stream state `rng` to the stream of one phase of one cell in one year.
+
+    .. note::
+        Numba only offers the global Mersenne Twister with a 32-bit seed, so the kernels use
+        their own counter-based SplitMix64 streams with a 64-bit state hashed from
+        (seed, year, cell, phase) instead of NumPy's Philox.
+    """
+    state = _mix(np.uint64(seed) + _GOLDEN_GAMMA)
+    state = _mix(state ^ np.uint64(year))
+    state = _mix(state ^ np.uint64(key))
+    rng[0] = _mix(state ^ np.uint64(phase))
+
+
+@njit(cache=True)
+def _random(rng):
+    """Uniform number in [0, 1) from the stream state `rng`."""
+    rng[0] += _GOLDEN_GAMMA
+    return (_mix(rng[0]) >> np.uint64(11)) * (1.0 / 9007199254740992.0)
+
+
+@njit(cache=True)
+def _normal(rng, mu, sigma):
+    """Normal distributed number from the stream state `rng`, using Box-Muller."""
+    radius = math.sqrt(-2.0 * math.log(1.0 - _random(rng)))
+    return mu + sigma * radius * math.cos(2.0 * math.pi * _random(rng))
+
+
+@njit(cache=True)
+def _fitness(age, weight, params):
+    """Compiled version of `Animal.fitness`."""
+    return (1.0 / (1.0 + math.exp(params[PHI_AGE] * (age - params[A_HALF])))) * (
+        1.0 / (1.0 + math.exp(-params[PHI_WEIGHT] * (weight - params[W_HALF])))
+    )
+
+
+@njit(cache=True)
+def group_by_cell(cell, weight, age, num_cells):
+    """Counting sort of animals by cell index.
+
+    :return: Sorted cell, weight and age arrays, and start offsets of each cell
+    """
+    start = np.zeros(num_cells + 1, np.int64)
+    for index in range(cell.size):
+        start[cell[index] + 1] += 1
+    start = np.cumsum(start)
+
+    position = start[:-1].copy()
+    new_cell = np.empty_like(cell)
+    new_weight = np.empty_like(weight)
+    new_age = np.empty_like(age)
+    for index in range(cell.size):
+        target = position[cell[index]]
+        position[cell[index]] += 1
+        new_cell[target] = cell[index]
+        new_weight[target] = weight[index]
+        new_age[target] = age[index]
+    return new_cell, new_weight, new_age, start
+
+
+@njit(cache=True)
+def _eat_fodder(h0, h1, weight, age, fitness, fodder, params, rng):
+    """Compiled version of `Herbivore.eat_fodder` for all herbivores of a cell."""
+    order = np.arange(h0, h1)
+    for index in range(order.size - 1, 0, -1):  # Fisher-Yates shuffle
+        other = int(_random(rng) * (index + 1))
+        order[index], order[other] = order[other], order[index]
+    for herb in order:
+        if fodder <= 0:
+            break
+        eaten = min(params[F], fodder)
+        weight[herb] += params[BETA] * eaten
+        fitness[herb] = _fitness(age[herb], weight[herb], params)
+        fodder -= eaten
+
+
+@njit(cache=True)
+def _kill_prey(h0, h1, c0, c1, h_weight, h_fitness, alive, c_weight, c_age, c_fitness, params,
+               rng):
+    """Compiled version of `Carnivore.kill_prey` for all carnivores of a cell."""
+    prey = h0 + np.argsort(h_fitness[h0:h1], kind="mergesort")  # Weakest prey first
+    hunters = c0 + np.argsort(-c_fitness[c0:c1], kind="mergesort")  # Fittest carnivores first
+    for carn in hunters:
+        eaten = 0.0
+        for herb in prey:
+            if eaten >= params[F]:
+                break
+            if not alive[herb]:
+                continue
+
+            fitness_diff = c_fitness[carn] - h_fitness[herb]
+            if fitness_diff <= 0:
+                break  # Prey is sorted, so no remaining herbivore can be caught
+            if fitness_diff < params[DELTA_PHI_MAX]:
+                if _random(rng) > fitness_diff / params[DELTA_PHI_MAX]:
+                    continue
+
+            alive[herb] = False
+            eaten += h_weight[herb]
+
+        c_weight[carn] += params[BETA] * min(eaten, params[F])
+        c_fitness[carn] = _fitness(c_age[carn], c_weight[carn], params)
+
+
+@njit(cache=True)
+def _procreate(a0, a1, cell, weight, age, fitness, alive, params, new_cell, new_weight, count,
+               rng):
+    """Compiled version of `Animal.give_birth` for all animals of one species in a cell.
+
+    :return: Number of newborns written to `new_cell` and `new_weight` so far
+    """
+    num_same = 0
+    for index in range(a0, a1):
+        if alive[index]:
+            num_same += 1
+    if num_same < 2:
+        return count
+
+    threshold = params[ZETA] * (params[W_BIRTH] + params[SIGMA_BIRTH])
+    for index in range(a0, a1):
+        if not alive[index] or weight[index] < threshold:
+            continue
+        if _random(rng) >= params[GAMMA] * fitness[index] * (num_same - 1):
+            continue
+
+        birth_weight = _normal(rng, params[W_BIRTH], params[SIGMA_BIRTH])
+        if birth_weight < weight[index]:
+            weight[index] -= params[XI] * birth_weight
+            fitness[index] = _fitness(age[index], weight[index], params)
+            new_cell[count] = cell
+            new_weight[count] = birth_weight
+            count += 1
+    return count
+
+
+@njit(cache=True)
+def _merge_newborns(cell, weight, age, alive, new_cell, new_weight, count):
+    """Concatenate surviving animals and newborns into new arrays."""
+    num_alive = 0
+    for index in range(cell.size):
+        if alive[index]:
+            num_alive += 1
+
+    size = num_alive + count
+    out_cell = np.empty(size, np.int64)
+    out_weight = np.empty(size, np.float64)
+    out_age = np.empty(size, np.int64)
+
+    target = 0
+    for index in range(cell.size):
+        if alive[index]:
+            out_cell[target] = cell[index]
+            out_weight[target] = weight[index]
+            out_age[target] = age[index]
+            target += 1
+    for index in range(count):
+        out_cell[target] = new_cell[index]
+        out_weight[target] = new_weight[index]
+        out_age[target] = 0
+        target += 1
+    return out_cell, out_weight, out_age
+
+
+@njit(cache=True)
+def _fitness_all(age, weight, params):
+    """Compiled version of `Animal.fitness_array`."""
+    fitness = np.empty(age.size)
+    for index in range(age.size):
+        fitness[index] = _fitness(age[index], weight[index], params)
+    return fitness
+
+
+@njit(cache=True)
+def _migrate(a0, a1, cell, fitness, neighbors, num_neighbors, params, rng):
+    """Compiled version of `Animal.migrate`, moving animals by changing their cell index."""
+    for index in range(a0, a1):
+        if _random(rng) < params[MU] * fitness[index]:
+            options = num_neighbors[cell[index]]
+            if options > 0:
+                cell[index] = neighbors[cell[index], int(_random(rng) * options)]
+
+
+@njit(cache=True)
+def _age_and_die(a0, a1, weight, age, alive, params, rng):
+    """Compiled aging, weight loss and death, flagging dead animals in `alive`."""
+    for index in range(a0, a1):
+        age[index] += 1
+        weight[index] -= weight[index] * params[ETA]
+        if weight[index] <= 0:
+            alive[index] = False
+        elif _random(rng) < params[OMEGA] * (1 - _fitness(age[index], weight[index], params)):
+            alive[index] = False
+
+
+@njit(cache=True)
+def run_year(seed, year, cell_keys, h_cell, h_weight, h_age, c_cell, c_weight, c_age, f_max,
+             neighbors, num_neighbors, h_params, c_params):
+    """Compiled version of the whole yearly cycle over flat arrays for both species.
+
+    :return: Updated herbivore and carnivore arrays, grouped by cell
+
+    .. note::
+        Each phase of each cell draws from its own stream, and animals are grouped by cell
+        before every phase, so the result does not depend on the order cells are visited in.
+    """
+    num_cells = f_max.size
+    rng = np.zeros(1, np.uint64)  # State of the current stream
+    h_cell, h_weight, h_age, h_start = group_by_cell(h_cell, h_weight, h_age, num_cells)
+    c_cell, c_weight, c_age, c_start = group_by_cell(c_cell, c_weight, c_age, num_cells)
+    h_fitness = _fitness_all(h_age, h_weight, h_params)
+    c_fitness = _fitness_all(c_age, c_weight, c_params)
+
+    h_alive = np.ones(h_cell.size, np.bool_)
+    c_alive = np.ones(c_cell.size, np.bool_)
+    h_new_cell = np.empty(h_cell.size, np.int64)
+    h_new_weight = np.empty(h_cell.size, np.float64)
+    c_new_cell = np.empty(c_cell.size, np.int64)
+    c_new_weight = np.empty(c_cell.size, np.float64)
+    h_count = 0
+    c_count = 0
+
+    for cell in range(num_cells):
+        h0, h1 = h_start[cell], h_start[cell + 1]
+        c0, c1 = c_start[cell], c_start[cell + 1]
+
+        # 1. Feeding
+        seed_stream(rng, seed, year, cell_keys[cell], FEEDING)
+        if h1 > h0 and f_max[cell] > 0:
+            _eat_fodder(h0, h1, h_weight, h_age, h_fitness, f_max[cell], h_params, rng)
+        if c1 > c0 and h1 > h0:
+            _kill_prey(h0, h1, c0, c1, h_weight, h_fitness, h_alive,
+                       c_weight, c_age, c_fitness, c_params, rng)
+
+        # 2. Procreation
+        seed_stream(rng, seed, year, cell_keys[cell], PROCREATION)
+        h_count = _procreate(h0, h1, cell, h_weight, h_age, h_fitness, h_alive, h_params,
+                             h_new_cell, h_new_weight, h_count, rng)
+        c_count = _procreate(c0, c1, cell, c_weight, c_age, c_fitness, c_alive, c_params,
+                             c_new_cell, c_new_weight, c_count, rng)
+
+    h_cell, h_weight, h_age = _merge_newborns(
+        h_cell, h_weight, h_age, h_alive, h_new_cell, h_new_weight, h_count
+    )
+    c_cell, c_weight, c_age = _merge_newborns(
+        c_cell, c_weight, c_age, c_alive, c_new_cell, c_new_weight, c_count
+    )
+
+    # 3. Migration
+    h_cell, h_weight, h_age, h_start = group_by_cell(h_cell, h_weight, h_age, num_cells)
+    c_cell, c_weight, c_age, c_start = group_by_cell(c_cell, c_weight, c_age, num_cells)
+    h_fitness = _fitness_all(h_age, h_weight, h_params)
+    c_fitness = _fitness_all(c_age, c_weight, c_params)
+    for cell in range(num_cells):
+        seed_stream(rng, seed, year, cell_keys[cell], MIGRATION)
+        _migrate(h_start[cell], h_start[cell + 1], h_cell, h_fitness, neighbors, num_neighbors,
+                 h_params, rng)
+        _migrate(c_start[cell], c_start[cell + 1], c_cell, c_fitness, neighbors, num_neighbors,
+                 c_params, rng)
+
+    # 4-6. Aging, loss of weight and death
+    h_cell, h_weight, h_age, h_start = group_by_cell(h_cell, h_weight, h_age, num_cells)
+    c_cell, c_weight, c_age, c_start = group_by_cell(c_cell, c_weight, c_age, num_cells)
+    h_alive = np.ones(h_cell.size, np.bool_)
+    c_alive = np.ones(c_cell.size, np.bool_)
+    for cell in range(num_cells):
+        seed_stream(rng, seed, year, cell_keys[cell], DEATH)
+        _age_and_die(h_start[cell], h_start[cell + 1], h_weight, h_age, h_alive, h_params, rng)
+        _age_and_die(c_start[cell], c_start[cell + 1], c_weight, c_age, c_alive, c_params, rng)
+
+    return (h_cell[h_alive], h_weight[h_alive], h_age[h_alive],
+            c_cell[c_alive], c_weight[c_alive], c_age[c_alive])
+
+
+@njit(cache=True)
+def run_years(num_years, seed, first_year, cell_keys, h_cell, h_weight, h_age, c_cell, c_weight,
+              c_age, f_max, neighbors, num_neighbors, h_params, c_params):
+    """Run `run_year` for several years without returning to Python.
+
+    :return: Updated herbivore and carnivore arrays, and species counts after each year
+    """
+    counts = np.zeros((num_years, 2), np.int64)
+    for year in range(num_years):
+        h_cell, h_weight, h_age, c_cell, c_weight, c_age = run_year(
+            seed, first_year + year, cell_keys, h_cell, h_weight, h_age, c_cell, c_weight,
+            c_age, f_max, neighbors, num_neighbors, h_params, c_params
+        )
+        counts[year, 0] = h_cell.size
+        counts[year, 1] = c_cell.size
+    return h_cell, h_weight, h_age, c_cell, c_weight, c_age, counts
+
+
+class CompiledEngine(ArrayEngine):
+    """Population engine running whole years inside Numba-compiled kernels.
+
+    :param island: Island instance to simulate
+    :type island: Island
+    :param seed: Seed of the random streams of the kernels
+    :type seed: int
+
+    .. note::
+        - Between calls the population is kept in the `Herd` instances of the cells, like with
+            `ArrayEngine`, and flattened to one array per species while the kernels run.
+        - Compiled kernels are cached on disk, so only the first run on a machine pays for the
+            compilation.
+        - The kernels draw from their own counter-based streams, see `seed_stream`. They
+            are reproducible within this engine, but differ from the NumPy streams of
+            `ArrayEngine`.
+        - Like `random.seed`, any int is accepted as seed. It is taken modulo 2**64, the
+            range of the 64-bit seeds of the kernels.
+
+    .. seealso::
+        - ArrayEngine
+        - `BioSim.simulate`
+    """
+
+    def __init__(self, island, seed):
+        if not NUMBA_AVAILABLE:
+            raise ImportError("The 'numba' engine requires the numba package to be installed.")
+        super().__init__(island, seed)
+        self._seed = seed % 2 ** 64  # Fits the integer types of the kernels
+        self._cell_keys = np.array([cell_key(loc) for loc in self._locs], dtype=np.int64)
+
+        self._f_max = np.zeros(len(self._cells))
+
+    def _flatten(self, attribute):
+        """Collect one species from all cells into flat cell, weight and age arrays."""
+        herds = [getattr(cell, attribute) for cell in self._cells]
+        cell_index = np.repeat(np.arange(len(herds)), [len(herd) for herd in herds])
+        weight = np.concatenate([herd.weight for herd in herds])
+        age = np.concatenate([herd.age for herd in herds]).astype(np.int64)
+        return cell_index, weight, age
+
+    def _scatter(self, attribute, species, cell_index, weight, age):
+        """Distribute flat arrays of one species back into the herds of the cells."""
+        cell_index, weight, age, start = group_by_cell(cell_index, weight, age, len(self._cells))
+        for index, cell in enumerate(self._cells):
+            setattr(
+                cell,
+                attribute,
+                Herd(species, weight=weight[start[index]: start[index + 1]],
+                     age=age[start[index]: start[index + 1]]),
+            )
+
+    def run_years(self, num_years):
+        """Run several years inside the compiled kernels.
+
+        :param num_years: Number of years to simulate
+        :type num_years: int
+
+        :return: Herbivore and carnivore count after each year
+        :rtype: ndarray
+        """
+        if not self._cells:
+            self._year += num_years
+            return np.zeros((num_years, 2), dtype=np.int64)
+
+        for index, cell in enumerate(self._cells):
+            self._f_max[index] = cell.f_max()
+
+        h_cell, h_weight, h_age, c_cell, c_weight, c_age, counts = run_years(
+            num_years,
+            self._seed,
+            self._year,
+            self._cell_keys,
+            *self._flatten("herbivores"),
+            *self._flatten("carnivores"),
+            self._f_max,
+            self._island.neighbor_table,
+            self._island.num_neighbors,
+            pack_params(Herbivore),
+            pack_params(Carnivore),
+        )
+        self._scatter("herbivores", Herbivore, h_cell, h_weight, h_age)
+        self._scatter("carnivores", Carnivore, c_cell, c_weight, c_age)
+
+        self._island.update_pop_matrix()  # Recount cells and totals after scattering
+        self._year += num_years
+        return counts
+
+    def run_year_cycle(self):
+        """Runs through each of the 6 yearly seasons inside the compiled kernels.
+
+        .. seealso::
+            - CompiledEngine.run_years
+        """
+        self.run_years(1)
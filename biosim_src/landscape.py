@@ -5,8 +5,88 @@ Lowland class for the simulation.
 """
 
 import random
+from itertools import product
+import numpy as np
 from biosim_src.animal import Herbivore, Carnivore
 
+_MAP_LETTERS = b"WLHD"  # Valid landscape letters, as ASCII codes in map arrays
+
+
+class IslandGeometry:
+    """Immutable index of the island map, built once when the Island instance is created.
+
+    :param cell_codes: ASCII code of the landscape letter of every cell, one row per map row
+    :type cell_codes: ndarray
+
+    *Properties*:
+        - `shape`: Number of rows and columns of the map
+        - `land_mask`: True for mainland cells
+        - `border_mask`: True for cells on the edge of the map
+        - `land_id`: Dense id of each mainland cell, numbered row by row, and -1 for water
+        - `land_locs`: Coordinates of the mainland cells, indexed by id
+        - `neighbor_table`: Ids of up to four mainland neighbors of each mainland cell, in the
+            order north, east, south, west and padded with -1
+        - `num_neighbors`: Number of mainland neighbors of each mainland cell
+
+    .. note::
+        - Coordinates start at (1, 1) like the keys of `Island.landscape`, while the arrays are
+            indexed from 0.
+        - All arrays are read-only, and the attributes can not be reassigned.
+
+    .. seealso::
+        - Island.geometry
+    """
+
+    __slots__ = (
+        "shape", "land_mask", "border_mask", "land_id", "land_locs", "neighbor_table",
+        "num_neighbors",
+    )
+
+    def __init__(self, cell_codes):
+        land_mask = np.asarray(cell_codes) != ord("W")
+        num_rows, num_cols = land_mask.shape
+        land_id = np.full(land_mask.shape, -1, dtype=np.int64)
+        land_id[land_mask] = np.arange(np.count_nonzero(land_mask))
+
+        border_mask = np.zeros(land_mask.shape, dtype=bool)
+        border_mask[[0, -1], :] = True
+        border_mask[:, [0, -1]] = True
+
+        padded = np.pad(land_id, 1, constant_values=-1)
+        neighbor_table = np.stack(
+            (padded[:-2, 1:-1], padded[1:-1, 2:], padded[2:, 1:-1], padded[1:-1, :-2]), axis=-1
+        )[land_mask]  # North, east, south and west neighbors of each mainland cell
+        order = np.argsort(neighbor_table < 0, axis=1, kind="stable")  # Move water to the end
+        neighbor_table = np.take_along_axis(neighbor_table, order, axis=1)
+
+        rows, cols = np.nonzero(land_mask)
+        setter = super().__setattr__
+        setter("shape", (num_rows, num_cols))
+        setter("land_locs", list(zip((rows + 1).tolist(), (cols + 1).tolist())))
+        for name, array in (
+            ("land_mask", land_mask),
+            ("border_mask", border_mask),
+            ("land_id", land_id),
+            ("neighbor_table", neighbor_table),
+            ("num_neighbors", np.count_nonzero(neighbor_table >= 0, axis=1)),
+        ):
+            array.flags.writeable = False
+            setter(name, array)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("IslandGeometry is immutable!")
+
+    def loc_id(self, loc):
+        """Dense id of the mainland cell at `loc`, or -1 for water.
+
+        :param loc: Coordinates of the cell
+        :type loc: tuple
+
+        :return: Id of the cell
+        :rtype: int
+        """
+        return int(self.land_id[loc[0] - 1, loc[1] - 1])
+
 
 class Island:
     """The Island object collects all landscape cells in the map and keeps track of animals.
@@ -26,24 +106,82 @@ class Island:
 
         - Only H, L, D and W cell representation are accepted.
         - All map rows need to be the same length.
+        - The shape of the map, mainland and border cells and the neighbors of each cell are
+            indexed once in `Island.geometry`.
+        - Large maps are created faster from arrays or files, see `Island.from_array` and
+            `Island.from_file`.
     """
 
     def __init__(self, map_str):
-        self.landscape = self.map_from_str(map_str)  # Create landscape from map_str
+        self._build(self.validate_codes(self.codes_from_str(map_str)), map_str)
+
+    @classmethod
+    def from_array(cls, codes):
+        """Create an Island from an array of landscape letters.
+
+        :param codes: 2D array of single letters, as str, bytes or ASCII codes
+        :type codes: array_like
+
+        :return: Island with the given map
+        :rtype: Island
+
+        :Example:
+            .. code-block:: python
+
+                codes = np.full((1000, 1000), 'L')
+                codes[[0, -1], :] = codes[:, [0, -1]] = 'W'
+                island = Island.from_array(codes)
+        """
+        codes = cls.validate_codes(codes)
+        island = cls.__new__(cls)
+        island._build(codes, "\n".join(row.tobytes().decode("ascii") for row in codes))
+        return island
+
+    @classmethod
+    def from_file(cls, path):
+        """Create an Island from a map file with one row of landscape letters per line.
+
+        :param path: Path of the map file
+        :type path: str
+
+        :return: Island with the map of the file
+        :rtype: Island
+
+        .. note::
+            The file is memory-mapped, and its rows are read as a strided view whenever all
+            lines have the same length. The letters are validated and indexed through this
+            read-only view without copying them, and the file stays mapped until the island
+            is built.
+
+        .. seealso::
+            - Island.codes_from_file
+        """
+        return cls.from_array(cls.codes_from_file(path))
+
+    def _build(self, codes, map_str):
+        """Create the landscape and indexes from validated landscape codes.
+
+        :param codes: ASCII codes of the landscape letters
+        :type codes: ndarray
+        :param map_str: Multi-line string of the map
+        :type map_str: str
+        """
         self.map_str = map_str  # Save map_str as property
-        self._land_cells = None  # Create placeholder for mainland cells
+        self.geometry = IslandGeometry(codes)  # Index of the map
         self.check_border_cells()  # Initiate test of map borders e.g. that all are Water cells
+        self.landscape = self.landscape_from_codes(codes)  # Create landscape from codes
+        self._land_cells = None  # Create placeholder for mainland cells
         self.set_neighbors()  # Define neighbor cells for each cell and save for later
 
         self._num_herbs = 0  # Herbivore counter
         self._num_carns = 0  # Carnivore counter
 
-        self.herb_pop_matrix = [[0 for _ in self.unique_cols] for _ in self.unique_rows]
+        self.herb_pop_matrix = np.zeros(self.geometry.shape, dtype=int)
         # Herbivore population matrix
-        self.carn_pop_matrix = [[0 for _ in self.unique_cols] for _ in self.unique_rows]
+        self.carn_pop_matrix = np.zeros(self.geometry.shape, dtype=int)
         # Carnivore population matrix
 
-    def count_animals(self, num_herbs=0, num_carns=0, animal_list=None):
+    def count_animals(self, num_herbs=0, num_carns=0, animal_list=None, cell=None):
         """Count animals for fast retrieval when needed.
 
         :param num_herbs: Number of herbs to be counted
@@ -52,6 +190,8 @@ class Island:
         :type num_carns: int
         :param animal_list: List of animal instances with automatic counting
         :type animal_list: list
+        :param cell: Cell the animals were added to, counted in the population matrices
+        :type cell: LandscapeCell
 
         .. note::
 
@@ -63,21 +203,19 @@ class Island:
             Island.del_animals
         """
 
-        if num_herbs >= 0 and num_carns >= 0:
-            self._num_herbs += num_herbs  # Count herbs
-            self._num_carns += num_carns  # Count carns
-        else:
+        if num_herbs < 0 or num_carns < 0:
             raise ValueError("num_herbs and num_carns need to be 0 or a positive integer.")
 
         if animal_list is not None:
-            self._num_herbs += len(
-                [animal for animal in animal_list if animal.species == "Herbivore"]
-            )  # Count herbivores
-            self._num_carns += len(
-                [animal for animal in animal_list if animal.species == "Carnivore"]
-            )  # Count carnivores
-
-    def del_animals(self, num_herbs=0, num_carns=0, animal_list=None):
+            num_listed_herbs = sum(isinstance(animal, Herbivore) for animal in animal_list)
+            num_herbs += num_listed_herbs  # Count herbivores
+            num_carns += len(animal_list) - num_listed_herbs  # Count carnivores
+
+        self._num_herbs += num_herbs  # Count herbs
+        self._num_carns += num_carns  # Count carns
+        self._count_cell(cell, num_herbs, num_carns)
+
+    def del_animals(self, num_herbs=0, num_carns=0, animal_list=None, cell=None):
         """Remove animals from counters.
 
         :param num_herbs: Number of herbs to be removed
@@ -86,6 +224,8 @@ class Island:
         :type num_carns: int
         :param animal_list: List of animal instances with automatic removal
         :type animal_list: list
+        :param cell: Cell the animals were removed from, counted in the population matrices
+        :type cell: LandscapeCell
 
         .. note::
             Like count_animals, integer can be passed or a list of Animal objects.
@@ -94,19 +234,39 @@ class Island:
 
             Island.count_animals
         """
-        if num_herbs >= 0 and num_carns >= 0:
-            self._num_herbs -= num_herbs  # Remove herbs
-            self._num_carns -= num_carns  # Remove carns
-        else:
+        if num_herbs < 0 or num_carns < 0:
             raise ValueError("num_herbs and num_carns need to be 0 or a positive integer.")
 
         if animal_list is not None:
-            self._num_herbs -= len(
-                [animal for animal in animal_list if animal.species == "Herbivore"]
-            )
-            self._num_carns -= len(
-                [animal for animal in animal_list if animal.species == "Carnivore"]
-            )
+            num_listed_herbs = sum(isinstance(animal, Herbivore) for animal in animal_list)
+            num_herbs += num_listed_herbs
+            num_carns += len(animal_list) - num_listed_herbs
+
+        self._num_herbs -= num_herbs  # Remove herbs
+        self._num_carns -= num_carns  # Remove carns
+        self._count_cell(cell, -num_herbs, -num_carns)
+
+    def move_animals(self, from_cell, to_cell, num_herbs=0, num_carns=0):
+        """Count migrants in the population matrices, the island totals are unchanged.
+
+        :param from_cell: Cell the animals left
+        :type from_cell: LandscapeCell
+        :param to_cell: Cell the animals arrived in
+        :type to_cell: LandscapeCell
+        :param num_herbs: Number of herbivores moved
+        :type num_herbs: int
+        :param num_carns: Number of carnivores moved
+        :type num_carns: int
+        """
+        self._count_cell(from_cell, -num_herbs, -num_carns)
+        self._count_cell(to_cell, num_herbs, num_carns)
+
+    def _count_cell(self, cell, num_herbs, num_carns):
+        """Add to the population matrices at the index of a mainland cell."""
+        if cell is not None and cell.land_id >= 0:
+            row, col = self.geometry.land_locs[cell.land_id]
+            self.herb_pop_matrix[row - 1, col - 1] += num_herbs
+            self.carn_pop_matrix[row - 1, col - 1] += num_carns
 
     def set_neighbors(self):
         """Find and save mainland neighbor cells for all mainland cells in Island instance.
@@ -114,18 +274,49 @@ class Island:
         .. note::
 
             - This function only runs once when instantiating the Island object.
-            - Only mainland neighbors will be saved to the list.
-        """
-        for loc, cell in self._land_cells.items():
-            neighbor_cells = [
-                self.landscape[(loc[0] - 1, loc[1])],
-                self.landscape[(loc[0], loc[1] + 1)],
-                self.landscape[(loc[0] + 1, loc[1])],
-                self.landscape[(loc[0], loc[1] - 1)],
-            ]
-            cell.land_cell_neighbors = [
-                neighbor for neighbor in neighbor_cells if neighbor.type != "Water"
-            ]
+            - Only mainland neighbors will be saved to the list, read from
+                `IslandGeometry.neighbor_table`.
+            - Each mainland cell is also given its id, the index of its coordinates in
+                `IslandGeometry.land_locs`.
+        """
+        cells = list(self.land_cells.values())  # Mainland cells by id
+        cell_table = np.empty(len(cells) + 1, dtype=object)
+        cell_table[:-1] = cells  # The padding id -1 looks up the last entry, None
+        neighbor_cells = cell_table[self.geometry.neighbor_table].tolist()
+        for land_id, (cell, neighbors, num_neighbors) in enumerate(zip(
+            cells, neighbor_cells, self.geometry.num_neighbors.tolist()
+        )):
+            cell.land_id = land_id
+            if num_neighbors < 4:
+                neighbors = neighbors[:num_neighbors]  # Drop the padding of coastal cells
+            cell.land_cell_neighbors = neighbors
+
+    @property
+    def land_locs(self):
+        """Coordinates of mainland cells, indexed by id.
+
+        .. seealso::
+            - IslandGeometry.land_locs
+        """
+        return self.geometry.land_locs
+
+    @property
+    def neighbor_table(self):
+        """Ids of up to four mainland neighbors of each mainland cell, padded with -1.
+
+        .. seealso::
+            - IslandGeometry.neighbor_table
+        """
+        return self.geometry.neighbor_table
+
+    @property
+    def num_neighbors(self):
+        """Number of mainland neighbors of each mainland cell.
+
+        .. seealso::
+            - IslandGeometry.num_neighbors
+        """
+        return self.geometry.num_neighbors
 
     @property
     def num_animals(self):
@@ -224,7 +415,7 @@ class Island:
             - Island.land_cells
 
         """
-        return {loc: cell for loc, cell in self.landscape.items() if cell.is_mainland}
+        return {loc: self.landscape[loc] for loc in self.geometry.land_locs}
 
     @property
     def unique_rows(self):
@@ -237,7 +428,7 @@ class Island:
             - Island.unique_cols
 
         """
-        return list(set([coord[0] for coord in self.landscape]))
+        return list(range(1, self.geometry.shape[0] + 1))
 
     @property
     def unique_cols(self):
@@ -250,7 +441,7 @@ class Island:
             - Island.unique_rows
 
         """
-        return list(set([coord[1] for coord in self.landscape]))
+        return list(range(1, self.geometry.shape[1] + 1))
 
     @staticmethod
     def map_from_str(map_str):
@@ -280,32 +471,114 @@ class Island:
             - Island.__init__
 
         """
-        map_dict = {}
+        codes = Island.validate_codes(Island.codes_from_str(map_str))
+        return Island.landscape_from_codes(codes)
+
+    @staticmethod
+    def codes_from_str(map_str):
+        """Convert a map string to an array of ASCII codes, one row per line.
+
+        :param map_str: Multi-line string of landscape letters
+        :type map_str: str
+
+        :return: ASCII codes of the landscape letters
+        :rtype: ndarray
+        """
+        rows = [row.strip() for row in map_str.strip().splitlines()]
+        row_lengths = np.array([len(row) for row in rows])
+        if row_lengths.size == 0 or (row_lengths != row_lengths[0]).any():
+            raise ValueError("Map needs to have uniform row lengths!")
+
+        text = "".join(rows).encode("ascii", errors="replace")  # Other letters become '?'
+        return np.frombuffer(text, dtype=np.uint8).reshape(len(rows), row_lengths[0])
+
+    @staticmethod
+    def codes_from_file(path):
+        """Read the landscape letters of a map file without loading the file into memory.
+
+        :param path: Path of the map file
+        :type path: str
+
+        :return: ASCII codes of the landscape letters, as a view of the memory-mapped file if
+            all lines have the same length and line ending
+        :rtype: ndarray
+        """
+        data = np.memmap(path, dtype=np.uint8, mode="r")
+        line_ends = np.flatnonzero(data == ord("\n"))
+        if line_ends.size == 0 or line_ends[-1] != data.size - 1:
+            line_ends = np.append(line_ends, data.size)  # Last line without newline
+        line_starts = np.concatenate(([0], line_ends[:-1] + 1))
+
+        row_ends = line_ends.copy()
+        carriage_return = (row_ends > line_starts) & (data[np.maximum(row_ends - 1, 0)] == 13)
+        row_ends[carriage_return] -= 1  # Windows line endings
+        nonempty = row_ends > line_starts
+        line_starts, row_ends = line_starts[nonempty], row_ends[nonempty]
+
+        row_lengths = row_ends - line_starts
+        if row_lengths.size == 0 or (row_lengths != row_lengths[0]).any():
+            raise ValueError("Map needs to have uniform row lengths!")
+
+        strides = np.diff(line_starts)
+        if strides.size == 0 or (strides == strides[0]).all():
+            stride = strides[0] if strides.size else row_lengths[0]
+            return np.lib.stride_tricks.as_strided(
+                data[line_starts[0]:],
+                shape=(line_starts.size, row_lengths[0]),
+                strides=(stride, 1),
+                writeable=False,
+            )
+        return np.stack([data[start:end] for start, end in zip(line_starts, row_ends)])
+
+    @staticmethod
+    def validate_codes(codes):
+        """Check that landscape codes form a 2D map of valid letters.
 
-        # Test row lengths
-        row_lengths = [len(row.strip()) for row in map_str.strip(" ").splitlines()]
-        for i, row in enumerate(row_lengths[:-1]):
-            if row_lengths[i] != row_lengths[i + 1]:
-                raise ValueError("Map needs to have uniform row lengths!")
+        :param codes: 2D array of single letters, as str, bytes or ASCII codes
+        :type codes: array_like
 
-        for row_coord, cell_row in enumerate(map_str.splitlines()):
-            for col_coord, cell in enumerate(cell_row.strip()):
-                coord = (row_coord + 1, col_coord + 1)
+        :return: ASCII codes of the landscape letters
+        :rtype: ndarray
+        """
+        try:
+            codes = np.asarray(codes)
+        except ValueError:  # Ragged nested lists
+            raise ValueError("Map needs to have uniform row lengths!")
+
+        if codes.dtype.kind == "U" and codes.dtype.itemsize == 4:
+            codes = codes.view(np.uint32)  # One UCS-4 code per letter
+        elif codes.dtype.kind == "S" and codes.dtype.itemsize == 1:
+            codes = codes.view(np.uint8)
+        elif codes.dtype.kind not in "ui":
+            raise ValueError("Map codes need to be single letters or their ASCII codes!")
+
+        if codes.ndim != 2 or codes.size == 0:
+            raise ValueError("Map needs to have uniform row lengths!")
+        if not np.isin(codes, np.frombuffer(_MAP_LETTERS, dtype=np.uint8)).all():
+            raise ValueError("Map strings need to be either W, L, H or D! Try setting map again.")
+        return codes.astype(np.uint8, copy=False)
+
+    @staticmethod
+    def landscape_from_codes(codes):
+        """Create the landscape dictionary from validated landscape codes.
 
-                if cell == "W":
-                    map_dict[coord] = Water()
-                elif cell == "L":
-                    map_dict[coord] = Lowland()
-                elif cell == "H":
-                    map_dict[coord] = Highland()
-                elif cell == "D":
-                    map_dict[coord] = Desert()
-                else:
-                    raise ValueError(
-                        "Map strings need to be either W, L, H or D! " "Try setting map again."
-                    )
+        :param codes: ASCII codes of the landscape letters
+        :type codes: ndarray
 
-        return map_dict
+        :return: The landscape with coordinates as keys and cells as values, row by row
+        :rtype: dict
+        """
+        cells = np.full(codes.shape, Water(), dtype=object)  # One Water instance is shared
+        for letter, cell_class in ((b"L", Lowland), (b"H", Highland), (b"D", Desert)):
+            mask = codes == ord(letter)
+            new_cells = np.empty(np.count_nonzero(mask), dtype=object)
+            new_cells[:] = [cell_class() for _ in range(new_cells.size)]
+            cells[mask] = new_cells
+
+        num_rows, num_cols = codes.shape
+        return dict(zip(
+            product(range(1, num_rows + 1), range(1, num_cols + 1)), cells.ravel().tolist()
+        ))
 
     def check_border_cells(self):
         """Iterate through land_cells and check that none have border coordinates.
@@ -314,34 +587,85 @@ class Island:
             The borders are checked when the Island instance is initiated.
 
         """
-        for row, col in self.land_cells:
-            if row == 1 or row == self.unique_rows[-1] or col == 1 or col == self.unique_cols[-1]:
-                raise ValueError("Only water cells may be border cells!")
+        if (self.geometry.land_mask & self.geometry.border_mask).any():
+            raise ValueError("Only water cells may be border cells!")
 
     def update_pop_matrix(self):
-        """Update the population matrices for heatmap.
+        """Recount the population matrices and island totals from the animals in the cells.
 
         :Example:
 
             .. code-block:: python
 
-                example_matrix = [
+                example_matrix = np.array([
                     [0, 0, 0],
                     [0, 221, 0],
                     [0, 0, 0],
-                ]
+                ])
+
+        .. note::
+            The matrices are kept up to date by `Island.count_animals`, `Island.del_animals`
+            and `Island.move_animals`. A recount is only needed after animals have been moved
+            between cells in bulk without them, e.g. when gathered from worker processes.
 
         .. seealso::
+            - Island.verify_counts
             - `visualization` module
 
         """
-        for row in self.unique_rows[1:-1]:  # First and last cell is water
-            for col in self.unique_cols[1:-1]:  # First and last cell is water
-                cell = self.landscape[(row, col)]
-                if cell.is_mainland:
-                    # print(cell)
-                    self.herb_pop_matrix[row - 1][col - 1] = cell.herb_count
-                    self.carn_pop_matrix[row - 1][col - 1] = cell.carn_count
+        land_mask = self.geometry.land_mask
+        cells = [self.landscape[loc] for loc in self.geometry.land_locs]  # In mask order
+        self.herb_pop_matrix[land_mask] = [cell.herb_count for cell in cells]
+        self.carn_pop_matrix[land_mask] = [cell.carn_count for cell in cells]
+        self._num_herbs = int(self.herb_pop_matrix.sum())
+        self._num_carns = int(self.carn_pop_matrix.sum())
+
+    def set_cell_counts(self, locs, num_herbs, num_carns):
+        """Set the population matrices at some mainland cells and recount the island totals.
+
+        :param locs: Coordinates of the cells
+        :type locs: list
+        :param num_herbs: Number of herbivores in each cell
+        :type num_herbs: array_like
+        :param num_carns: Number of carnivores in each cell
+        :type num_carns: array_like
+
+        .. note::
+            Used while the animals of the cells are kept by worker processes, so the matrices
+            and totals follow the simulation although the cells of this island are empty.
+
+        .. seealso::
+            - TilePool.run_years
+        """
+        rows, cols = np.asarray(locs, dtype=np.int64).reshape(-1, 2).T - 1
+        self.herb_pop_matrix[rows, cols] = num_herbs
+        self.carn_pop_matrix[rows, cols] = num_carns
+        self._num_herbs = int(self.herb_pop_matrix.sum())
+        self._num_carns = int(self.carn_pop_matrix.sum())
+
+    def verify_counts(self):
+        """Check the population matrices and island totals against the animals in the cells.
+
+        :raises RuntimeError: If a counter differs from the number of animals in the cells
+
+        .. note::
+            Meant for debugging and tests, it visits every mainland cell.
+        """
+        for loc, cell in self.land_cells.items():
+            index = (loc[0] - 1, loc[1] - 1)
+            counted = (self.herb_pop_matrix[index], self.carn_pop_matrix[index])
+            if counted != (cell.herb_count, cell.carn_count):
+                raise RuntimeError(
+                    f"Cell {loc} holds {cell.herb_count} herbivores and {cell.carn_count} "
+                    f"carnivores, but {counted[0]} and {counted[1]} are counted."
+                )
+
+        totals = (int(self.herb_pop_matrix.sum()), int(self.carn_pop_matrix.sum()))
+        if totals != (self._num_herbs, self._num_carns):
+            raise RuntimeError(
+                f"The population matrices hold {totals[0]} herbivores and {totals[1]} "
+                f"carnivores, but {self._num_herbs} and {self._num_carns} are counted."
+            )
 
     @property
     def animal_weights(self):
@@ -434,21 +758,26 @@ class LandscapeCell:
     :Properties:
         - herbivores: A list containing herbivores in the cell
         - carnivores: A list containing carnivores in the cell
+        - land_id: Id of the cell in `IslandGeometry`, or -1 until set by the Island
 
     .. note::
-        LandscapeCell objects will be instantiated through subclasses and be contained in an
-        Island object.
+        - LandscapeCell objects will be instantiated through subclasses and be contained in an
+            Island object.
+        - Cells use `__slots__` and take their type from the class.
 
     """
 
+    __slots__ = ("_fodder", "herbivores", "carnivores", "land_cell_neighbors", "land_id")
+
+    _is_mainland = True
+
     def __init__(self):
-        self._fodder = self.f_max()
-        self._is_mainland = True
-        self.type = self.__class__.__name__
+        self._fodder = self.params["f_max"]
 
         self.herbivores = []
         self.carnivores = []
         self.land_cell_neighbors = []
+        self.land_id = -1
 
     def __repr__(self):
         return "{}(f_max: {})".format(self.__class__.__name__, self.f_max())
@@ -493,20 +822,10 @@ class LandscapeCell:
         """Getter method for LandscapeCell._is_mainland property."""
         return self._is_mainland
 
-    def reset_animals(self):
-        """Reset Animal.has_moved property of animals after all animals in a cell has
-        had the chance to migrate.
-
-        .. note::
-            The Animal.has_moved property ensures no animal moves twice in the same yearly cycle.
-
-        .. seealso::
-            - Animal.migrate
-            - BioSim.migrate
-
-        """
-        for animal in self.animals:
-            animal.has_moved = False
+    @property
+    def type(self):
+        """Landscape type of the cell, given by the name of its class."""
+        return self.__class__.__name__
 
     def add_animals(self, animal_list):
         """Adds a list of animals to the cell class.
@@ -520,37 +839,102 @@ class LandscapeCell:
             - LandscapeCell.carnivores
 
         """
+        new_herbs = []
+        new_carns = []
         for animal in animal_list:  # Iterate through animals in list
             if isinstance(animal, Herbivore):
-                self.herbivores.append(animal)
+                new_herbs.append(animal)
             elif isinstance(animal, Carnivore):
-                self.carnivores.append(animal)
+                new_carns.append(animal)
             else:
                 raise ValueError("List may only contain Herbivore and Carnivore instances!")
 
+        self.add_herbivores(new_herbs)
+        self.add_carnivores(new_carns)
+
     def remove_animals(self, animal_list):
         """Removes a list of animal objects from the cell class.
 
         :param animal_list: A list containing animal objects
         :type animal_list: list
 
+        .. note::
+            The whole batch is removed in a single pass over the cell, so removing k animals
+            from a cell with n animals costs O(n + k).
+
         .. seealso::
             - LandscapeCell.add_animals
-            - LandscapeCell.herbivores
-            - LandscapeCell.carnivores
+            - LandscapeCell.remove_herbivores
+            - LandscapeCell.remove_carnivores
 
         """
-        for animal in animal_list:  # Iterate through animals in list
-            if isinstance(animal, Herbivore):
-                self.herbivores.remove(animal)
-            elif isinstance(animal, Carnivore):
-                self.carnivores.remove(animal)
-            else:
-                raise ValueError("List may only contain Herbivore and Carnivore instances!")
+        removed = set(animal_list)
+        herbivores = [herb for herb in self.herbivores if herb not in removed]
+        carnivores = [carn for carn in self.carnivores if carn not in removed]
+
+        num_removed = len(self.herbivores) - len(herbivores)
+        num_removed += len(self.carnivores) - len(carnivores)
+        if num_removed != len(removed):
+            raise ValueError("List may only contain Herbivore and Carnivore instances in the cell!")
 
-    def randomize_herbs(self):
-        """Shuffles the self.herbivores list."""
-        random.shuffle(self.herbivores)
+        self.herbivores = herbivores
+        self.carnivores = carnivores
+
+    def add_herbivores(self, herbs):
+        """Adds a batch of herbivores to the cell without checking their type.
+
+        :param herbs: Herbivore instances
+        :type herbs: list
+
+        .. seealso::
+            - LandscapeCell.add_animals
+        """
+        self.herbivores.extend(herbs)
+
+    def add_carnivores(self, carns):
+        """Adds a batch of carnivores to the cell without checking their type.
+
+        :param carns: Carnivore instances
+        :type carns: list
+
+        .. seealso::
+            - LandscapeCell.add_animals
+        """
+        self.carnivores.extend(carns)
+
+    def remove_herbivores(self, herbs):
+        """Removes a batch of herbivores from the cell in a single pass.
+
+        :param herbs: Herbivore instances in the cell
+        :type herbs: list
+
+        .. seealso::
+            - LandscapeCell.remove_animals
+        """
+        if herbs:
+            removed = set(herbs)
+            self.herbivores = [herb for herb in self.herbivores if herb not in removed]
+
+    def remove_carnivores(self, carns):
+        """Removes a batch of carnivores from the cell in a single pass.
+
+        :param carns: Carnivore instances in the cell
+        :type carns: list
+
+        .. seealso::
+            - LandscapeCell.remove_animals
+        """
+        if carns:
+            removed = set(carns)
+            self.carnivores = [carn for carn in self.carnivores if carn not in removed]
+
+    def randomize_herbs(self, rng=random):
+        """Shuffles the self.herbivores list.
+
+        :param rng: Source of random numbers, e.g. a `CellStream`
+        :type rng: module
+        """
+        rng.shuffle(self.herbivores)
 
     @property
     def animals(self):
@@ -598,10 +982,7 @@ class LandscapeCell:
         :return: Sorted herbivores and corresponding fitness values
         :rtype: List of tuples
         """
-        fitness_dict = {herb: herb.fitness for herb in self.herbivores}
-        sorted_tuples = sorted(fitness_dict.items(), key=lambda x: x[1], reverse=False)
-
-        return sorted_tuples
+        return sorted(((herb, herb.fitness) for herb in self.herbivores), key=lambda x: x[1])
 
     @property
     def is_empty(self):
@@ -624,10 +1005,9 @@ class Lowland(LandscapeCell):
 
     """
 
-    params = {"f_max": 800.0}
+    __slots__ = ()
 
-    def __init__(self):
-        super().__init__()  # Initialise landscape class
+    params = {"f_max": 800.0}
 
 
 class Highland(LandscapeCell):
@@ -641,10 +1021,9 @@ class Highland(LandscapeCell):
 
     """
 
-    params = {"f_max": 300.0}
+    __slots__ = ()
 
-    def __init__(self, location=None):
-        super().__init__()  # Initialise landscape class
+    params = {"f_max": 300.0}
 
 
 class Desert(LandscapeCell):
@@ -659,10 +1038,9 @@ class Desert(LandscapeCell):
 
     """
 
-    params = {"f_max": 0.0}
+    __slots__ = ()
 
-    def __init__(self):
-        super().__init__()  # Initialise landscape class
+    params = {"f_max": 0.0}
 
 
 class Water:
@@ -671,8 +1049,14 @@ class Water:
     :class property:
         - `is_mainland`: Set to false for Water instances.
 
+    .. note::
+        Water cells hold no state, so `Island.map_from_str` shares one instance between all
+        water cells of the map.
+
     """
 
+    __slots__ = ()
+
     is_mainland = False
     type = "Water"
 
@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+
+"""
+Visualization in a separate process, fed with snapshots through a bounded queue.
+"""
+
+__author__ = "Anders Mølmen Høst & Petter Kolstad Hetland"
+__email__ = "anders.molmen.host@nmbu.no, petter.storesund.hetland@nmbu.no"
+
+import os
+import queue
+import shutil
+import warnings
+import weakref
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+import numpy as np
+
+POLICIES = ("coalesce", "drop", "strict")  # What to do with snapshots when the queue is full
+
+
+def _stop_renderer(snapshots, process):
+    """Stop the process of a `RenderProcess` that was not closed."""
+    try:
+        snapshots.put_nowait(None)
+    except (queue.Full, OSError, ValueError):
+        pass
+    process.join(timeout=5)
+    if process.is_alive():
+        process.terminate()
+
+
+class RenderProcess:
+    """Process drawing the plots from snapshots while the simulation continues.
+
+    :param config: Keyword arguments of `Plotting`, plus 'map_str', 'img_base', 'img_fmt',
+        'img_max_bytes' and 'ffmpeg' for saving frames
+    :type config: dict
+    :param policy: What to do with a snapshot when the queue is full, see below
+    :type policy: str
+    :param queue_size: Number of snapshots waiting to be drawn
+    :type queue_size: int
+
+    The policy decides what happens when the renderer falls behind and the queue is full:
+        - 'coalesce': The snapshot is merged into the next one, so the latest frame and all
+            counts are drawn once there is room.
+        - 'drop': The frame is dropped and only its counts are passed on with the next one.
+        - 'strict': The simulation waits until the snapshot fits, so every frame is drawn.
+
+    .. note::
+        - The process is started with the 'spawn' method and builds its own `Island` from the
+            map string, which holds no animals.
+        - Frames to be saved are saved by the process. With 'coalesce' a saved frame may
+            show a later year, with 'drop' it may be lost. Use 'strict' for frame-by-frame
+            output.
+
+    .. seealso::
+        - Snapshot
+        - Plotting.show_snapshot
+    """
+
+    def __init__(self, config, policy="coalesce", queue_size=4):
+        if policy not in POLICIES:
+            raise ValueError("render_policy needs to be either 'coalesce', 'drop' or 'strict'!")
+        self.policy = policy
+        self.num_dropped = 0  # Snapshots not sent when they were taken
+        self._pending = None  # Snapshot waiting for room in the queue
+
+        context = get_context("spawn")
+        self._snapshots = context.Queue(maxsize=queue_size)
+        self._replies = context.Queue()
+        self._process = context.Process(
+            target=_render_worker, args=(self._snapshots, self._replies, config), daemon=True
+        )
+        self._process.start()
+        self._finalizer = weakref.finalize(self, _stop_renderer, self._snapshots, self._process)
+
+    def submit(self, snapshot):
+        """Send a snapshot to the renderer, following the policy if the queue is full.
+
+        :param snapshot: Snapshot to draw
+        :type snapshot: Snapshot
+        """
+        self._check_alive()
+        if self._pending is not None:
+            snapshot = self._pending.merge(snapshot)
+            self._pending = None
+
+        if self.policy == "strict":
+            self._put(snapshot)
+            return
+
+        try:
+            self._snapshots.put_nowait(snapshot)
+        except queue.Full:
+            self.num_dropped += 1
+            self._pending = snapshot if self.policy == "coalesce" else snapshot.counts_only()
+
+    def close(self):
+        """Draw the remaining snapshots, finish the saved frames and stop the process.
+
+        :return: Figure files saved by the renderer, None if frames were encoded to a movie or
+            none were saved
+        :rtype: FrameSpool
+        """
+        if not self._finalizer.alive:
+            return None
+        if self._pending is not None:
+            self._put(self._pending)
+            self._pending = None
+        self._put(None)
+
+        reply = self._receive()
+        self._process.join()
+        self._finalizer.detach()
+        return reply
+
+    def _put(self, item):
+        """Put an item in the queue, waiting as long as the renderer is alive."""
+        while True:
+            try:
+                self._snapshots.put(item, timeout=1.0)
+                return
+            except queue.Full:
+                self._check_alive()
+
+    def _receive(self):
+        """Receive the reply of the renderer and raise errors from the renderer here."""
+        while True:
+            try:
+                reply = self._replies.get(timeout=1.0)
+                break
+            except queue.Empty:
+                self._check_alive()
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    def _check_alive(self):
+        """Raise the error of the renderer if it has stopped."""
+        if not self._process.is_alive():
+            self._finalizer.detach()
+            try:
+                reply = self._replies.get(timeout=1.0)
+            except queue.Empty:
+                reply = None
+            if isinstance(reply, Exception):
+                raise reply
+            raise RuntimeError("The renderer process stopped unexpectedly.")
+
+
+def _render_worker(snapshots, replies, config):
+    """Process of `RenderProcess`, drawing snapshots until None is received.
+
+    Replies with the `FrameSpool` of saved figure files, None, or the error that stopped it.
+    """
+    from biosim_src.landscape import Island
+    from biosim_src.video import FrameSpool, MovieStream, open_frames, save_frame
+    from biosim_src.visualization import Plotting  # matplotlib is only loaded here
+
+    try:
+        config = dict(config)
+        frame_options = {key: config.pop(key) for key in ("img_base", "img_fmt",
+                                                          "img_max_bytes", "ffmpeg")}
+        plot = Plotting(Island(config.pop("map_str")), **config)
+        frames = None
+
+        while True:
+            snapshot = snapshots.get()
+            if snapshot is None:
+                break
+            plot.show_snapshot(snapshot)
+            if snapshot.save and frame_options["img_base"] is not None:
+                if frames is None:
+                    frames = open_frames(
+                        plot,
+                        frame_options["img_base"],
+                        frame_options["img_fmt"],
+                        frame_options["img_max_bytes"],
+                        frame_options["ffmpeg"],
+                    )
+                save_frame(frames, plot)
+
+        if isinstance(frames, MovieStream):
+            frames.close()
+        replies.put(frames if isinstance(frames, FrameSpool) else None)
+
+    except Exception as err:  # Sent to the main process, which raises it
+        replies.put(err)
+
+
+def render_movie(log, img_base, img_fmt="mp4", workers=None, chunk_size=10, ffmpeg="ffmpeg"):
+    """Render the saved frames of a snapshot log in parallel after the simulation.
+
+    :param log: Snapshots recorded by `BioSim.simulate`
+    :type log: SnapshotLog
+    :param img_base: Beginning of the file names, including path
+    :type img_base: str
+    :param img_fmt: 'mp4' to encode '{}.mp4'.format(img_base), or an image file type
+    :type img_fmt: str
+    :param workers: Number of worker processes, defaults to the number of CPUs
+    :type workers: int
+    :param chunk_size: Number of consecutive frames rendered by a worker at a time
+    :type chunk_size: int
+    :param ffmpeg: Name or path of the ffmpeg binary
+    :type ffmpeg: str
+
+    :return: Number of frames rendered
+    :rtype: int
+
+    .. note::
+        - Each worker draws chunks of consecutive frames with its own `Plotting`, so the
+            frames are identical to those drawn during a simulation.
+        - For 'mp4', the raw frames are sent back and piped into ffmpeg in order, with at most
+            two chunks per worker waiting. If ffmpeg is not found, the frames are saved as png
+            files instead.
+        - Image files are saved by the workers themselves, named like those of `FrameSpool`.
+
+    .. seealso::
+        - SnapshotLog
+        - MovieStream
+    """
+    from biosim_src.video import MovieStream
+
+    indices = [index for index, frame in enumerate(log.frames) if frame.save]
+    starts = range(0, len(indices), chunk_size)  # Image number of the first frame of each chunk
+    workers = os.cpu_count() if workers is None else workers
+
+    if img_fmt == "mp4" and shutil.which(ffmpeg) is None:
+        warnings.warn("{} was not found, frames are saved as png files.".format(ffmpeg))
+        img_fmt = "png"
+    files = None if img_fmt == "mp4" else (img_base, img_fmt)
+
+    movie = None
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+        waiting = deque()
+        for start in starts:
+            waiting.append(pool.submit(
+                _render_chunk, log.map_str, log.plot_options,
+                log.replay(indices[start:start + chunk_size]), files, start
+            ))
+            while len(waiting) > 2 * workers or (waiting and start == starts[-1]):
+                frames = waiting.popleft().result()
+                if files is None:
+                    for frame in frames:
+                        if movie is None:
+                            height, width, _ = frame.shape
+                            movie = MovieStream(
+                                "{}.{}".format(img_base, img_fmt), width, height, ffmpeg=ffmpeg
+                            )
+                        movie.write(frame)
+    if movie is not None:
+        movie.close()
+    return len(indices)
+
+
+def _render_chunk(map_str, plot_options, snapshots, files, first_img_no):
+    """Worker of `render_movie`, drawing consecutive frames.
+
+    :return: RGBA pixels of each frame, or an empty list if they were saved as image files
+    :rtype: list
+    """
+    from biosim_src.landscape import Island
+    from biosim_src.video import FrameSpool
+    from biosim_src.visualization import Plotting  # matplotlib is only loaded here
+
+    plot = Plotting(Island(map_str), **plot_options)
+    spool = None if files is None else FrameSpool(*files)  # Only used to name the files
+    frames = []
+    for img_no, snapshot in enumerate(snapshots, start=first_img_no):
+        plot.show_snapshot(snapshot)
+        if spool is None:
+            frames.append(np.array(plot.frame()))  # Copy, the canvas is reused
+        else:
+            plot.figure.savefig(spool.path(img_no))
+    plot.close()
+    return frames
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+
+"""
+Compact snapshots of the data shown by the visualization.
+"""
+
+__author__ = "Anders Mølmen Høst & Petter Kolstad Hetland"
+__email__ = "anders.molmen.host@nmbu.no, petter.storesund.hetland@nmbu.no"
+
+import json
+import numpy as np
+
+
+class Snapshot:
+    """Everything `Plotting` needs to draw one frame, without any animals.
+
+    :param first_year: Year of the first row of `counts`
+    :type first_year: int
+    :param counts: Herbivore and carnivore count of each year since the previous snapshot
+    :type counts: ndarray
+    :param year_target: Last year of the current simulation, used for the x-axis
+    :type year_target: int
+    :param herb_pop_matrix: Number of herbivores in each cell, None to keep the last frame
+    :type herb_pop_matrix: ndarray
+    :param carn_pop_matrix: Number of carnivores in each cell, None to keep the last frame
+    :type carn_pop_matrix: ndarray
+    :param hist_counts: Histogram counts of each property, None if there are no animals
+    :type hist_counts: dict
+    :param save: Whether the frame is saved to the movie
+    :type save: bool
+
+    .. note::
+        A snapshot holds a few kilobytes for ordinary maps, so it is cheap to send to another
+        process or to keep for every year of a simulation.
+
+    .. seealso::
+        - take_snapshot
+        - Plotting.show_snapshot
+    """
+
+    __slots__ = (
+        "first_year",
+        "counts",
+        "year_target",
+        "herb_pop_matrix",
+        "carn_pop_matrix",
+        "hist_counts",
+        "save",
+    )
+
+    def __init__(self, first_year, counts, year_target, herb_pop_matrix=None,
+                 carn_pop_matrix=None, hist_counts=None, save=False):
+        self.first_year = first_year
+        self.counts = np.asarray(counts, dtype=np.int64).reshape(-1, 2)
+        self.year_target = year_target
+        self.herb_pop_matrix = herb_pop_matrix
+        self.carn_pop_matrix = carn_pop_matrix
+        self.hist_counts = hist_counts
+        self.save = save
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    @property
+    def year(self):
+        """Year of the frame, the last year with counts."""
+        return self.first_year + len(self.counts) - 1
+
+    @property
+    def has_frame(self):
+        """Whether the snapshot holds population matrices to draw."""
+        return self.herb_pop_matrix is not None
+
+    def counts_only(self):
+        """Copy of the snapshot without the frame, keeping the counts for the line plot.
+
+        :rtype: Snapshot
+        """
+        return Snapshot(self.first_year, self.counts, self.year_target)
+
+    def merge(self, later):
+        """Combine the snapshot with a later one into one frame.
+
+        :param later: Snapshot taken after this one
+        :type later: Snapshot
+
+        :return: Snapshot with the counts of both and the frame of the later one, saved if
+            either was to be saved
+        :rtype: Snapshot
+        """
+        counts = np.concatenate((self.counts, later.counts))
+        frame = later if later.has_frame else self
+        return Snapshot(
+            self.first_year,
+            counts,
+            later.year_target,
+            frame.herb_pop_matrix,
+            frame.carn_pop_matrix,
+            frame.hist_counts,
+            self.save or later.save,
+        )
+
+
+def take_snapshot(island, statistics, first_year, counts, year_target, save=False):
+    """Take a snapshot of the island population.
+
+    :param island: Island instance with the population
+    :type island: Island
+    :param statistics: Collector of the histogram counts
+    :type statistics: PopulationStatistics
+    :param first_year: Year of the first row of `counts`
+    :type first_year: int
+    :param counts: Herbivore and carnivore count of each year since the previous snapshot
+    :type counts: ndarray
+    :param year_target: Last year of the current simulation
+    :type year_target: int
+    :param save: Whether the frame is saved to the movie
+    :type save: bool
+
+    :rtype: Snapshot
+    """
+    has_animals = island.num_herbs > 0 or island.num_carns > 0
+    return Snapshot(
+        first_year,
+        counts,
+        year_target,
+        island.herb_pop_matrix.astype(np.int32),  # Copies, the island keeps changing
+        island.carn_pop_matrix.astype(np.int32),
+        statistics.collect(island) if has_animals else None,
+        save,
+    )
+
+
+class SnapshotLog:
+    """Snapshots recorded during a simulation, to render the movie afterwards.
+
+    :param map_str: Multi-line string specifying island geography
+    :type map_str: str
+    :param plot_options: Keyword arguments of `Plotting`, e.g. 'cmax' and 'hist_specs'
+    :type plot_options: dict
+
+    :Example:
+        .. code-block:: python
+
+            sim = BioSim(island_map, ini_pop, plot_graph=False, record=True)
+            sim.simulate(1000, vis_years=1)
+            sim.snapshot_log.save('run.npz')
+
+            render_movie(SnapshotLog.load('run.npz'), 'run', workers=8)
+
+    .. note::
+        All counts are kept, so the line plot of every frame shows all years up to the frame,
+        also when frames were only recorded every few years.
+
+    .. seealso::
+        - render_movie
+    """
+
+    def __init__(self, map_str, plot_options=None):
+        self.map_str = map_str
+        self.plot_options = {} if plot_options is None else dict(plot_options)
+        self.first_year = None  # Year of the first count
+        self._counts = []  # Arrays of counts, one per snapshot
+        self.frames = []  # Snapshots with their frames, in order
+
+    def __len__(self):
+        return len(self.frames)
+
+    def append(self, snapshot):
+        """Add the next snapshot of the simulation.
+
+        :param snapshot: Snapshot taken after the previous one
+        :type snapshot: Snapshot
+        """
+        if self.first_year is None:
+            self.first_year = snapshot.first_year
+        self._counts.append(snapshot.counts)
+        if snapshot.has_frame:
+            self.frames.append(snapshot)
+
+    @property
+    def counts(self):
+        """Herbivore and carnivore count of every year from `first_year`.
+
+        :rtype: ndarray
+        """
+        return np.concatenate(self._counts or [np.zeros((0, 2), dtype=np.int64)])
+
+    @property
+    def year_target(self):
+        """Last year recorded."""
+        return self.first_year + len(self.counts) - 1
+
+    def replay(self, indices):
+        """Snapshots of some frames, ready to be drawn one after the other by a new plot.
+
+        :param indices: Increasing positions of the frames in `frames`
+        :type indices: list
+
+        :return: Snapshots where the first one holds all counts up to its year, and the
+            x-axis of all of them ends at the last year recorded
+        :rtype: list
+        """
+        counts, year_target = self.counts, self.year_target
+        replayed = []
+        first_year = self.first_year
+        for index in indices:
+            frame = self.frames[index]
+            replayed.append(Snapshot(
+                first_year,
+                counts[first_year - self.first_year:frame.year - self.first_year + 1],
+                year_target,
+                frame.herb_pop_matrix,
+                frame.carn_pop_matrix,
+                frame.hist_counts,
+                frame.save,
+            ))
+            first_year = frame.year + 1
+        return replayed
+
+    def save(self, path):
+        """Save the log to a compressed NumPy file.
+
+        :param path: Path of the file, '.npz' is added if missing
+        :type path: str
+        """
+        props = sorted({prop for frame in self.frames if frame.hist_counts
+                        for prop in frame.hist_counts})
+        arrays = {
+            "map_str": np.array(self.map_str),
+            "plot_options": np.array(json.dumps(self.plot_options)),
+            "first_year": np.array(-1 if self.first_year is None else self.first_year),
+            "counts": self.counts,
+            "frame_years": np.array([frame.year for frame in self.frames], dtype=np.int64),
+            "save": np.array([frame.save for frame in self.frames], dtype=bool),
+            "has_hist": np.array([frame.hist_counts is not None for frame in self.frames]),
+        }
+        if self.frames:
+            arrays["herb_pop_matrix"] = np.stack([frame.herb_pop_matrix for frame in self.frames])
+            arrays["carn_pop_matrix"] = np.stack([frame.carn_pop_matrix for frame in self.frames])
+        for prop in props:
+            bins = next(frame.hist_counts[prop] for frame in self.frames if frame.hist_counts)
+            arrays["hist_" + prop] = np.stack([
+                frame.hist_counts[prop] if frame.hist_counts else np.zeros_like(bins)
+                for frame in self.frames
+            ])
+        np.savez_compressed(path, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        """Load a log saved by `SnapshotLog.save`.
+
+        :param path: Path of the file
+        :type path: str
+
+        :rtype: SnapshotLog
+        """
+        with np.load(path) as data:
+            log = cls(str(data["map_str"]), json.loads(str(data["plot_options"])))
+            if int(data["first_year"]) < 0:
+                return log
+
+            counts, first_year = data["counts"], int(data["first_year"])
+            props = [key[len("hist_"):] for key in data.files if key.startswith("hist_")]
+            year = first_year - 1
+            for index, frame_year in enumerate(data["frame_years"]):
+                hist_counts = None
+                if data["has_hist"][index]:
+                    hist_counts = {prop: data["hist_" + prop][index] for prop in props}
+                log.append(Snapshot(
+                    year + 1,
+                    counts[year + 1 - first_year:frame_year - first_year + 1],
+                    frame_year,
+                    data["herb_pop_matrix"][index],
+                    data["carn_pop_matrix"][index],
+                    hist_counts,
+                    bool(data["save"][index]),
+                ))
+                year = frame_year
+            if year - first_year + 1 < len(counts):  # Counts after the last frame
+                log.append(Snapshot(
+                    year + 1, counts[year + 1 - first_year:], first_year + len(counts) - 1
+                ))
+        return log
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+
+"""
+Binned statistics of the island population for the histogram panels.
+"""
+
+__author__ = "Anders Mølmen Høst & Petter Kolstad Hetland"
+__email__ = "anders.molmen.host@nmbu.no, petter.storesund.hetland@nmbu.no"
+
+import numpy as np
+from biosim_src.columnar import Herd
+
+PROPERTIES = ("weight", "age", "fitness")  # Column order of the animal values
+
+DEFAULT_HIST_SPECS = {
+    "weight": {"max": 80, "delta": 2},
+    "fitness": {"max": 1.0, "delta": 0.05},
+    "age": {"max": 80, "delta": 2},
+}  # Histograms shown when hist_specs is not given
+
+
+def bin_edges(spec):
+    """Fixed bin edges from zero to the maximum value of a histogram specification.
+
+    :param spec: Maximum value and bin width, e.g. {'max': 80, 'delta': 2}
+    :type spec: dict
+
+    :return: Bin edges
+    :rtype: ndarray
+    """
+    num_bins = max(int(round(spec["max"] / spec["delta"])), 1)
+    return np.linspace(0, num_bins * spec["delta"], num_bins + 1)
+
+
+def animal_values(animals, index=None):
+    """Weight, age and fitness of animals in one cell as rows of an array.
+
+    :param animals: Animal instances or a `Herd`
+    :type animals: list
+    :param index: Positions of the animals to read, all animals if None
+    :type index: ndarray
+
+    :return: Array with one row per animal and the columns in `PROPERTIES` order
+    :rtype: ndarray
+    """
+    if isinstance(animals, Herd):
+        columns = (animals.weight, animals.age, animals.fitness)
+        if index is not None:
+            columns = [column[index] for column in columns]
+        return np.column_stack(columns).astype(float)
+
+    if index is not None:
+        animals = [animals[position] for position in index]
+    return np.array(
+        [(animal.weight, animal.age, animal.fitness) for animal in animals], dtype=float
+    ).reshape(-1, len(PROPERTIES))
+
+
+class PopulationStatistics:
+    """Histograms of weight, age and fitness per species, with fixed bins.
+
+    :param hist_specs: Maximum value and bin width of each property, e.g.
+        {'weight': {'max': 80, 'delta': 2}, 'fitness': {'max': 1.0, 'delta': 0.05}}
+    :type hist_specs: dict
+    :param sample_size: Largest number of animals read per species, all animals if None
+    :type sample_size: int
+    :param seed: Seed of the sampling
+    :type seed: int
+
+    :Example:
+        .. code-block:: python
+
+            statistics = PopulationStatistics({'age': {'max': 80, 'delta': 2}})
+            counts = statistics.collect(island)
+            herb_age_counts, carn_age_counts = counts['age']
+
+    .. note::
+        - Each animal is read once per collection, and all properties are binned from the same
+            array with `np.histogram`, so drawing a histogram only costs its number of bins.
+        - Values outside [0, max) are not counted, as they fall outside the plotted range.
+        - With a `sample_size`, the animals read are drawn uniformly without replacement using
+            the population matrices of the island to locate them, so cells without sampled
+            animals are skipped. The counts are scaled up to the size of the population.
+    """
+
+    def __init__(self, hist_specs, sample_size=None, seed=None):
+        self.edges = {
+            prop: bin_edges(hist_specs[prop]) for prop in PROPERTIES if prop in hist_specs
+        }  # Bin edges of each property
+        self.sample_size = sample_size
+        self._rng = np.random.default_rng(seed)
+
+    def collect(self, island):
+        """Bin the animals on the island.
+
+        :param island: Island instance with the population
+        :type island: Island
+
+        :return: Counts per bin with one row per species (herbivores, carnivores) for each
+            property
+        :rtype: dict
+        """
+        geometry = island.geometry
+        cells = [island.landscape[loc] for loc in geometry.land_locs]  # In land id order
+
+        counts = {prop: np.zeros((2, edges.size - 1)) for prop, edges in self.edges.items()}
+        for species_index, (attribute, pop_matrix) in enumerate(
+            (("herbivores", island.herb_pop_matrix), ("carnivores", island.carn_pop_matrix))
+        ):
+            values, scale = self._values(cells, attribute, pop_matrix[geometry.land_mask])
+            for prop, edges in self.edges.items():
+                column = values[:, PROPERTIES.index(prop)]
+                counts[prop][species_index] = np.histogram(column, edges)[0] * scale
+        return counts
+
+    def _values(self, cells, attribute, num_per_cell):
+        """Values of all animals of a species, or of a uniform sample of them.
+
+        :param cells: Mainland cells in land id order
+        :type cells: list
+        :param attribute: Name of the animal list of the species, e.g. 'herbivores'
+        :type attribute: str
+        :param num_per_cell: Number of animals of the species in each cell
+        :type num_per_cell: ndarray
+
+        :return: Values of the animals read, and the number of animals each one stands for
+        :rtype: tuple
+        """
+        total = int(num_per_cell.sum())
+        if self.sample_size is None or total <= self.sample_size:
+            chunks = [
+                animal_values(getattr(cells[land_id], attribute))
+                for land_id in np.flatnonzero(num_per_cell)
+            ]
+            return np.concatenate(chunks or [np.zeros((0, len(PROPERTIES)))]), 1.0
+
+        picks = np.sort(self._rng.choice(total, self.sample_size, replace=False))
+        ends = np.cumsum(num_per_cell)
+        land_ids = np.searchsorted(ends, picks, side="right")  # Cell of each sampled animal
+        positions = picks - (ends - num_per_cell)[land_ids]  # Position within the cell
+
+        sampled_ids, first = np.unique(land_ids, return_index=True)
+        chunks = [
+            animal_values(getattr(cells[land_id], attribute), index)
+            for land_id, index in zip(sampled_ids, np.split(positions, first[1:]))
+        ]
+        return np.concatenate(chunks), total / self.sample_size
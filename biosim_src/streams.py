@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+"""
+Counter-based random streams for the simulation.
+"""
+
+__author__ = "Anders Mølmen Høst & Petter Kolstad Hetland"
+__email__ = "anders.molmen.host@nmbu.no, petter.storesund.hetland@nmbu.no"
+
+import numpy as np
+
+FEEDING, PROCREATION, MIGRATION, DEATH = range(4)  # Phase numbers used in stream keys
+
+
+def cell_key(loc):
+    """Pack the coordinates of a cell into one integer used in stream keys.
+
+    :param loc: Coordinates of the cell
+    :type loc: tuple
+
+    :return: Key of the cell
+    :rtype: int
+    """
+    return (loc[0] << 32) | loc[1]
+
+
+def cell_generator(seed, year, loc, phase):
+    """NumPy generator for one phase of one cell in one year.
+
+    :param seed: Seed of the simulation
+    :type seed: int
+    :param year: Simulation year
+    :type year: int
+    :param loc: Coordinates of the cell
+    :type loc: tuple
+    :param phase: Phase of the yearly cycle, e.g. `FEEDING`
+    :type phase: int
+
+    :return: Generator based on a Philox bit generator
+    :rtype: numpy.random.Generator
+
+    .. note::
+        - The seed is the Philox key and (year, cell, phase) sets the high words of the
+            counter, so every stream is independent of all others and of the order in which
+            they are used.
+        - Like `random.seed`, any int is accepted as seed. Negative and very large seeds are
+            taken modulo 2**128, the range of Philox keys.
+    """
+    return np.random.Generator(
+        np.random.Philox(key=seed % 2 ** 128, counter=[0, phase, cell_key(loc), year])
+    )
+
+
+class CellStream:
+    """Drop-in replacement for the `random` module drawing from one counter-based stream.
+
+    :param seed: Seed of the simulation
+    :type seed: int
+    :param year: Simulation year
+    :type year: int
+    :param loc: Coordinates of the cell
+    :type loc: tuple
+    :param phase: Phase of the yearly cycle, e.g. `FEEDING`
+    :type phase: int
+
+    .. note::
+        - The generator is only created on the first draw, so empty cells cost nothing as
+            long as nothing is drawn for them.
+        - Uniform numbers are drawn in growing blocks, since the animal methods draw one
+            number at a time.
+
+    .. seealso::
+        - cell_generator
+    """
+
+    __slots__ = ("_key", "_generator", "_buffer", "_index")
+
+    def __init__(self, seed, year, loc, phase):
+        self._key = (seed, year, loc, phase)
+        self._generator = None
+        self._buffer = []
+        self._index = 0
+
+    @property
+    def generator(self):
+        """NumPy generator of the stream."""
+        if self._generator is None:
+            self._generator = cell_generator(*self._key)
+        return self._generator
+
+    def random(self):
+        """Uniform number in [0, 1), like `random.random`."""
+        if self._index == len(self._buffer):
+            self._buffer = self.generator.random(min(2 * len(self._buffer) or 16, 4096)).tolist()
+            self._index = 0
+        self._index += 1
+        return self._buffer[self._index - 1]
+
+    def gauss(self, mu, sigma):
+        """Normal distributed number, like `random.gauss`."""
+        return float(self.generator.normal(mu, sigma))
+
+    def choice(self, seq):
+        """Random element of a non-empty sequence, like `random.choice`."""
+        return seq[int(self.random() * len(seq))]
+
+    def shuffle(self, seq):
+        """Shuffle a list in place, like `random.shuffle`."""
+        if len(seq) < 2:  # Nothing to shuffle, no generator needed
+            return
+        seq[:] = [seq[index] for index in self.generator.permutation(len(seq))]
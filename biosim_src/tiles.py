@@ -0,0 +1,314 @@
+# -*- coding: utf-8 -*-
+
+"""
+Domain decomposition of the island into tiles simulated by separate worker processes.
+"""
+
+__author__ = "Anders Mølmen Høst & Petter Kolstad Hetland"
+__email__ = "anders.molmen.host@nmbu.no, petter.storesund.hetland@nmbu.no"
+
+import weakref
+import numpy as np
+from multiprocessing import get_context
+from biosim_src.animal import Herbivore, Carnivore
+from biosim_src.landscape import Lowland, Highland
+from biosim_src.streams import FEEDING, PROCREATION, DEATH
+
+
+def partition_rows(locs, num_tiles):
+    """Split land cells into bands of whole rows with about the same number of cells.
+
+    :param locs: Coordinates of the land cells
+    :type locs: iterable
+    :param num_tiles: Number of tiles
+    :type num_tiles: int
+
+    :return: Coordinates of the cells in each tile, tiles without cells are left out
+    :rtype: list
+
+    .. note::
+        Bands of whole rows keep the border between two tiles as short as the map is wide, so
+        few migrants need to be exchanged.
+    """
+    locs = sorted(locs)
+    tiles = [[] for _ in range(num_tiles)]
+    for index, loc in enumerate(locs):
+        tiles[index * num_tiles // len(locs)].append(loc)
+
+    for tile, next_tile in zip(tiles[:-1], tiles[1:]):  # Move split rows to the next tile
+        while tile and next_tile and tile[-1][0] == next_tile[0][0]:
+            next_tile.insert(0, tile.pop())
+    return [tile for tile in tiles if tile]
+
+
+def _parameters():
+    """Current animal and landscape parameters, sent to the workers with every year."""
+    return {
+        "Herbivore": dict(Herbivore.p),
+        "Carnivore": dict(Carnivore.p),
+        "Lowland": dict(Lowland.params),
+        "Highland": dict(Highland.params),
+    }
+
+
+def _set_parameters(params):
+    """Apply parameters from `_parameters` in a worker process."""
+    for cls in (Herbivore, Carnivore, Lowland, Highland):
+        cls.set_params(params[cls.__name__])
+
+
+def _shutdown(connections, processes):
+    """Stop the worker processes of a `TilePool`."""
+    for connection in connections:
+        try:
+            connection.send(("close", None))
+        except (BrokenPipeError, OSError):
+            pass
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+
+
+class TilePool:
+    """Worker processes that each own a tile of land cells and simulate it.
+
+    :param map_str: Multi-line string specifying island geography
+    :type map_str: str
+    :param seed: Seed of the random streams
+    :type seed: int
+    :param num_tiles: Number of tiles and worker processes
+    :type num_tiles: int
+    :param land_locs: Coordinates of the land cells
+    :type land_locs: iterable
+
+    .. note::
+        - Each worker builds its own `Island` from `map_str` and runs feeding, procreation,
+            aging, weight loss and death for its own cells, and migration away from them.
+        - Only migrants that cross a tile border are sent back to this process, which passes
+            them on to the worker owning their new cell (the halo exchange).
+        - Every cell and phase draws from its own random stream, so the result is the same
+            for any number of workers.
+        - The population stays in the workers between calls of `TilePool.run_years`, which
+            only sends back the number of animals in each cell. The cells of the island are
+            empty until `TilePool.gather` brings the animals back.
+        - If a worker fails, the replies of all workers are still received, then the pool is
+            marked as broken and closed before the error is raised. The animals held by the
+            workers are lost.
+
+    .. seealso::
+        - `BioSim.run_years`
+        - `BioSim.emigrate`
+        - `BioSim.immigrate`
+    """
+
+    def __init__(self, map_str, seed, num_tiles, land_locs):
+        self._tiles = partition_rows(land_locs, num_tiles)
+        self._owner = {loc: tile for tile, locs in enumerate(self._tiles) for loc in locs}
+        self.resident = False  # Whether the workers hold the population
+        self.broken = False  # Whether a worker has failed and the pool was closed
+        self._connections = []
+        self._processes = []
+
+        context = get_context("spawn")
+        for locs in self._tiles:
+            connection, child_connection = context.Pipe()
+            process = context.Process(
+                target=_tile_worker, args=(child_connection, map_str, seed, locs), daemon=True
+            )
+            process.start()
+            child_connection.close()
+            self._connections.append(connection)
+            self._processes.append(process)
+
+        self._finalizer = weakref.finalize(self, _shutdown, self._connections, self._processes)
+
+    @property
+    def num_tiles(self):
+        """Number of tiles with land cells."""
+        return len(self._tiles)
+
+    def run_years(self, island, first_year, num_years):
+        """Simulate several years, scattering the population to the workers if needed.
+
+        :param island: Island instance with the population
+        :type island: Island
+        :param first_year: Number of years simulated so far
+        :type first_year: int
+        :param num_years: Number of years to simulate
+        :type num_years: int
+
+        :return: Herbivore and carnivore count after each year
+        :rtype: ndarray
+
+        .. note::
+            The population matrices and totals of the island are updated from the counts of
+            each cell, the animals stay in the workers.
+        """
+        self._check()
+        if not self.resident:
+            self._scatter(island)
+
+        params = _parameters()
+        counts = np.zeros((num_years, 2), dtype=int)
+        for year in range(first_year, first_year + num_years):
+            for connection in self._connections:
+                connection.send(("step", (year, params)))
+
+            halo = [{} for _ in self._tiles]  # Migrants arriving in each tile
+            for migrants in self._receive_all():
+                for loc, sources in migrants.items():
+                    halo[self._owner[loc]].setdefault(loc, {}).update(sources)
+
+            for connection, arrivals in zip(self._connections, halo):
+                connection.send(("arrive", arrivals))
+            for tile_counts in self._receive_all():
+                counts[year - first_year] += tile_counts
+
+        for connection in self._connections:
+            connection.send(("count", None))
+        for locs, cell_counts in zip(self._tiles, self._receive_all()):
+            island.set_cell_counts(locs, *cell_counts)
+        return counts
+
+    def gather(self, island):
+        """Bring the animals held by the workers back to the cells of the island.
+
+        :param island: Island instance the population was scattered from
+        :type island: Island
+        """
+        if not self.resident:
+            return
+        self._check()
+        land_cells = island.land_cells
+        for connection in self._connections:
+            connection.send(("dump", None))
+        for animals in self._receive_all():
+            for loc, (herbs, carns) in animals.items():
+                land_cells[loc].herbivores = herbs
+                land_cells[loc].carnivores = carns
+        self.resident = False
+        island.update_pop_matrix()  # Recount cells and totals after gathering
+
+    def _scatter(self, island):
+        """Send the animals of the island to the workers owning their cells."""
+        land_cells = island.land_cells
+        for connection, locs in zip(self._connections, self._tiles):
+            connection.send(("load", {
+                loc: (land_cells[loc].herbivores, land_cells[loc].carnivores) for loc in locs
+            }))
+            for loc in locs:  # The workers hold the population until it is gathered
+                land_cells[loc].herbivores = []
+                land_cells[loc].carnivores = []
+        self._receive_all()
+        self.resident = True
+
+    def _receive_all(self):
+        """Receive a reply from every worker, in tile order.
+
+        :return: Replies of the workers
+        :rtype: list
+
+        :raises RuntimeError: If a worker process has stopped
+
+        .. note::
+            The replies of all workers are received before an error is raised, so no stale
+            reply is left in a pipe. The pool is then closed and can not be used again.
+        """
+        replies = []
+        error = None
+        for connection in self._connections:
+            try:
+                reply = connection.recv()
+            except (EOFError, OSError):
+                reply = RuntimeError("A tile worker process stopped unexpectedly!")
+            if isinstance(reply, Exception) and error is None:
+                error = reply
+            replies.append(reply)
+
+        if error is not None:
+            self.broken = True
+            self.close()
+            raise error
+        return replies
+
+    def _check(self):
+        """Raise an error if the pool was closed after a worker failed."""
+        if self.broken:
+            raise RuntimeError("The tile workers were stopped after an error!")
+
+    def close(self):
+        """Stop the worker processes."""
+        self._finalizer()
+
+
+def _tile_worker(connection, map_str, seed, locs):
+    """Worker process of `TilePool`, simulating the cells at `locs`.
+
+    Commands are received as (command, data) tuples:
+        - 'load': Take over the animals of the tile
+        - 'step': Run a year until migration, reply with migrants leaving the tile
+        - 'arrive': Deliver all migrants, run aging and death, reply with the species counts
+        - 'count': Reply with the herbivore and carnivore count of each cell, in `locs` order
+        - 'dump': Reply with the animals of the tile
+        - 'close': Stop the worker
+    """
+    from biosim_src.biosim import BioSim  # Imported here, since biosim imports this module
+
+    sim = BioSim(map_str, seed=seed, plot_graph=False)
+    cells = {loc: sim._island.landscape[loc] for loc in locs}
+    arrivals = {}
+
+    while True:
+        command, data = connection.recv()
+        try:
+            if command == "load":
+                for loc, (herbs, carns) in data.items():
+                    cells[loc].herbivores = herbs
+                    cells[loc].carnivores = carns
+                reply = None
+
+            elif command == "step":
+                year, params = data
+                _set_parameters(params)
+                sim._year = year
+                for loc, cell in cells.items():
+                    sim.feeding(cell, sim._stream(loc, FEEDING))
+                for loc, cell in cells.items():
+                    sim.procreation(cell, sim._stream(loc, PROCREATION))
+
+                arrivals = sim.emigrate(cells)
+                reply = {
+                    loc: arrivals.pop(loc) for loc in list(arrivals) if loc not in cells
+                }  # Migrants leaving the tile
+
+            elif command == "arrive":
+                for loc, sources in data.items():
+                    arrivals.setdefault(loc, {}).update(sources)
+                sim.immigrate(arrivals)
+                arrivals = {}
+                for loc, cell in cells.items():
+                    sim.aging_and_death(cell, sim._stream(loc, DEATH))
+                reply = (
+                    sum(cell.herb_count for cell in cells.values()),
+                    sum(cell.carn_count for cell in cells.values()),
+                )
+
+            elif command == "count":
+                reply = (
+                    np.array([cells[loc].herb_count for loc in locs]),
+                    np.array([cells[loc].carn_count for loc in locs]),
+                )
+
+            elif command == "dump":
+                reply = {loc: (cell.herbivores, cell.carnivores) for loc, cell in cells.items()}
+                for cell in cells.values():
+                    cell.herbivores = []
+                    cell.carnivores = []
+
+            else:
+                break
+
+        except Exception as err:  # Sent to the main process, which raises it
+            reply = err
+        connection.send(reply)
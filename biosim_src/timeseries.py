@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+"""
+Growable yearly time series with a running maximum and min/max decimation for line plots.
+"""
+
+__author__ = "Anders Mølmen Høst & Petter Kolstad Hetland"
+__email__ = "anders.molmen.host@nmbu.no, petter.storesund.hetland@nmbu.no"
+
+import numpy as np
+
+
+class TimeSeries:
+    """Values of a few series for each year, e.g. the herbivore and carnivore counts.
+
+    :param num_series: Number of values per year
+    :type num_series: int
+    :param capacity: Number of years allocated at first
+    :type capacity: int
+    :param max_points: Largest number of points per series returned by `line_data`
+    :type max_points: int
+
+    .. note::
+        - Values are kept in one float array, which doubles in size when a year beyond it is
+            added. Years without values are NaN.
+        - The maximum of all values is updated as values are added.
+        - For more than `max_points` years, `line_data` returns the minimum and maximum of
+            each bucket of years instead of every year. The buckets are updated as values
+            are added and double in width when there are too many, so drawing a line costs
+            the same for a million years as for a thousand.
+
+    .. seealso::
+        - Plotting
+    """
+
+    def __init__(self, num_series=2, capacity=1024, max_points=2000):
+        self.max_points = max_points
+        self.max = 0  # Largest value added
+        self.start = None  # First year with values
+        self.end = None  # Last year with values
+        self._values = np.full((max(capacity, 1), num_series), np.nan)
+        self._bucket_width = 1  # Years per bucket of the decimated line, a power of two
+        self._bucket_min = np.zeros((0, num_series), dtype=int)  # Year of the minimum
+        self._bucket_max = np.zeros((0, num_series), dtype=int)  # Year of the maximum
+
+    def __len__(self):
+        return 0 if self.end is None else self.end + 1
+
+    def __getitem__(self, year):
+        return self._values[:len(self)][year]
+
+    def add(self, first_year, values):
+        """Add or replace the values of consecutive years.
+
+        :param first_year: Year of the first row of `values`
+        :type first_year: int
+        :param values: Values of each series for each year, shape (years, num_series)
+        :type values: array_like
+        """
+        values = np.asarray(values, dtype=float).reshape(-1, self._values.shape[1])
+        if values.shape[0] == 0:
+            return
+        last_year = first_year + values.shape[0] - 1
+        if last_year >= self._values.shape[0]:
+            self._grow(last_year + 1)
+        self._values[first_year:last_year + 1] = values
+
+        if not np.isnan(values).all():
+            self.max = max(self.max, np.nanmax(values))
+        self.start = first_year if self.start is None else min(self.start, first_year)
+        self.end = last_year if self.end is None else max(self.end, last_year)
+        self._update_buckets(first_year, last_year)
+
+    def line_data(self):
+        """Points of the line of each series.
+
+        :return: Years and values of each series, every year for up to `max_points` years and
+            the minimum and maximum of each bucket of years otherwise
+        :rtype: list
+        """
+        if self.end is None:
+            return [(np.zeros(0), np.zeros(0)) for _ in range(self._values.shape[1])]
+        if self._bucket_width == 1:
+            years = np.arange(self.start, self.end + 1)
+            return [(years, self._values[years, series])
+                    for series in range(self._values.shape[1])]
+
+        lines = []
+        first_bucket = self.start // self._bucket_width
+        for series in range(self._values.shape[1]):
+            extremes = np.stack((self._bucket_min[first_bucket:, series],
+                                 self._bucket_max[first_bucket:, series]), axis=1)
+            years = np.sort(extremes, axis=1).ravel()  # Minimum and maximum in year order
+            lines.append((years, self._values[years, series]))
+        return lines
+
+    def _grow(self, min_capacity):
+        """Double the capacity until `min_capacity` years fit."""
+        capacity = self._values.shape[0]
+        while capacity < min_capacity:
+            capacity *= 2
+        values = np.full((capacity, self._values.shape[1]), np.nan)
+        values[:self._values.shape[0]] = self._values
+        self._values = values
+
+    def _update_buckets(self, first_year, last_year):
+        """Update the extremes of the buckets holding the given years."""
+        while self._num_points() > self.max_points:
+            self._merge_buckets()
+        if self._bucket_width > 1:
+            self._compute_buckets(first_year // self._bucket_width,
+                                  last_year // self._bucket_width + 1)
+
+    def _num_points(self):
+        """Number of points per series of the line, two for each bucket of several years."""
+        if self._bucket_width == 1:
+            return self.end + 1
+        return 2 * (self.end // self._bucket_width + 1)
+
+    def _compute_buckets(self, first, stop):
+        """Find the years of the extremes of buckets `first` to `stop` from the values."""
+        width, num_series = self._bucket_width, self._values.shape[1]
+        if stop > self._bucket_min.shape[0]:
+            filler = np.zeros((stop - self._bucket_min.shape[0], num_series), dtype=int)
+            self._bucket_min = np.concatenate((self._bucket_min, filler))
+            self._bucket_max = np.concatenate((self._bucket_max, filler))
+
+        values = self._values[first * width:stop * width]
+        if values.shape[0] < (stop - first) * width:
+            padding = np.full(((stop - first) * width - values.shape[0], num_series), np.nan)
+            values = np.concatenate((values, padding))
+        values = values.reshape(stop - first, width, num_series)
+        missing = np.isnan(values)  # Years without values are never extremes
+        starts = width * np.arange(first, stop)[:, np.newaxis]
+        self._bucket_min[first:stop] = starts + np.where(missing, np.inf, values).argmin(axis=1)
+        self._bucket_max[first:stop] = starts + np.where(missing, -np.inf, values).argmax(axis=1)
+
+    def _merge_buckets(self):
+        """Double the width of the buckets, merging pairs of neighbouring buckets."""
+        self._bucket_width *= 2
+        if self._bucket_width == 2:
+            self._compute_buckets(0, self.end // 2 + 1)
+            return
+
+        if self._bucket_min.shape[0] % 2:  # The last bucket is merged with itself
+            self._bucket_min = np.concatenate((self._bucket_min, self._bucket_min[-1:]))
+            self._bucket_max = np.concatenate((self._bucket_max, self._bucket_max[-1:]))
+        self._bucket_min = self._merge(self._bucket_min, np.fmin)
+        self._bucket_max = self._merge(self._bucket_max, np.fmax)
+
+    def _merge(self, extreme_years, pick):
+        """Years of the extremes of pairs of buckets.
+
+        :param extreme_years: Year of the extreme value of each bucket and series
+        :type extreme_years: ndarray
+        :param pick: np.fmin or np.fmax, choosing the extreme value of each pair
+        :type pick: ufunc
+        """
+        first, second = extreme_years[0::2], extreme_years[1::2]
+        columns = np.arange(extreme_years.shape[1])
+        first_values = self._values[first, columns]
+        second_values = self._values[second, columns]
+        choose_first = (pick(first_values, second_values) == first_values)
+        choose_first |= np.isnan(second_values)
+        return np.where(choose_first, first, second)
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+
+"""
+Output of visualization frames, either encoded directly by ffmpeg or spooled to image files.
+"""
+
+__author__ = "Anders Mølmen Høst & Petter Kolstad Hetland"
+__email__ = "anders.molmen.host@nmbu.no, petter.storesund.hetland@nmbu.no"
+
+import os
+import subprocess
+import tempfile
+import warnings
+import weakref
+
+
+def _stop_encoder(process):
+    """Close the input of an ffmpeg process and wait for it to finish the file."""
+    if process.stdin is not None and not process.stdin.closed:
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+    return process.wait()
+
+
+class MovieStream:
+    """Movie file encoded while the simulation runs, from raw RGBA frames piped into ffmpeg.
+
+    :param path: Path of the movie file
+    :type path: str
+    :param width: Width of the frames in pixels
+    :type width: int
+    :param height: Height of the frames in pixels
+    :type height: int
+    :param ffmpeg: Name or path of the ffmpeg binary
+    :type ffmpeg: str
+    :param fps: Frames per second of the movie
+    :type fps: int
+
+    :raises FileNotFoundError: If the ffmpeg binary is not found
+
+    .. note::
+        - Frames are never written to disk, ffmpeg reads them from its standard input.
+        - The movie is finished by `MovieStream.close`, or when the stream is garbage
+            collected.
+
+    .. seealso::
+        - FrameSpool
+    """
+
+    def __init__(self, path, width, height, ffmpeg="ffmpeg", fps=25):
+        self.path = path
+        self.frame_shape = (height, width, 4)
+        self.num_frames = 0
+        self._log = tempfile.TemporaryFile()  # Error messages of ffmpeg
+        try:
+            self._process = self._start(ffmpeg, path, width, height, fps)
+        except OSError:  # E.g. FileNotFoundError, the caller may fall back to image files
+            self._log.close()
+            raise
+        self._finalizer = weakref.finalize(self, _stop_encoder, self._process)
+
+    def _start(self, ffmpeg, path, width, height, fps):
+        """Start ffmpeg reading raw frames from its standard input."""
+        return subprocess.Popen(
+            [
+                ffmpeg,
+                "-loglevel", "error",
+                "-f", "rawvideo",
+                "-pix_fmt", "rgba",
+                "-s", "{}x{}".format(width, height),
+                "-framerate", str(fps),
+                "-i", "-",
+                "-y",
+                # Parameters chosen according to http://trac.ffmpeg.org/wiki/Encode/H.264,
+                # section "Compatibility"
+                "-profile:v", "baseline",
+                "-level", "3.0",
+                "-pix_fmt", "yuv420p",
+                path,
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=self._log,
+        )
+
+    def write(self, frame):
+        """Send one frame to the encoder.
+
+        :param frame: RGBA pixels with shape (height, width, 4)
+        :type frame: ndarray
+        """
+        if frame.shape != self.frame_shape:
+            raise ValueError(
+                "Frames need to have shape {}, got {}.".format(self.frame_shape, frame.shape)
+            )
+        try:
+            self._process.stdin.write(memoryview(frame).cast("B"))
+        except BrokenPipeError:
+            self.close()  # Raises the error reported by ffmpeg
+            raise  # ffmpeg stopped without an error, the frame was still not encoded
+        self.num_frames += 1
+
+    def close(self):
+        """Finish the movie file.
+
+        :raises RuntimeError: If ffmpeg failed
+        """
+        if not self._finalizer.alive:
+            return
+        return_code = self._finalizer()
+        self._log.seek(0)
+        message = self._log.read().decode(errors="replace").strip()
+        self._log.close()
+        if return_code != 0:
+            raise RuntimeError("ERROR: ffmpeg failed with: {}".format(message or return_code))
+
+
+class FrameSpool:
+    """Frames saved as numbered image files, using a bounded amount of disk space.
+
+    :param img_base: Beginning of the file names, including path
+    :type img_base: str
+    :param img_fmt: File type of the images, e.g. 'png'
+    :type img_fmt: str
+    :param max_bytes: Disk space the images may use, unbounded if None
+    :type max_bytes: int
+
+    .. note::
+        - Files are named '{}_{:05d}.{}'.format(img_base, img_no, img_fmt), numbered from 0.
+        - When the images use more than `max_bytes`, every second image is deleted, the
+            remaining ones are renumbered, and from then on only every second frame is saved.
+            The movie still covers the whole simulation, with fewer frames per year.
+        - `FrameSpool.cleanup` deletes all images written by the spool.
+    """
+
+    def __init__(self, img_base, img_fmt="png", max_bytes=None):
+        self.img_base = img_base
+        self.img_fmt = img_fmt
+        self.max_bytes = max_bytes
+        self.frame_step = 1  # Frames offered per frame saved
+        self._num_offered = 0
+        self._sizes = []  # Size in bytes of each saved image
+
+    def path(self, img_no):
+        """File name of an image.
+
+        :param img_no: Number of the image
+        :type img_no: int
+        """
+        return "{}_{:05d}.{}".format(self.img_base, img_no, self.img_fmt)
+
+    @property
+    def num_frames(self):
+        """Number of images on disk."""
+        return len(self._sizes)
+
+    def write(self, figure):
+        """Save the figure as the next image, unless the frame is skipped to save space.
+
+        :param figure: Figure to save
+        :type figure: matplotlib.figure.Figure
+        """
+        self._num_offered += 1
+        if (self._num_offered - 1) % self.frame_step != 0:
+            return
+
+        path = self.path(self.num_frames)
+        figure.savefig(path)
+        self._sizes.append(os.path.getsize(path))
+
+        while self.max_bytes is not None and sum(self._sizes) > self.max_bytes:
+            if self.num_frames < 2:
+                break
+            self._thin()
+
+    def _thin(self):
+        """Delete every second image, renumber the rest and save half as many frames."""
+        kept = []
+        for img_no, size in enumerate(self._sizes):
+            if img_no % 2:
+                os.remove(self.path(img_no))
+            else:
+                os.replace(self.path(img_no), self.path(len(kept)))
+                kept.append(size)
+        self._sizes = kept
+        self.frame_step *= 2  # Kept images are the frames offered at multiples of the new step
+
+    def cleanup(self):
+        """Delete the images."""
+        for img_no in range(self.num_frames):
+            if os.path.exists(self.path(img_no)):
+                os.remove(self.path(img_no))
+        self._sizes = []
+
+
+def open_frames(plot, img_base, img_fmt, max_bytes=None, ffmpeg="ffmpeg"):
+    """Start the movie encoder for img_fmt 'mp4', or figure files for other formats.
+
+    :param plot: Plot whose frames are saved
+    :type plot: Plotting
+    :param img_base: Beginning of the file names, including path
+    :type img_base: str
+    :param img_fmt: File type of the images, or 'mp4' to encode a movie directly
+    :type img_fmt: str
+    :param max_bytes: Disk space the figure files may use, unbounded if None
+    :type max_bytes: int
+    :param ffmpeg: Name or path of the ffmpeg binary
+    :type ffmpeg: str
+
+    :return: Destination of the frames
+    :rtype: MovieStream or FrameSpool
+
+    .. note::
+        If ffmpeg cannot be started, a warning is issued and the frames are saved as png files.
+    """
+    if img_fmt != "mp4":
+        return FrameSpool(img_base, img_fmt, max_bytes)
+
+    height, width, _ = plot.frame().shape
+    try:
+        return MovieStream("{}.{}".format(img_base, img_fmt), width, height, ffmpeg=ffmpeg)
+    except FileNotFoundError:
+        warnings.warn("{} was not found, frames are saved as png files.".format(ffmpeg))
+        return FrameSpool(img_base, "png", max_bytes)
+
+
+def save_frame(frames, plot):
+    """Save the current figure of a plot as the next frame.
+
+    :param frames: Destination of the frames
+    :type frames: MovieStream or FrameSpool
+    :param plot: Plot whose figure is saved
+    :type plot: Plotting
+    """
+    if isinstance(frames, MovieStream):
+        frames.write(plot.frame())
+    else:
+        frames.write(plot.figure)
@@ -3,18 +3,27 @@
 
 import matplotlib.pyplot as plt
 import numpy as np
+from biosim_src.statistics import DEFAULT_HIST_SPECS, PopulationStatistics
+from biosim_src.timeseries import TimeSeries
 
 
 class Plotting:
     """Plotting class to be used in biosim.py.
+
+    .. note::
+        The figure is built once by `init_plot`. `update_plot` only changes the data of the
+        lines, histogram patches and heatmap images, which are animated artists blitted onto a
+        cached background of the static parts of the figure. The whole figure is only redrawn
+        when an axis limit changes.
+
+        The animal counts are kept in a `TimeSeries`, so the largest count is known without
+        reading the history, and the lines hold at most a few thousand points however many
+        years are simulated.
     """
-    def __init__(self, island, cmax=None, ymax=None, hist_specs=None):
+    def __init__(self, island, cmax=None, ymax=None, hist_specs=None, hist_sample_size=None):
         self._island = island
-        self._img_base = None
-        self._img_ctr = 0
 
-        self.y_herb = None
-        self.y_carn = None
+        self.counts = None  # TimeSeries of the herbivore and carnivore counts
         self._herb_line = None
         self._carn_line = None
         self._herb_fitness_list = None
@@ -26,15 +35,18 @@ class Plotting:
         self._ax_weight = None
         self._ax_fitness = None
         self._ax_age = None
-        self._weight_hist = None
-        self._fitness_hist = None
-        self._age_hist = None
+        self._hist_axes = {}  # Property: histogram axes
+        self._hist_patches = {}  # Property: step patches of herbivores and carnivores
+        self._hist_ymax = {}  # Property: y-limit of the histogram axes
         self._axhm_herb = None
         self._imax_herb = None
         self._axhm_carn = None
         self._imax_carn = None
         self._axim = None
         self._axlg = None
+        self._fig = None
+        self._background = None  # Static parts of the figure, restored before blitting
+        self._full_draw = True  # Redraw the whole figure, e.g. after an axis limit changed
 
         self._ymax = ymax
 
@@ -45,14 +57,10 @@ class Plotting:
         self._cmax_herb = self._cmax["Herbivore"]
         self._cmax_carn = self._cmax["Carnivore"]
 
-        if hist_specs is None:
-            self._hist_specs = {
-                "weight": {"max": 80, "delta": 2},
-                "fitness": {"max": 1.0, "delta": 0.05},
-                "age": {"max": 80, "delta": 2},
-            }
-        else:
-            self._hist_specs = hist_specs
+        self._hist_specs = dict(DEFAULT_HIST_SPECS)
+        if hist_specs is not None:
+            self._hist_specs.update(hist_specs)  # Properties not given keep the default bins
+        self._statistics = PopulationStatistics(self._hist_specs, sample_size=hist_sample_size)
 
     def init_plot(self, num_years):
         """Initialize the plot at the beginning of the simulation.
@@ -60,11 +68,11 @@ class Plotting:
         :param num_years: Number of years to run sim for x-axis
         :type num_years: int
         """
-        self.y_herb = [np.nan for _ in range(num_years + 1)]
-        self.y_carn = [np.nan for _ in range(num_years + 1)]
+        self.counts = TimeSeries(2, capacity=num_years + 1)
 
         fig = plt.figure(figsize=(10, 7), constrained_layout=True)  # Initiate pyplot
         gs = fig.add_gridspec(4, 6)
+        self._fig = fig
 
         self._ax_main = fig.add_subplot(gs[:2, :])  # Add the main subplot
         self._ax_weight = fig.add_subplot(gs[2, :2])  # Add weight subplot
@@ -78,8 +86,9 @@ class Plotting:
         self._plot_map(self._island.map_str)
         self._plot_heatmap()
 
-        (self._herb_line,) = self._ax_main.plot(self.y_herb)  # Initiate the herbivore line
-        (self._carn_line,) = self._ax_main.plot(self.y_carn)  # Initiate the carnivore line
+        (self._herb_line,) = self._ax_main.plot([], [], animated=True)  # Herbivore line
+        (self._carn_line,) = self._ax_main.plot([], [], animated=True)  # Carnivore line
+        self._plot_histograms()
 
         self._ax_main.legend(["Herbivore count", "Carnivore count"])  # Insert legend into plot
         self._ax_main.set_xlabel("Simulation year")  # Define x-label
@@ -90,63 +99,145 @@ class Plotting:
 
         if self._ymax is not None:
             self._ax_main.set_ylim([0, self._ymax])
+        else:
+            self._ax_main.set_ylim([0, 20])
 
         plt.ion()  # Activate interactive mode
+        fig.canvas.mpl_connect("draw_event", self._on_draw)  # Cache background after draws
+        if fig.canvas.required_interactive_framework is not None:
+            plt.show(block=False)  # Open the window of interactive backends
 
     def set_x_axis(self, years_target):
         self._ax_main.set_xlim([0, years_target])  # Update x_limit when several simulations are run
+        self._full_draw = True
 
     def update_plot(self):
         """Redraw plot with updated values.
-        """
-        if self._ymax is None:
-            if max(self.y_herb) >= max(
-                self.y_carn
-            ):  # Find the biggest count value in either y_herb or y_carn
-                self._ax_main.set_ylim([0, max(self.y_herb) + 20])  # Set y-lim
-            else:
-                self._ax_main.set_ylim([0, max(self.y_carn) + 20])  # Set y-lim
 
+        .. note::
+            Only the animated artists of the axes with new data are drawn and blitted, unless an
+            axis limit changed. Each frame therefore costs a few milliseconds, independent of
+            the number of years simulated.
+        """
+        hist_counts = None
         if self._island.num_carns > 0 or self._island.num_herbs > 0:
-            weight_data = self._island.animal_weights
-            weight_max = int(max(max(weight_data)))
-            weight_min = int(min(min(weight_data)))
-            weight_delta = self._hist_specs["weight"]["delta"]
-            self._ax_weight.clear()
-            self._weight_hist = self._ax_weight.hist(
-                weight_data, range(weight_min, weight_max + int(weight_delta), weight_delta),
+            hist_counts = self._statistics.collect(self._island)  # One pass over the animals
+        self._draw(self._island.herb_pop_matrix, self._island.carn_pop_matrix, hist_counts)
+
+    def show_snapshot(self, snapshot):
+        """Redraw plot with the values of a snapshot instead of the island.
+
+        :param snapshot: Counts, population matrices and histogram counts
+        :type snapshot: Snapshot
+
+        .. note::
+            The figure is created by the first snapshot. Snapshots without a frame only update
+            the animal counts, which are drawn with the next frame.
+
+        .. seealso::
+            - take_snapshot
+        """
+        if self.counts is None:
+            self.init_plot(snapshot.year_target)
+        elif self._ax_main.get_xlim()[1] < snapshot.year_target:
+            self.set_x_axis(snapshot.year_target)
+
+        self.counts.add(snapshot.first_year, snapshot.counts)
+
+        if snapshot.has_frame:
+            self._draw(
+                snapshot.herb_pop_matrix,
+                snapshot.carn_pop_matrix,
+                snapshot.hist_counts,
             )
-            self._ax_weight.set_xlim([0, self._hist_specs["weight"]["max"]])
 
-            fitness_data = self._island.animal_fitness
-            fitness_delta = self._hist_specs["fitness"]["delta"]
+    def _draw(self, herb_pop_matrix, carn_pop_matrix, hist_counts):
+        """Update the data of the animated artists and redraw.
 
-            self._ax_fitness.clear()
-            self._ax_fitness.hist(fitness_data, bins=np.arange(0, 1 + fitness_delta, fitness_delta))
+        :param herb_pop_matrix: Number of herbivores in each cell
+        :type herb_pop_matrix: ndarray
+        :param carn_pop_matrix: Number of carnivores in each cell
+        :type carn_pop_matrix: ndarray
+        :param hist_counts: Histogram counts of each property, None to keep the histograms
+        :type hist_counts: dict
+        """
+        changed_axes = [self._ax_main, self._axhm_herb, self._axhm_carn]
 
-            self._ax_fitness.set_xlim([0, self._hist_specs["fitness"]["max"]])
+        if self._ymax is None and self.counts.max + 20 > self._ax_main.get_ylim()[1]:
+            self._ax_main.set_ylim([0, 2 * self.counts.max + 20])  # Room to grow
+            self._full_draw = True
 
-            age_data = self._island.animal_ages
-            age_max = int(max(max(age_data)))
-            age_min = int(min(min(age_data)))
-            age_delta = self._hist_specs["age"]["delta"]
-            self._ax_age.clear()
-            self._ax_age.hist(age_data, bins=range(age_min, age_max + int(age_delta), age_delta))
-            self._ax_age.set_xlim([0, self._hist_specs["age"]["max"]])
+        herb_line, carn_line = self.counts.line_data()
+        self._herb_line.set_data(*herb_line)
+        self._carn_line.set_data(*carn_line)
 
-            self._herb_line.set_ydata(self.y_herb)
-            self._herb_line.set_xdata(range(len(self.y_herb)))
-            self._carn_line.set_ydata(self.y_carn)
-            self._carn_line.set_xdata(range(len(self.y_carn)))
+        if hist_counts is not None:
+            for prop, ax in self._hist_axes.items():
+                for patch, species_counts in zip(self._hist_patches[prop], hist_counts[prop]):
+                    patch.set_data(species_counts)
+                if hist_counts[prop].max() > self._hist_ymax[prop]:
+                    self._hist_ymax[prop] = 2 * hist_counts[prop].max()  # Room to grow
+                    ax.set_ylim([0, self._hist_ymax[prop]])
+                    self._full_draw = True
+                changed_axes.append(ax)
 
-            self._ax_weight.set_title("Weight distribution")
-            self._ax_fitness.set_title("Fitness distribution")
-            self._ax_age.set_title("Age distribution")
+        self._imax_herb.set_data(herb_pop_matrix)
+        self._imax_carn.set_data(carn_pop_matrix)
 
-        self._imax_herb.set_data(self._island.herb_pop_matrix)
-        self._imax_carn.set_data(self._island.carn_pop_matrix)
+        self._redraw(changed_axes)
 
-        plt.pause(1e-6)
+    def _redraw(self, changed_axes):
+        """Blit the animated artists of the changed axes, or redraw the whole figure.
+
+        :param changed_axes: Axes with new data
+        :type changed_axes: list
+        """
+        canvas = self._fig.canvas
+        if self._full_draw or self._background is None:
+            canvas.draw()  # Calls `_on_draw`, which caches the background
+        else:
+            canvas.restore_region(self._background)
+            self._draw_animated()
+            for ax in changed_axes:
+                canvas.blit(ax.bbox)
+        canvas.flush_events()
+
+    def _on_draw(self, event):
+        """Cache the static background after a full draw and draw the animated artists on it.
+
+        :param event: Draw event of the canvas
+        :type event: matplotlib.backend_bases.DrawEvent
+        """
+        canvas = self._fig.canvas
+        if event is not None and event.canvas != canvas:
+            return
+        self._background = canvas.copy_from_bbox(self._fig.bbox)
+        self._draw_animated()
+        self._full_draw = False
+
+    def _draw_animated(self):
+        """Draw the animated artists onto the canvas."""
+        for artist in [self._herb_line, self._carn_line, self._imax_herb, self._imax_carn]:
+            self._fig.draw_artist(artist)
+        for patches in self._hist_patches.values():
+            for patch in patches:
+                self._fig.draw_artist(patch)
+
+    def _plot_histograms(self):
+        """Create persistent step patches for the histograms of both species."""
+        self._hist_axes = {
+            "weight": self._ax_weight, "fitness": self._ax_fitness, "age": self._ax_age
+        }
+        for prop, ax in self._hist_axes.items():
+            edges = self._statistics.edges[prop]
+            self._hist_patches[prop] = [
+                ax.stairs(np.zeros(edges.size - 1), edges, fill=True, alpha=0.6, animated=True)
+                for _ in range(2)
+            ]
+            self._hist_ymax[prop] = 10
+            ax.set_xlim([0, self._hist_specs[prop]["max"]])
+            ax.set_ylim([0, self._hist_ymax[prop]])
+            ax.set_title("{} distribution".format(prop.capitalize()))
 
     def _plot_map(self, map_str):
         """Author: Hans E. Plasser
@@ -184,26 +275,21 @@ class Plotting:
             self._axlg.text(0.35, ix * 0.2, name, transform=self._axlg.transAxes)
 
     def _plot_heatmap(self):
-        """Create matrix for population and initiate heatmap.
+        """Initiate the heatmaps from the population matrices of the island.
         """
-        self.herb_pop_matrix = [
-            [0 for _ in self._island.unique_cols] for _ in self._island.unique_rows
-        ]
-        self.carn_pop_matrix = [
-            [0 for _ in self._island.unique_cols] for _ in self._island.unique_rows
-        ]
-
         self._imax_herb = self._axhm_herb.imshow(
             self._island.herb_pop_matrix,
             cmap="viridis",
             interpolation="nearest",
             vmax=self._cmax_herb,
+            animated=True,
         )
         self._imax_carn = self._axhm_carn.imshow(
             self._island.carn_pop_matrix,
             cmap="cividis",
             interpolation="nearest",
             vmax=self._cmax_carn,
+            animated=True,
         )
         self._axhm_herb.set_title("Herbivore density")
         self._axhm_carn.set_title("Carnivore density")
@@ -212,13 +298,26 @@ class Plotting:
 
         plt.colorbar(self._imax_carn, ax=self._axhm_carn, orientation="vertical")
 
-    def save_graphics(self, img_base, img_fmt):
-        """Saves graphics to file if file name given. Modified from Hans E. Plasser."""
+    def close(self):
+        """Close the figure."""
+        if self._fig is not None:
+            plt.close(self._fig)
 
-        if img_base is None:
-            return
+    @property
+    def figure(self):
+        """Figure of the plot."""
+        return self._fig
 
-        plt.savefig(
-            "{base}_{num:05d}.{type}".format(base=img_base, num=self._img_ctr, type=img_fmt)
-        )
-        self._img_ctr += 1
+    def frame(self):
+        """RGBA pixels of the figure as currently drawn on the canvas.
+
+        :return: Pixels with shape (height, width, 4), valid until the next redraw
+        :rtype: ndarray
+
+        .. note::
+            The pixels are read from the canvas after the last blit, so no extra rendering is
+            needed unless the figure has never been drawn.
+        """
+        if self._full_draw or self._background is None:
+            self._fig.canvas.draw()
+        return np.asarray(self._fig.canvas.buffer_rgba())
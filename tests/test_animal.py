@@ -3,9 +3,10 @@
 """
 Tests for animal class.
 """
-from biosim_src.animal import Herbivore, Carnivore
+from biosim_src.animal import AgeClock, Herbivore, Carnivore, WeightScale
 from biosim_src.landscape import Lowland
 import math
+import numpy as np
 import scipy.stats as stats
 import pytest
 import random
@@ -230,6 +231,15 @@ class TestAnimal:
         carn = Carnivore()
         assert isinstance(herb, Herbivore), isinstance(carn, Carnivore)
 
+    def test_compact_instances(self):
+        """
+        Test that animals have no instance dictionary and take species from the class
+        """
+        herb, carn = Herbivore(), Carnivore()
+        assert not hasattr(herb, "__dict__")
+        assert not hasattr(carn, "__dict__")
+        assert (herb.species, carn.species) == ("Herbivore", "Carnivore")
+
     def test_aging(self):
         """
         Test that the animal age increases
@@ -240,6 +250,54 @@ class TestAnimal:
         carn.aging()
         assert herb.age > 0, carn.age > 0
 
+    def test_clock_age(self):
+        """
+        :class: AgeClock
+        Test that animals with a clock derive their age from it, also when aged by themselves
+        """
+        clock = AgeClock(year=10)
+        herb = Herbivore.from_dict({"species": "Herbivore", "age": 3, "weight": 20}, clock)
+        clock.advance()
+        assert herb.age == 4
+        herb.aging()
+        assert herb.age == 5
+        assert repr(herb) == "Herbivore(5 years, 20.0 kg)"
+
+    def test_clock_fitness(self):
+        """
+        :method: Animal.fitness
+        Test that the saved fitness is recomputed when the clock advances
+        """
+        clock = AgeClock()
+        herb = Herbivore(weight=20, age=40, clock=clock)
+        fitness = herb.fitness
+        for _ in range(10):
+            clock.advance()
+        assert herb.fitness < fitness
+        assert herb.fitness == Herbivore(weight=20, age=50).fitness
+
+    def test_scaled_weight(self):
+        """
+        :class: WeightScale
+        Test that scaled weights follow the decay of the scale, also after eating
+        """
+        scale = WeightScale()
+        herb, reference = Herbivore(weight=20, scale=scale), Herbivore(weight=20)
+        fitness = herb.fitness
+        for _ in range(3):
+            scale.decay(herb.p["eta"])
+            reference.lose_weight()
+        assert herb.weight == pytest.approx(reference.weight, rel=1e-12)
+        assert herb.fitness == pytest.approx(reference.fitness, rel=1e-12)
+        assert herb.fitness < fitness
+        herb.weight += 5
+        scale.decay(herb.p["eta"])
+        reference.weight += 5
+        reference.lose_weight()
+        assert herb.weight == pytest.approx(reference.weight, rel=1e-12)
+        with pytest.raises(ValueError):
+            scale.decay(1)
+
     def test_lose_weight(self, reset_herbivore_params, reset_carnivore_params):
         """
         Test that animals lose weight
@@ -301,6 +359,76 @@ class TestHerbivore:
         herb_weight_after = herb.weight
         assert herb_weight < herb_weight_after
 
+    @pytest.mark.parametrize("fodder, appetite", [(800.0, 10.0), (0.3, 0.1), (5.0, 10.0)])
+    def test_graze(self, fodder, appetite, monkeypatch):
+        """
+        :method: Herbivore.graze
+        Test that grazing gives the same weights and fodder as eat_fodder for each herbivore
+        """
+        monkeypatch.setitem(Herbivore.p, "F", appetite)
+        herbs = [Herbivore(weight=10 + 0.1 * i, age=1) for i in range(100)]
+        expected = [Herbivore(weight=herb.weight, age=1) for herb in herbs]
+        cell = Lowland()
+        cell.fodder = fodder
+        for herb in expected:
+            if cell.fodder > 0:
+                herb.eat_fodder(cell)
+
+        assert Herbivore.graze(herbs, fodder) == cell.fodder
+        assert [herb.weight for herb in herbs] == [herb.weight for herb in expected]
+        assert herbs[-1].fitness == expected[-1].fitness
+
+    def test_procreate(self, monkeypatch):
+        """
+        :method: Herbivore.procreate
+        Test that only heavy animals give birth, and mothers lose xi times the birth weight
+        """
+        monkeypatch.setitem(Herbivore.p, "gamma", 10.0)  # Every heavy herbivore gives birth
+        herbs = [Herbivore(weight=50, age=5) for _ in range(20)]
+        herbs += [Herbivore(weight=10, age=5) for _ in range(5)]
+        newborns = Herbivore.procreate(herbs, np.random.default_rng(1))
+
+        assert len(newborns) == 20
+        assert all(newborn.age == 0 for newborn in newborns)
+        assert all(herb.weight == 10 for herb in herbs[20:])
+        lost = sum(50 - herb.weight for herb in herbs[:20])
+        assert lost == pytest.approx(Herbivore.p["xi"] * sum(baby.weight for baby in newborns))
+
+    def test_procreate_alone(self):
+        """
+        :method: Herbivore.procreate
+        Test that a single animal never gives birth
+        """
+        assert Herbivore.procreate([Herbivore(weight=50, age=5)], np.random.default_rng(1)) == []
+
+    def test_end_year(self, monkeypatch):
+        """
+        :method: Herbivore.end_year
+        Test that survivors age, lose weight and keep a correct fitness, and that animals
+        without weight die
+        """
+        monkeypatch.setitem(Herbivore.p, "omega", 0.0)  # Only animals without weight die
+        herbs = [Herbivore(weight=20, age=3), Herbivore(weight=0, age=3)]
+        survivors = Herbivore.end_year(herbs, np.random.default_rng(1))
+
+        assert survivors == herbs[:1]
+        assert survivors[0].age == 4
+        assert survivors[0].weight == 20 - 20 * Herbivore.p["eta"]
+        assert survivors[0].fitness == pytest.approx(
+            Herbivore(weight=survivors[0].weight, age=4).fitness
+        )
+
+    def test_end_year_death_rate(self, monkeypatch):
+        """
+        :method: Herbivore.end_year
+        Test that animals die with probability omega * (1 - fitness)
+        """
+        monkeypatch.setitem(Herbivore.p, "omega", 0.5)
+        herbs = [Herbivore(weight=20, age=3) for _ in range(10000)]
+        survivors = Herbivore.end_year(herbs, np.random.default_rng(1))
+        death_prob = 0.5 * (1 - survivors[0].fitness)
+        assert len(survivors) == pytest.approx(10000 * (1 - death_prob), abs=200)
+
 
 class TestCarnivore:
     """
@@ -347,3 +475,16 @@ class TestCarnivore:
         new_weight = carn.weight
         assert new_weight == initial_weight + carn.p["beta"] * carn.p["F"]
 
+    def test_kill_prey_alive_mask(self):
+        """
+        Test that herbivores flagged as dead are skipped and kills are flagged in the mask
+        """
+        carn = Carnivore(age=5, weight=30)
+        herb_list = [Herbivore(age=100, weight=50) for _ in range(10)]
+        mock_sorted_list = [(herb, herb.fitness) for herb in herb_list]
+        alive = [False] + [True for _ in range(9)]
+        Carnivore.set_params({"DeltaPhiMax": 0.1})
+        killed = carn.kill_prey(mock_sorted_list, alive)
+        Carnivore.set_params({"DeltaPhiMax": 10.0})
+        assert killed == [herb_list[1]]
+        assert alive == [False, False] + [True for _ in range(8)]
@@ -9,10 +9,13 @@ import pytest
 import glob
 import os
 import os.path
+import subprocess
+import sys
 
 from biosim_src.animal import Herbivore, Carnivore
 from biosim_src.biosim import BioSim
 from biosim_src.landscape import Lowland, Highland
+from biosim_src.streams import PROCREATION, DEATH
 
 
 class TestBioSim:
@@ -183,6 +186,270 @@ class TestBioSim:
         biosim_with_animals.set_animal_parameters('Carnivore', {'DeltaPhiMax': 0.7})
         biosim_with_animals.simulate(num_years=100, vis_years=1, img_years=None)
 
+    def test_predation(self, biosim):
+        """
+        :method: Biosim.predation
+        Test that killed herbivores are removed from the cell and the counters
+        """
+        cell = biosim._island.landscape[(2, 2)]
+        herbs = [Herbivore(age=100, weight=10) for _ in range(50)]
+        cell.add_animals(herbs + [Carnivore(age=5, weight=30) for _ in range(3)])
+        biosim._island.count_animals(animal_list=cell.animals)
+        biosim.set_animal_parameters('Carnivore', {'DeltaPhiMax': 0.1})
+        biosim.predation(cell)
+        biosim.set_animal_parameters('Carnivore', {'DeltaPhiMax': 10.0})
+        assert cell.herb_count == biosim.num_animals_per_species['Herbivore'] < 50
+        assert cell.herbivores == [herb for herb in herbs if herb in cell.herbivores]
+
+    def test_procreation_alone(self, biosim):
+        """
+        :method: Biosim.procreation
+        Test that no random generator is created for a cell without two animals of a species
+        """
+        cell = biosim._island.landscape[(2, 2)]
+        cell.add_animals([Herbivore(age=5, weight=40)])
+        stream = biosim._stream((2, 2), PROCREATION)
+        biosim.procreation(cell, stream)
+        assert cell.herb_count == 1
+        assert stream._generator is None
+
+    def test_aging_and_death_empty(self, biosim):
+        """
+        :method: Biosim.aging_and_death
+        Test that no random generator is created for a cell without animals
+        """
+        stream = biosim._stream((2, 2), DEATH)
+        biosim.aging_and_death(biosim._island.landscape[(2, 2)], stream)
+        assert stream._generator is None
+
+    @pytest.fixture
+    def ini_pop(self):
+        """
+        Herbivores and carnivores in cell (2, 2), for simulations of a few years
+        """
+        return [{"loc": (2, 2),
+                 "pop": [{"species": "Herbivore", "age": 5, "weight": 20} for _ in range(50)]
+                 + [{"species": "Carnivore", "age": 5, "weight": 20} for _ in range(5)]}]
+
+    @pytest.mark.parametrize('schedule', ['phase', 'cell'])
+    def test_schedules(self, schedule, ini_pop):
+        """
+        :method: Biosim.run_year_cycle II
+        Test that both schedules can be run and keep the counters correct
+        """
+        sim = BioSim("WWWWW\nWLHLW\nWWWWW", ini_pop, plot_graph=False, schedule=schedule)
+        for _ in range(10):
+            sim.run_year_cycle()
+        cells = sim._island.land_cells.values()
+        assert sim.num_animals == sum(len(cell.animals) for cell in cells)
+
+    @pytest.mark.parametrize('options', [{'schedule': 'phase'}, {'schedule': 'cell'},
+                                         {'engine': 'array'}, {'engine': 'numba'}])
+    def test_negative_seed(self, options, ini_pop):
+        """
+        :method: Biosim.run_years
+        Test that negative seeds can be used, like with earlier versions
+        """
+        if options.get('engine') == 'numba':
+            pytest.importorskip('numba')
+        sim = BioSim("WWWW\nWLHW\nWWWW", ini_pop, seed=-1, plot_graph=False, **options)
+        assert sim.run_years(3).shape == (3, 2)
+
+    def test_invalid_schedule(self):
+        """
+        Test that unknown schedules, and the cell schedule with array engines, raise ValueError
+        """
+        with pytest.raises(ValueError):
+            BioSim(island_map="WWW\nWLW\nWWW", schedule="random")
+        with pytest.raises(ValueError):
+            BioSim(island_map="WWW\nWLW\nWWW", engine="array", schedule="cell")
+
+    def test_exchange_migrants(self):
+        """
+        :method: Biosim.exchange_migrants
+        :method: Biosim.emigrate
+        Test that all migrants move exactly once, even into cells that are processed later
+        """
+        sim = BioSim("WWWW\nWLLW\nWWWW", plot_graph=False)
+        herbs = [Herbivore(weight=50, age=5) for _ in range(10)]
+        sim._island.landscape[(2, 2)].add_animals(herbs)
+        mu = Herbivore.p["mu"]
+        Herbivore.set_params({"mu": 100.0})  # Every herbivore migrates
+        try:
+            sim.exchange_migrants(sim._island.land_cells)
+        finally:
+            Herbivore.set_params({"mu": mu})
+        assert sim._island.landscape[(2, 2)].herb_count == 0
+        assert sim._island.landscape[(2, 3)].herbivores == herbs
+
+    def test_migrate_cell_schedule(self, mocker):
+        """
+        :method: Biosim.migrate
+        Test that animals moving into a cell visited later do not move again in the same year
+        """
+        sim = BioSim("WWWW\nWLLW\nWWWW", plot_graph=False, schedule="cell")
+        herbs = [Herbivore() for _ in range(10)]
+        sim._island.landscape[(2, 2)].add_animals(herbs)
+        mocker.patch("random.random", return_value=0)
+        sim.migrate(sim._island.landscape[(2, 2)])
+        sim.migrate(sim._island.landscape[(2, 3)])
+        assert sim._island.landscape[(2, 3)].herbivores == herbs
+        sim.migrate(sim._island.landscape[(2, 3)])
+        assert sim._island.landscape[(2, 2)].herbivores == herbs
+
+    def test_arrived_cleared(self, ini_pop):
+        """
+        :method: Biosim.run_year_cycle
+        Test that the 'cell' schedule keeps no arrived animals after the year
+        """
+        sim = BioSim("WWWWW\nWLLLW\nWWWWW", ini_pop, seed=1, plot_graph=False,
+                     schedule="cell")
+        for _ in range(5):
+            sim.run_year_cycle()
+            assert sim._arrived == {}
+
+    def test_cell_order_independent(self, ini_pop):
+        """
+        :method: Biosim.run_year_cycle III
+        Test that the 'phase' schedule gives the same result when cells are visited in reverse
+        """
+        def run(reverse):
+            sim = BioSim("WWWWW\nWLHLW\nWLDLW\nWWWWW", ini_pop, seed=4, plot_graph=False)
+            if reverse:
+                sim._island._land_cells = dict(reversed(sim._island.land_cells.items()))
+            for _ in range(10):
+                sim.run_year_cycle()
+            return [(loc, [(animal.weight, animal.age) for animal in cell.animals])
+                    for loc, cell in sorted(sim._island.land_cells.items())]
+
+        assert run(reverse=False) == run(reverse=True)
+
+    @pytest.mark.parametrize("options", [
+        {"schedule": "phase"}, {"schedule": "cell"}, {"engine": "array"}, {"engine": "numba"},
+    ])
+    def test_pop_matrix_kept_up_to_date(self, options, ini_pop):
+        """
+        :method: Island.verify_counts
+        Test that the population matrices follow births, deaths, predation and migration
+        """
+        if options.get("engine") == "numba":
+            pytest.importorskip("numba")
+        sim = BioSim("WWWWW\nWLHLW\nWLDLW\nWWWWW", ini_pop, seed=4, plot_graph=False, **options)
+        for _ in range(5):
+            sim.run_year_cycle()
+            sim._island.verify_counts()
+        assert sim._island.herb_pop_matrix.sum() == sim.num_animals_per_species["Herbivore"]
+
+    def test_workers(self, ini_pop):
+        """
+        :method: Biosim.run_years II
+        Test that the result is the same with one and with two worker processes, also when
+        animals are added while the workers hold the population
+        """
+        def run(workers):
+            sim = BioSim("WWWWW\nWLHLW\nWLDLW\nWLLLW\nWWWWW", ini_pop, seed=4,
+                         plot_graph=False, workers=workers)
+            counts = sim.run_years(5)
+            sim.add_population([{"loc": (4, 3), "pop": [
+                {"species": "Carnivore", "age": 3, "weight": 30} for _ in range(5)]}])
+            sim.run_year_cycle()
+            pop_matrix = sim._island.herb_pop_matrix.tolist()  # Kept while workers hold animals
+            sim.close()
+            sim._island.verify_counts()
+            assert sim.num_animals == sum(len(cell.animals)
+                                          for cell in sim._island.land_cells.values())
+            animals = [(loc, [(animal.weight, animal.age) for animal in cell.animals])
+                       for loc, cell in sorted(sim._island.land_cells.items())]
+            return counts.tolist(), pop_matrix, animals
+
+        assert run(workers=1) == run(workers=2)
+
+    def test_epoch_ages(self, ini_pop):
+        """
+        :method: Biosim.run_years
+        Test that ages derived from birth years give the same simulation as counted ages
+        """
+        results = []
+        for ages in ("counter", "epoch"):
+            sim = BioSim("WWWWW\nWLHLW\nWWWWW", ini_pop, seed=1, plot_graph=False, ages=ages)
+            counts = sim.run_years(20)
+            animals = sorted((animal.age, animal.weight)
+                             for cell in sim._island.land_cells.values()
+                             for animal in cell.herbivores + cell.carnivores)
+            results.append((counts.tolist(), animals))
+        assert results[0] == results[1]
+
+    def test_invalid_ages(self):
+        """
+        Test that 'epoch' ages are refused where they are not available
+        """
+        with pytest.raises(ValueError):
+            BioSim(island_map="WWW\nWLW\nWWW", ages="birth")
+        with pytest.raises(ValueError):
+            BioSim(island_map="WWW\nWLW\nWWW", ages="epoch", engine="array")
+        with pytest.raises(ValueError):
+            BioSim(island_map="WWW\nWLW\nWWW", ages="epoch", schedule="cell")
+
+    def test_scaled_weights(self, ini_pop):
+        """
+        :method: Biosim.run_years
+        Test that weights kept relative to a scale give the same simulation as absolute weights
+        """
+        results = []
+        for weights in ("absolute", "scaled"):
+            sim = BioSim("WWWWW\nWLHLW\nWWWWW", ini_pop, seed=1, plot_graph=False,
+                         weights=weights)
+            counts = sim.run_years(20)
+            animals = sorted((animal.age, animal.weight)
+                             for cell in sim._island.land_cells.values()
+                             for animal in cell.herbivores + cell.carnivores)
+            results.append((counts.tolist(), animals))
+        assert results[0][0] == results[1][0]
+        assert [age for age, _ in results[0][1]] == [age for age, _ in results[1][1]]
+        assert [weight for _, weight in results[1][1]] == pytest.approx(
+            [weight for _, weight in results[0][1]], rel=1e-9)
+        with pytest.raises(ValueError):
+            BioSim(island_map="WWW\nWLW\nWWW", weights="relative")
+        with pytest.raises(ValueError):
+            BioSim(island_map="WWW\nWLW\nWWW", weights="scaled", engine="array")
+
+    def test_seed_none(self, ini_pop):
+        """
+        :method: Biosim.__init__
+        Test that a seed is drawn when seed is None, and used by the random streams
+        """
+        sim = BioSim("WWWW\nWLHW\nWWWW", ini_pop, seed=None, plot_graph=False)
+        assert isinstance(sim._seed, int)
+        sim.run_years(2)
+
+    def test_invalid_workers(self):
+        """
+        Test that workers are only accepted with the 'object' engine and 'phase' schedule
+        """
+        with pytest.raises(ValueError):
+            BioSim(island_map="WWW\nWLW\nWWW", engine="array", workers=2)
+        with pytest.raises(ValueError):
+            BioSim(island_map="WWW\nWLW\nWWW", schedule="cell", workers=2)
+
+    def test_run_replicates(self, ini_pop):
+        """
+        :method: Biosim.run_replicates
+        Test that replicates are stacked per seed and equal seeds give equal results
+        """
+        counts = BioSim.run_replicates("WWWW\nWLHW\nWWWW", ini_pop, {"L": {"f_max": 600.0}},
+                                       seeds=[1, 2, 1], num_years=10, workers=2)
+        assert counts.shape == (3, 11, 2)
+        assert (counts[:, 0] == [50, 5]).all()
+        assert (counts[0] == counts[2]).all()
+
+    def test_no_matplotlib_import(self):
+        """
+        Test that the simulation module can be imported without loading matplotlib
+        """
+        code = "import sys, biosim_src.biosim; print('matplotlib' in sys.modules)"
+        output = subprocess.check_output([sys.executable, "-c", code], text=True)
+        assert output.strip() == "False"
+
     @pytest.fixture
     def figfile_root(self):
         """
@@ -214,3 +481,40 @@ class TestBioSim:
         assert os.path.isfile(figfile_root + '_00001.png')
         assert os.path.isfile(figfile_root + '_00002.png')
         assert os.path.isfile(figfile_root + '_00003.png')
+
+    def test_vis_budget(self, mocker, tmp_path, ini_pop):
+        """
+        :method: Biosim.simulate
+        Test that slow plot updates are made less often, while images follow img_years
+        """
+        clock = [0.0]  # Simulated wall time: 0.01 s per reading and 1 s per plot update
+
+        def perf_counter():
+            clock[0] += 0.01
+            return clock[0]
+
+        def update_plot_slowly():
+            clock[0] += 1.0
+
+        mocker.patch("time.perf_counter", side_effect=perf_counter)
+        update_plot = mocker.patch("biosim_src.visualization.Plotting.update_plot",
+                                   side_effect=update_plot_slowly)
+        img_base = str(tmp_path / "sim")
+        sim = BioSim("WWWW\nWLHW\nWWWW", ini_pop, seed=1, img_base=img_base)
+        sim.simulate(40, vis_years=1, img_years=10, vis_budget=0.5)
+        assert len(glob.glob(img_base + "_0*.png")) == 4
+        assert update_plot.call_count < 10
+
+    def test_vis_interval(self, biosim):
+        """
+        :method: Biosim._vis_interval
+        Test that the interval keeps updates within the budget, and vis_years is used until
+        times are measured
+        """
+        assert biosim._vis_interval(3, 0.1) == 3
+        biosim._vis_time, biosim._year_time = 0.5, 0.125
+        assert biosim._vis_interval(3, 0.25) == 12
+        assert biosim._vis_interval(3, 0.75) == 2
+        assert biosim._vis_interval(3, None) == 3
+        with pytest.raises(ValueError):
+            biosim.simulate(1, vis_budget=1.5)
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests for the columnar population engine.
+"""
+
+from biosim_src.animal import Herbivore, Carnivore
+from biosim_src.biosim import BioSim
+from biosim_src.columnar import Herd
+from biosim_src.streams import CellStream, FEEDING
+import numpy as np
+import pytest
+
+
+class TestHerd:
+
+    @pytest.fixture
+    def herd(self):
+        """Create a herbivore herd with three animals"""
+        return Herd.from_animals(
+            Herbivore, [Herbivore(weight=20, age=5), Herbivore(weight=30, age=2), Herbivore()]
+        )
+
+    def test_len(self, herd):
+        """
+        :method: Herd.from_animals
+        Test that all animals are stored in the herd
+        """
+        assert len(herd) == 3
+
+    def test_getitem(self, herd):
+        """
+        :method: Herd.__getitem__
+        Test that indexing returns an animal with the stored age and weight
+        """
+        assert repr(herd[0]) == 'Herbivore(5 years, 20.0 kg)'
+
+    def test_fitness(self, herd):
+        """
+        :method: Herd.update_fitness
+        :method: Animal.fitness_array
+        Test that cached fitness equals the fitness of the animal objects
+        """
+        assert herd.fitness == pytest.approx([animal.fitness for animal in herd])
+
+    def test_extend_and_keep(self, herd):
+        """
+        :method: Herd.extend
+        :method: Herd.keep
+        Test that animals can be added and removed in bulk
+        """
+        herd.extend([Herbivore(weight=10, age=1) for _ in range(5)])
+        herd.keep(herd.weight != 10)
+        assert len(herd) == 3
+        assert len(herd.fitness) == 3
+
+
+class TestArrayEngine:
+
+    @pytest.fixture
+    def biosim(self):
+        """Create BioSim instance with the array engine"""
+        ini_pop = [
+            {
+                "loc": (2, 2),
+                "pop": [{"species": "Herbivore", "age": 5, "weight": 20} for _ in range(200)]
+            },
+            {
+                "loc": (2, 2),
+                "pop": [{"species": "Carnivore", "age": 5, "weight": 20} for _ in range(20)]
+            }
+        ]
+        return BioSim(island_map="WWWWW\nWLHLW\nWLDLW\nWWWWW", ini_pop=ini_pop, seed=1,
+                      plot_graph=False, engine="array")
+
+    def test_cells_hold_herds(self, biosim):
+        """
+        Test that the population is converted to herds
+        """
+        cell = biosim._island.landscape[(2, 2)]
+        assert isinstance(cell.herbivores, Herd)
+        assert cell.herb_count == 200
+        assert cell.carn_count == 20
+
+    def test_invalid_engine(self):
+        """
+        Test that unknown engines raise ValueError
+        """
+        with pytest.raises(ValueError):
+            BioSim(island_map="WWW\nWLW\nWWW", engine="gpu")
+
+    def test_grazing(self, biosim):
+        """
+        :method: ArrayEngine.feeding
+        Test that fodder is shared out in portions of F until the cell is empty
+        """
+        cell = biosim._island.landscape[(2, 2)]
+        cell.carnivores.keep(np.zeros(len(cell.carnivores), dtype=bool))
+        initial_weight = cell.herbivores.weight.copy()
+        biosim._engine.feeding(cell, CellStream(1, 0, (2, 2), FEEDING))
+        gain = cell.herbivores.weight - initial_weight
+        assert cell.is_empty
+        assert np.count_nonzero(gain) == np.ceil(cell.f_max() / Herbivore.p["F"])
+
+    def test_counts_match_cells(self, biosim):
+        """
+        :method: ArrayEngine.run_year_cycle
+        Test that island counters agree with the herds after several years
+        """
+        for _ in range(20):
+            biosim.run_year_cycle()
+        cells = biosim._island.land_cells.values()
+        assert biosim.num_animals_per_species == {
+            "Herbivore": sum(cell.herb_count for cell in cells),
+            "Carnivore": sum(cell.carn_count for cell in cells),
+        }
+        assert biosim.year == 20
+
+    def test_predation_sated(self, biosim):
+        """
+        :method: ArrayEngine.predation
+        Test that a carnivore stops hunting once it has eaten F
+        """
+        herbs = Herd(Herbivore, weight=np.full(100, 20.0), age=np.full(100, 100))
+        carns = Herd(Carnivore, weight=[30.0], age=[5])
+        Carnivore.set_params({"DeltaPhiMax": 0.01})
+        killed = biosim._engine.predation(herbs, carns, np.random.default_rng(1))
+        Carnivore.set_params({"DeltaPhiMax": 10.0})
+        assert killed.sum() == np.ceil(Carnivore.p["F"] / 20.0)
+        assert carns.weight[0] == 30.0 + Carnivore.p["beta"] * Carnivore.p["F"]
+
+    def test_simulate(self, biosim):
+        """
+        :method: BioSim.simulate
+        Test that simulation runs with the array engine
+        """
+        biosim.simulate(num_years=10, vis_years=1)
+        assert biosim.year == 10
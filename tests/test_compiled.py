@@ -0,0 +1,139 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests for the Numba-compiled population engine.
+"""
+
+import pytest
+
+pytest.importorskip("numba")
+
+from biosim_src.animal import Herbivore  # noqa: E402
+from biosim_src.biosim import BioSim  # noqa: E402
+from biosim_src.columnar import Herd  # noqa: E402
+from biosim_src.compiled import (  # noqa: E402
+    group_by_cell, pack_params, seed_stream, W_BIRTH, DELTA_PHI_MAX
+)
+import numpy as np  # noqa: E402
+
+
+class TestKernels:
+
+    def test_group_by_cell(self):
+        """
+        :function: group_by_cell
+        Test that animals are sorted by cell with correct offsets
+        """
+        cell = np.array([2, 0, 2, 1, 0])
+        weight = np.arange(5, dtype=float)
+        age = np.arange(5)
+        cell, weight, age, start = group_by_cell(cell, weight, age, 3)
+        assert list(cell) == [0, 0, 1, 2, 2]
+        assert list(weight) == [1.0, 4.0, 3.0, 0.0, 2.0]
+        assert list(start) == [0, 2, 3, 5]
+
+    def test_pack_params(self):
+        """
+        :function: pack_params
+        Test that parameters are packed in order and missing ones are zero
+        """
+        params = pack_params(Herbivore)
+        assert params[W_BIRTH] == Herbivore.p["w_birth"]
+        assert params[DELTA_PHI_MAX] == 0.0
+
+    def test_seed_stream(self):
+        """
+        :function: seed_stream
+        Test that each (seed, year, cell, phase) key gives its own stream state
+        """
+        states = set()
+        for key in [(1, 0, 5, 0), (2, 0, 5, 0), (1, 1, 5, 0), (1, 0, 6, 0), (1, 0, 5, 1)]:
+            rng = np.zeros(1, np.uint64)
+            seed_stream(rng, *key)
+            states.add(int(rng[0]))
+        assert len(states) == 5
+
+
+class TestCompiledEngine:
+
+    @pytest.fixture
+    def biosim(self):
+        """Create BioSim instance with the numba engine"""
+        ini_pop = [
+            {
+                "loc": (2, 2),
+                "pop": [{"species": "Herbivore", "age": 5, "weight": 20} for _ in range(200)]
+            },
+            {
+                "loc": (2, 3),
+                "pop": [{"species": "Carnivore", "age": 5, "weight": 20} for _ in range(20)]
+            }
+        ]
+        return BioSim(island_map="WWWWW\nWLHLW\nWLDLW\nWWWWW", ini_pop=ini_pop, seed=1,
+                      plot_graph=False, engine="numba")
+
+    def test_run_years(self, biosim):
+        """
+        :method: BioSim.run_years
+        :method: CompiledEngine.run_years
+        Test that several years run in one call and counts are recorded for each year
+        """
+        counts = biosim.run_years(10)
+        cells = biosim._island.land_cells.values()
+        assert counts.shape == (10, 2)
+        assert biosim.year == 10
+        assert counts[-1, 0] == biosim._island.num_herbs == sum(c.herb_count for c in cells)
+        assert counts[-1, 1] == biosim._island.num_carns == sum(c.carn_count for c in cells)
+
+    def test_large_seed(self, biosim):
+        """
+        :method: CompiledEngine.run_years
+        Test that seeds outside the 64-bit range are accepted and taken modulo 2**64
+        """
+        ini_pop = [{"loc": (2, 2), "pop": [{"species": "Herbivore", "age": 5, "weight": 20}] * 200},
+                   {"loc": (2, 3), "pop": [{"species": "Carnivore", "age": 5, "weight": 20}] * 20}]
+        large = BioSim(island_map="WWWWW\nWLHLW\nWLDLW\nWWWWW", ini_pop=ini_pop,
+                       seed=2 ** 64 + 1, plot_graph=False, engine="numba")
+        assert large.run_years(5).tolist() == biosim.run_years(5).tolist()
+        BioSim(island_map="WWWWW\nWLHLW\nWLDLW\nWWWWW", ini_pop=ini_pop, seed=2 ** 70,
+               plot_graph=False, engine="numba").run_years(1)
+
+    def test_reproducible(self, biosim):
+        """
+        :method: CompiledEngine.run_years
+        Test that running year by year gives the same result as running all years at once
+        """
+        ini_pop = [{"loc": (2, 2), "pop": [{"species": "Herbivore", "age": 5, "weight": 20}] * 200},
+                   {"loc": (2, 3), "pop": [{"species": "Carnivore", "age": 5, "weight": 20}] * 20}]
+        other = BioSim(island_map="WWWWW\nWLHLW\nWLDLW\nWWWWW", ini_pop=ini_pop, seed=1,
+                       plot_graph=False, engine="numba")
+        counts = biosim.run_years(5)
+        assert [list(other.run_years(1)[0]) for _ in range(5)] == counts.tolist()
+
+    def test_cells_hold_herds(self, biosim):
+        """
+        Test that the population is scattered back to the cells after running
+        """
+        biosim.run_year_cycle()
+        assert isinstance(biosim._island.landscape[(2, 2)].herbivores, Herd)
+
+    def test_add_population_between_runs(self, biosim):
+        """
+        :method: BioSim.add_population
+        Test that animals added between runs are included in the next run
+        """
+        biosim.run_years(2)
+        num_herbs = biosim.num_animals_per_species["Herbivore"]
+        biosim.add_population([
+            {"loc": (3, 2), "pop": [{"species": "Herbivore", "age": 5, "weight": 20}] * 10}
+        ])
+        assert biosim.num_animals_per_species["Herbivore"] == num_herbs + 10
+        biosim.run_years(2)
+
+    def test_simulate(self, biosim):
+        """
+        :method: BioSim.simulate
+        Test that simulation runs with the numba engine
+        """
+        biosim.simulate(num_years=10, vis_years=1)
+        assert biosim.year == 10
@@ -7,6 +7,7 @@ Test set for the initial Lowland class.
 from biosim_src.landscape import Island, Desert, Highland, Lowland, Water
 from biosim_src.animal import Herbivore, Carnivore
 from biosim_src.biosim import BioSim
+import numpy as np
 import pytest
 
 """
@@ -51,19 +52,6 @@ class TestHighlandLandscapeCell:
         highland_cell.fodder = 200.0
         assert highland_cell._fodder == 200.0
 
-    def test_reset_animals(self, highland_cell):
-        """
-        :method: LandscapeCell.add_animal
-        :method: LandscapeCell.reset_animals
-        :property: LandscapeCell.carnivores
-        :property: LandscapeCell.has_moved
-        Test that has_moved property is correctly set and reset
-        """
-        highland_cell.add_animals([Carnivore(), Herbivore()])
-        if highland_cell.carnivores[0].has_moved:
-            highland_cell.reset_animals()
-        assert not highland_cell.carnivores[0].has_moved
-
     def test_shuffle_herbs(self, highland_cell):
         """
         :method: LandscapeCell.add_animals
@@ -115,6 +103,33 @@ class TestHighlandLandscapeCell:
             else:
                 highland_cell.remove_animals(['Carnivore'])
 
+    def test_bulk_add_remove(self, highland_cell):
+        """
+        :method: LandscapeCell.add_herbivores
+        :method: LandscapeCell.add_carnivores
+        :method: LandscapeCell.remove_herbivores
+        :method: LandscapeCell.remove_carnivores
+        Test that batches of animals are added and removed, keeping the order of the rest
+        """
+        herbs = [Herbivore() for _ in range(10)]
+        carns = [Carnivore() for _ in range(5)]
+        highland_cell.add_herbivores(herbs)
+        highland_cell.add_carnivores(carns)
+        highland_cell.remove_herbivores(herbs[::2])
+        highland_cell.remove_carnivores(carns[:4])
+        assert highland_cell.herbivores == herbs[1::2]
+        assert highland_cell.carnivores == carns[4:]
+
+    def test_remove_absent_animal(self, highland_cell):
+        """
+        :method: LandscapeCell.remove_animals
+        Test that removing an animal which is not in the cell raises error
+        """
+        highland_cell.add_animals([Herbivore()])
+        with pytest.raises(ValueError):
+            highland_cell.remove_animals([Herbivore()])
+        assert highland_cell.herb_count == 1
+
     def test_sorted_herbivores_and_carnivores(self, highland_cell):
         """
         :method: LandscapeCell.add_animals
@@ -205,6 +220,16 @@ class TestWater:
         water = Water()
         assert not water.is_mainland
 
+    def test_shared_water(self):
+        """
+        :method: Island.map_from_str
+        Test that all water cells of a map share one instance
+        """
+        landscape = Island.map_from_str("WWW\nWLW\nWWW")
+        assert landscape[(1, 1)] is landscape[(3, 3)]
+        assert not hasattr(landscape[(2, 2)], "__dict__")
+        assert landscape[(2, 2)].type == "Lowland"
+
     def test_repr_and_str_water(self):
         """
         :method: Water.__repr__
@@ -298,6 +323,83 @@ class TestIsland:
         assert type(island.land_cells) == dict
         assert len(island.land_cells) == 3
 
+    def test_geometry(self, island):
+        """
+        :class: IslandGeometry
+        Test that land cells are numbered by coordinates and neighbor ids are padded with -1
+        """
+        geometry = island.geometry
+        assert geometry.shape == (4, 4)
+        assert geometry.land_locs == [(2, 2), (2, 3), (3, 2)]
+        assert geometry.loc_id((3, 2)) == 2
+        assert geometry.loc_id((1, 1)) == -1
+        assert geometry.land_mask.sum() == 3
+        assert geometry.border_mask.sum() == 12
+        assert geometry.neighbor_table.tolist() == [[1, 2, -1, -1], [0, -1, -1, -1],
+                                                    [0, -1, -1, -1]]
+        assert geometry.num_neighbors.tolist() == [2, 1, 1]
+
+    def test_geometry_immutable(self, island):
+        """
+        :class: IslandGeometry
+        Test that the geometry can not be changed
+        """
+        with pytest.raises(AttributeError):
+            island.geometry.shape = (5, 5)
+        with pytest.raises(ValueError):
+            island.geometry.land_mask[0, 0] = True
+
+    def test_from_array(self):
+        """
+        :method: Island.from_array
+        Test that letters, bytes and ASCII codes give the same island as the map string
+        """
+        map_str = "WWWW\nWLHW\nWDWW\nWWWW"
+        letters = np.array([list(row) for row in map_str.splitlines()])
+        for codes in [letters, letters.astype("S1"), letters.astype("S1").view(np.uint8)]:
+            island = Island.from_array(codes)
+            assert island.map_str == map_str
+            assert island.geometry.land_locs == Island(map_str).geometry.land_locs
+            assert type(island.landscape[(2, 3)]) is Highland
+
+    @pytest.mark.parametrize("codes", [
+        [["W", "W"], ["W", "W", "W"]],
+        [["W", "W", "W"], ["W", "X", "W"], ["W", "W", "W"]],
+        [["W", "W", "W"], ["W", "L", "L"], ["W", "W", "W"]],
+        ["W", "W", "W"],
+    ])
+    def test_from_array_invalid(self, codes):
+        """
+        :method: Island.validate_codes
+        Test that ragged maps, invalid letters and land borders raise ValueError
+        """
+        with pytest.raises(ValueError):
+            Island.from_array(codes)
+
+    @pytest.mark.parametrize("line_end", ["\n", "\r\n"])
+    @pytest.mark.parametrize("last_line_end", ["", "\n\n"])
+    def test_from_file(self, tmp_path, line_end, last_line_end):
+        """
+        :method: Island.from_file
+        Test that map files with any line ending give the same island as the map string
+        """
+        map_str = "WWWWW\nWLLHW\nWDLLW\nWWWWW"
+        path = tmp_path / "map.txt"
+        path.write_bytes((map_str.replace("\n", line_end) + last_line_end).encode())
+        island = Island.from_file(str(path))
+        assert island.map_str == map_str
+        assert island.geometry.land_locs == Island(map_str).geometry.land_locs
+
+    def test_from_file_ragged(self, tmp_path):
+        """
+        :method: Island.from_file
+        Test that map files with different row lengths raise ValueError
+        """
+        path = tmp_path / "map.txt"
+        path.write_text("WWW\nWLWW\nWWW\n")
+        with pytest.raises(ValueError):
+            Island.from_file(str(path))
+
     def test_rows_and_cols(self, island):
         """
         :property: Island.unique_rows
@@ -364,7 +466,7 @@ class TestIsland:
         Test that carnivore population matrix is of correct shape and value
         """
         biosim._island.update_pop_matrix()
-        assert biosim._island.carn_pop_matrix == [[0, 0, 0], [0, 2, 0], [0, 0, 0]]
+        assert biosim._island.carn_pop_matrix.tolist() == [[0, 0, 0], [0, 2, 0], [0, 0, 0]]
 
     def test_herb_pop_matrix(self, biosim):
         """
@@ -372,7 +474,26 @@ class TestIsland:
         Test that herbivore population matrix is of correct shape and value
         """
         biosim._island.update_pop_matrix()
-        assert biosim._island.herb_pop_matrix == [[0, 0, 0], [0, 3, 0], [0, 0, 0]]
+        assert biosim._island.herb_pop_matrix.tolist() == [[0, 0, 0], [0, 3, 0], [0, 0, 0]]
+
+    def test_pop_matrix_counted(self, biosim):
+        """
+        :method: Island.count_animals
+        :method: Island.verify_counts
+        Test that the population matrices are counted as animals are added, without a recount
+        """
+        assert biosim._island.herb_pop_matrix[1, 1] == 3
+        assert biosim._island.carn_pop_matrix[1, 1] == 2
+        biosim._island.verify_counts()
+
+    def test_verify_counts(self, biosim):
+        """
+        :method: Island.verify_counts
+        Test that animals added to a cell without counting are detected
+        """
+        biosim._island.landscape[(2, 2)].add_animals([Herbivore()])
+        with pytest.raises(RuntimeError):
+            biosim._island.verify_counts()
 
     def test_animal_weights(self, biosim):
         """
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests for snapshots and the renderer process.
+"""
+
+from biosim_src.biosim import BioSim
+from biosim_src.renderer import RenderProcess, render_movie
+from biosim_src.snapshots import Snapshot, SnapshotLog, take_snapshot
+from biosim_src.statistics import DEFAULT_HIST_SPECS, PopulationStatistics
+import numpy as np
+import glob
+import pickle
+import pytest
+
+INI_POP = [{"loc": (2, 2),
+            "pop": [{"species": "Herbivore", "age": 5, "weight": 20} for _ in range(10)]}]
+
+
+class TestSnapshot:
+
+    @pytest.fixture
+    def biosim(self):
+        """Create BioSim instance with animals in one cell"""
+        return BioSim("WWWW\nWLHW\nWWWW", INI_POP, seed=1, plot_graph=False)
+
+    def test_take_snapshot(self, biosim):
+        """
+        :function: take_snapshot
+        Test that snapshots copy the population matrices and hold the histogram counts
+        """
+        statistics = PopulationStatistics(DEFAULT_HIST_SPECS)
+        snapshot = take_snapshot(biosim._island, statistics, 0, [(10, 0)], 5, save=True)
+        biosim.run_year_cycle()
+        assert snapshot.herb_pop_matrix.tolist() == [[0, 0, 0, 0], [0, 10, 0, 0], [0, 0, 0, 0]]
+        assert snapshot.hist_counts["age"][0].sum() == 10
+        assert snapshot.year == 0
+
+    def test_merge(self):
+        """
+        :method: Snapshot.merge
+        Test that merged snapshots keep all counts and the latest frame
+        """
+        first = Snapshot(1, [(5, 1)], 10, np.ones((2, 2)), np.zeros((2, 2)), save=True)
+        second = Snapshot(2, [(6, 1), (7, 2)], 12, np.full((2, 2), 2), np.zeros((2, 2)))
+        merged = first.merge(second)
+        assert merged.counts.tolist() == [[5, 1], [6, 1], [7, 2]]
+        assert merged.year == 3
+        assert merged.year_target == 12
+        assert merged.herb_pop_matrix[0, 0] == 2
+        assert merged.save
+
+    def test_counts_only(self):
+        """
+        :method: Snapshot.counts_only
+        Test that a dropped frame keeps its counts, and the frame of the next snapshot is used
+        """
+        first = Snapshot(1, [(5, 1)], 10, np.ones((2, 2)), np.zeros((2, 2)), save=True)
+        dropped = first.counts_only()
+        assert not dropped.has_frame and not dropped.save
+        merged = dropped.merge(Snapshot(2, [(6, 1)], 10, np.zeros((2, 2)), np.zeros((2, 2))))
+        assert merged.counts.tolist() == [[5, 1], [6, 1]]
+        assert merged.herb_pop_matrix[0, 0] == 0
+
+    def test_pickle(self):
+        """Test that snapshots can be sent to other processes"""
+        snapshot = Snapshot(1, [(5, 1)], 10, np.ones((2, 2)), np.zeros((2, 2)), save=True)
+        copy = pickle.loads(pickle.dumps(snapshot))
+        assert copy.counts.tolist() == [[5, 1]] and copy.save
+
+
+class TestRenderProcess:
+
+    def test_invalid_policy(self):
+        """Test that unknown policies raise ValueError"""
+        with pytest.raises(ValueError):
+            RenderProcess({}, policy="skip")
+        with pytest.raises(ValueError):
+            BioSim("WWW\nWLW\nWWW", [], seed=1, render_policy="skip")
+        with pytest.raises(ValueError):
+            BioSim("WWW\nWLW\nWWW", [], seed=1, renderer="thread")
+
+    def test_strict_saves_every_frame(self, tmp_path):
+        """
+        :method: BioSim.simulate
+        :class: RenderProcess
+        Test that the 'strict' policy draws and saves every frame in the renderer process
+        """
+        img_base = str(tmp_path / "sim")
+        sim = BioSim("WWWW\nWLHW\nWWWW", INI_POP, seed=1, img_base=img_base,
+                     renderer="process", render_policy="strict")
+        sim.simulate(3, vis_years=1)
+        sim.simulate(2, vis_years=1)
+        sim.close()
+        assert len(glob.glob(img_base + "_0*.png")) == 5
+        sim.image_cleanup()
+        assert glob.glob(img_base + "_0*.png") == []
+
+
+class TestSnapshotLog:
+
+    @pytest.fixture
+    def recorded(self):
+        """Simulate and record a few years"""
+        sim = BioSim("WWWW\nWLHW\nWWWW", INI_POP, seed=1, plot_graph=False, record=True)
+        sim.simulate(5, vis_years=2, img_years=4)
+        return sim
+
+    def test_record(self, recorded):
+        """
+        :method: BioSim.simulate
+        Test that recording keeps the counts of every year and a frame every vis_years
+        """
+        log = recorded.snapshot_log
+        assert log.first_year == 0 and log.year_target == 5
+        assert len(log.counts) == 6
+        assert log.counts[-1].tolist() == [recorded.num_animals_per_species["Herbivore"], 0]
+        assert [frame.year for frame in log.frames] == [2, 4]
+        assert [frame.save for frame in log.frames] == [False, True]
+
+    def test_replay(self, recorded):
+        """
+        :method: SnapshotLog.replay
+        Test that the first replayed snapshot holds all counts up to its year
+        """
+        log = recorded.snapshot_log
+        second, = log.replay([1])
+        assert second.first_year == 0 and second.year == 4
+        assert second.counts.tolist() == log.counts[:5].tolist()
+        assert second.year_target == 5
+
+    def test_save_load(self, recorded, tmp_path):
+        """
+        :method: SnapshotLog.save
+        :method: SnapshotLog.load
+        Test that a saved log is loaded with the same counts and frames
+        """
+        log = recorded.snapshot_log
+        log.save(str(tmp_path / "run.npz"))
+        loaded = SnapshotLog.load(str(tmp_path / "run.npz"))
+        assert loaded.map_str == log.map_str
+        assert loaded.counts.tolist() == log.counts.tolist()
+        assert [frame.year for frame in loaded.frames] == [2, 4]
+        assert loaded.frames[1].save
+        assert loaded.frames[1].herb_pop_matrix.tolist() == log.frames[1].herb_pop_matrix.tolist()
+        assert (loaded.frames[1].hist_counts["weight"] == log.frames[1].hist_counts["weight"]).all()
+
+    def test_render_movie(self, tmp_path):
+        """
+        :function: render_movie
+        Test that saved frames are rendered to numbered figure files by several workers
+        """
+        sim = BioSim("WWWW\nWLHW\nWWWW", INI_POP, seed=1, plot_graph=False, record=True)
+        sim.simulate(5, vis_years=1)
+        img_base = str(tmp_path / "run")
+        assert render_movie(sim.snapshot_log, img_base, "png", workers=2, chunk_size=2) == 5
+        assert sorted(glob.glob(img_base + "_0*.png")) == [
+            "{}_{:05d}.png".format(img_base, img_no) for img_no in range(5)
+        ]
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests for the binned population statistics.
+"""
+
+from biosim_src.biosim import BioSim
+from biosim_src.statistics import PopulationStatistics, bin_edges
+import numpy as np
+import pytest
+
+HIST_SPECS = {
+    "weight": {"max": 80, "delta": 2},
+    "fitness": {"max": 1.0, "delta": 0.05},
+    "age": {"max": 80, "delta": 2},
+}
+
+
+def make_sim(engine="object"):
+    """Create a BioSim instance with animals of several ages and weights in two cells"""
+    ini_pop = [
+        {"loc": (2, 2),
+         "pop": [{"species": "Herbivore", "age": age % 20, "weight": 5 + age % 40}
+                 for age in range(300)]},
+        {"loc": (2, 3),
+         "pop": [{"species": "Carnivore", "age": age % 10, "weight": 10 + age % 30}
+                 for age in range(100)]
+         + [{"species": "Herbivore", "age": 3, "weight": 12} for _ in range(200)]},
+    ]
+    return BioSim("WWWW\nWLHW\nWWWW", ini_pop, seed=1, plot_graph=False, engine=engine)
+
+
+class TestPopulationStatistics:
+
+    def test_bin_edges(self):
+        """
+        :function: bin_edges
+        Test that bins start at zero and end at the maximum value
+        """
+        edges = bin_edges({"max": 1.0, "delta": 0.05})
+        assert edges.size == 21
+        assert edges[0] == 0 and edges[-1] == pytest.approx(1.0)
+
+    @pytest.mark.parametrize("engine", ["object", "array"])
+    def test_collect(self, engine):
+        """
+        :method: PopulationStatistics.collect
+        Test that counts equal histograms of the island properties for both engines
+        """
+        sim = make_sim(engine)
+        counts = PopulationStatistics(HIST_SPECS).collect(sim._island)
+        for prop, values in (("weight", sim._island.animal_weights),
+                             ("age", sim._island.animal_ages),
+                             ("fitness", sim._island.animal_fitness)):
+            edges = bin_edges(HIST_SPECS[prop])
+            for species_counts, species_values in zip(counts[prop], values):
+                assert species_counts.tolist() == np.histogram(species_values, edges)[0].tolist()
+
+    def test_collect_sampled(self):
+        """
+        :method: PopulationStatistics.collect
+        Test that sampled counts are scaled to the population and follow the distribution
+        """
+        sim = make_sim()
+        full = PopulationStatistics(HIST_SPECS).collect(sim._island)
+        sampled = PopulationStatistics(HIST_SPECS, sample_size=250, seed=2).collect(sim._island)
+        assert sampled["age"][0].sum() == pytest.approx(500)
+        assert sampled["age"][1].sum() == pytest.approx(100)  # Fewer animals than the sample
+        assert sampled["age"][1].tolist() == full["age"][1].tolist()
+        assert np.abs(sampled["age"][0] - full["age"][0]).sum() < 150
+
+    def test_only_given_properties(self):
+        """
+        :method: PopulationStatistics.collect
+        Test that only properties in the histogram specifications are counted
+        """
+        sim = make_sim()
+        counts = PopulationStatistics({"age": HIST_SPECS["age"]}).collect(sim._island)
+        assert list(counts) == ["age"]
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests for the counter-based random streams.
+"""
+
+from biosim_src.streams import cell_generator, cell_key, CellStream, FEEDING, MIGRATION
+import pytest
+
+
+class TestStreams:
+
+    def test_cell_key(self):
+        """
+        :function: cell_key
+        Test that different cells get different keys
+        """
+        keys = {cell_key((row, col)) for row in range(1, 20) for col in range(1, 20)}
+        assert len(keys) == 19 * 19
+
+    def test_reproducible(self):
+        """
+        :function: cell_generator
+        Test that a stream depends only on its key
+        """
+        first = cell_generator(123, 4, (2, 3), FEEDING).random(10)
+        second = cell_generator(123, 4, (2, 3), FEEDING).random(10)
+        assert list(first) == list(second)
+
+    @pytest.mark.parametrize(
+        "key", [(124, 4, (2, 3), FEEDING), (123, 5, (2, 3), FEEDING),
+                (123, 4, (3, 2), FEEDING), (123, 4, (2, 3), MIGRATION)]
+    )
+    def test_independent(self, key):
+        """
+        :function: cell_generator
+        Test that changing any part of the key gives another stream
+        """
+        first = cell_generator(123, 4, (2, 3), FEEDING).random(10)
+        assert list(cell_generator(*key).random(10)) != list(first)
+
+    def test_negative_seed(self):
+        """
+        :function: cell_generator
+        Test that negative seeds are accepted and give their own stream
+        """
+        first = cell_generator(-1, 4, (2, 3), FEEDING).random(10)
+        assert list(first) == list(cell_generator(2 ** 128 - 1, 4, (2, 3), FEEDING).random(10))
+        assert list(first) != list(cell_generator(1, 4, (2, 3), FEEDING).random(10))
+
+    def test_cell_stream(self):
+        """
+        :class: CellStream
+        Test that the stream can replace the random module
+        """
+        stream = CellStream(123, 0, (2, 2), FEEDING)
+        numbers = [stream.random() for _ in range(100)]
+        assert all(0 <= number < 1 for number in numbers)
+        assert numbers == list(cell_generator(123, 0, (2, 2), FEEDING).random(100))
+
+        seq = list(range(10))
+        stream.shuffle(seq)
+        assert sorted(seq) == list(range(10))
+        assert stream.choice(seq) in seq
+        assert isinstance(stream.gauss(6, 1), float)
+
+    def test_lazy_generator(self):
+        """
+        :method: CellStream.shuffle
+        Test that shuffling nothing or a single animal does not create the generator
+        """
+        stream = CellStream(123, 0, (2, 2), FEEDING)
+        empty, single = [], ["herb"]
+        stream.shuffle(empty)
+        stream.shuffle(single)
+        assert empty == [] and single == ["herb"]
+        assert stream._generator is None
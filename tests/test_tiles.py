@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests for the domain decomposition of the island into tiles.
+"""
+
+from biosim_src.animal import Herbivore
+from biosim_src.landscape import Island
+from biosim_src.tiles import TilePool, partition_rows
+import pytest
+
+
+class TestPartition:
+
+    @pytest.fixture
+    def locs(self):
+        """Coordinates of a 10 x 7 block of land cells"""
+        return [(row, col) for row in range(2, 12) for col in range(2, 9)]
+
+    @pytest.mark.parametrize("num_tiles", [1, 2, 3, 4, 7])
+    def test_all_cells_once(self, locs, num_tiles):
+        """
+        :function: partition_rows
+        Test that every cell belongs to exactly one tile
+        """
+        tiles = partition_rows(locs, num_tiles)
+        assert len(tiles) == num_tiles
+        assert sorted(loc for tile in tiles for loc in tile) == sorted(locs)
+
+    def test_whole_rows(self, locs):
+        """
+        :function: partition_rows
+        Test that no row is split between two tiles
+        """
+        tiles = partition_rows(locs, 3)
+        rows = [{row for row, _ in tile} for tile in tiles]
+        assert all(not first & second for first in rows for second in rows if first is not second)
+
+    def test_more_tiles_than_rows(self, locs):
+        """
+        :function: partition_rows
+        Test that tiles without cells are left out
+        """
+        tiles = partition_rows(locs, 20)
+        assert len(tiles) == 10
+
+
+class TestTilePool:
+
+    def test_worker_error(self):
+        """
+        :method: TilePool.run_years
+        Test that an error in one worker is raised once the other replies are received, and
+        that the pool is closed afterwards
+        """
+        island = Island("WWWW\nWLLW\nWLLW\nWWWW")
+        herb = Herbivore(weight=20)
+        herb._weight = "heavy"  # Fails when the worker computes its fitness
+        island.landscape[(3, 2)].add_herbivores([herb])
+        island.landscape[(2, 2)].add_herbivores([Herbivore(weight=20)])
+        pool = TilePool(island.map_str, 1, 2, island.land_locs)
+        with pytest.raises(TypeError):
+            pool.run_years(island, 0, 1)
+        assert pool.broken
+        with pytest.raises(RuntimeError):
+            pool.run_years(island, 1, 1)
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests for the time series of the line plot.
+"""
+
+from biosim_src.timeseries import TimeSeries
+import numpy as np
+import pytest
+
+
+class TestTimeSeries:
+
+    def test_add(self):
+        """
+        :method: TimeSeries.add
+        Test that values are kept beyond the first capacity and the maximum is updated
+        """
+        series = TimeSeries(capacity=4)
+        series.add(0, [(5, 1)])
+        series.add(1, [(6, 2), (7, 3), (8, 9), (4, 2), (3, 1)])
+        assert len(series) == 6
+        assert series[3].tolist() == [8, 9]
+        assert series.max == 9
+
+    def test_line_data(self):
+        """
+        :method: TimeSeries.line_data
+        Test that every year is returned for short series, starting at the first year added
+        """
+        series = TimeSeries()
+        series.add(3, [(5, 1), (6, 2)])
+        (years, herbs), (_, carns) = series.line_data()
+        assert years.tolist() == [3, 4]
+        assert herbs.tolist() == [5, 6] and carns.tolist() == [1, 2]
+
+    @pytest.mark.parametrize("step", [1, 7, 1000])
+    def test_decimation(self, step):
+        """
+        :method: TimeSeries.line_data
+        Test that long series are reduced to the minimum and maximum of each bucket of years,
+        however the values were added
+        """
+        values = np.random.default_rng(1).integers(0, 1000, (5000, 2))
+        series = TimeSeries(max_points=200)
+        for year in range(0, len(values), step):
+            series.add(year, values[year:year + step])
+
+        for column, (years, line) in enumerate(series.line_data()):
+            assert len(years) <= 200
+            assert (np.diff(years) >= 0).all()
+            width = -(-len(values) // (len(years) // 2))
+            assert width & (width - 1) == 0  # Power of two
+            for bucket in range(len(years) // 2):
+                expected = values[bucket * width:(bucket + 1) * width, column]
+                assert sorted(line[2 * bucket:2 * bucket + 2]) == [expected.min(), expected.max()]
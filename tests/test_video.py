@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+
+"""
+Tests for the frame output of the visualization.
+"""
+
+from biosim_src import biosim
+from biosim_src.biosim import BioSim
+from biosim_src.video import FrameSpool, MovieStream
+from matplotlib.figure import Figure
+import numpy as np
+import glob
+import os
+import shutil
+import tempfile
+import pytest
+
+
+class TestFrameSpool:
+
+    @pytest.fixture
+    def figure(self):
+        """Create a small figure"""
+        figure = Figure(figsize=(1, 1), dpi=50)
+        figure.add_subplot().plot([0, 1], [1, 0])
+        return figure
+
+    def test_write_and_cleanup(self, tmp_path, figure):
+        """
+        :method: FrameSpool.write
+        :method: FrameSpool.cleanup
+        Test that frames are numbered from 0 and deleted by cleanup
+        """
+        spool = FrameSpool(str(tmp_path / "frame"))
+        for _ in range(3):
+            spool.write(figure)
+        assert sorted(os.listdir(tmp_path)) == ["frame_00000.png", "frame_00001.png",
+                                                "frame_00002.png"]
+        spool.cleanup()
+        assert os.listdir(tmp_path) == []
+
+    def test_bounded(self, tmp_path, figure):
+        """
+        :method: FrameSpool.write
+        Test that images are thinned to stay within the disk limit and numbered without gaps
+        """
+        spool = FrameSpool(str(tmp_path / "frame"))
+        spool.write(figure)
+        spool.max_bytes = 4.5 * os.path.getsize(spool.path(0))  # Room for four images
+        for _ in range(15):
+            spool.write(figure)
+
+        assert spool.frame_step == 4
+        assert spool.num_frames == 4  # Frames 0, 4, 8 and 12 of 16
+        assert sorted(os.listdir(tmp_path)) == [os.path.basename(spool.path(img_no))
+                                                for img_no in range(4)]
+
+
+class TestMovieStream:
+
+    @pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg is not installed")
+    def test_encode(self, tmp_path):
+        """
+        :method: MovieStream.write
+        Test that raw frames are encoded to a movie file
+        """
+        stream = MovieStream(str(tmp_path / "movie.mp4"), 64, 48)
+        for value in range(10):
+            stream.write(np.full((48, 64, 4), 25 * value, dtype=np.uint8))
+        stream.close()
+        assert os.path.getsize(tmp_path / "movie.mp4") > 0
+
+    def test_missing_encoder(self, tmp_path, mocker):
+        """
+        Test that a missing ffmpeg binary raises FileNotFoundError and leaves no open files
+        """
+        log = mocker.spy(tempfile, "TemporaryFile")
+        with pytest.raises(FileNotFoundError):
+            MovieStream(str(tmp_path / "movie.mp4"), 64, 48, ffmpeg="no-such-ffmpeg")
+        assert log.spy_return.closed
+
+    @pytest.mark.skipif(shutil.which("true") is None, reason="true is not installed")
+    def test_stopped_encoder(self, tmp_path):
+        """
+        :method: MovieStream.write
+        Test that a frame is not counted when the encoder has stopped before reading it
+        """
+        stream = MovieStream(str(tmp_path / "movie.mp4"), 640, 480, ffmpeg="true")
+        with pytest.raises(BrokenPipeError):
+            stream.write(np.zeros((480, 640, 4), dtype=np.uint8))
+        assert stream.num_frames == 0
+
+    def test_frame_shape(self, tmp_path):
+        """
+        :method: MovieStream.write
+        Test that frames of the wrong size are rejected
+        """
+        if shutil.which("ffmpeg") is None:
+            pytest.skip("ffmpeg is not installed")
+        stream = MovieStream(str(tmp_path / "movie.mp4"), 64, 48)
+        with pytest.raises(ValueError):
+            stream.write(np.zeros((48, 60, 4), dtype=np.uint8))
+        stream.close()
+
+
+def test_mp4_falls_back_to_files(tmp_path, monkeypatch):
+    """
+    :method: BioSim.simulate
+    :method: BioSim.image_cleanup
+    Test that frames are saved as png files when ffmpeg is missing, and cleaned up
+    """
+    monkeypatch.setattr(biosim, "_FFMPEG_BINARY", "no-such-ffmpeg")
+    img_base = str(tmp_path / "sim")
+    sim = BioSim(island_map="WWWW\nWLHW\nWWWW", ini_pop=[], seed=1, img_base=img_base,
+                 img_fmt="mp4")
+    with pytest.warns(UserWarning):
+        sim.simulate(3, vis_years=1)
+    assert len(glob.glob(img_base + "_0*.png")) == 3
+    sim.image_cleanup()
+    assert glob.glob(img_base + "_0*.png") == []